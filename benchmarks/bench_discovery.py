@@ -0,0 +1,66 @@
+"""
+Measures how cold workspace discovery scales with the number of projects and parse workers.
+
+Usage:
+    python benchmarks/bench_discovery.py [--projects 10 100 1000] [--workers 1 4 16] [--repeat 3]
+
+Every measurement starts without a workspace index, so all manifests are parsed.
+"""
+import os
+import shutil
+import argparse
+import tempfile
+import time
+from unittest.mock import patch
+from devops_runner_python import discovery
+from devops_runner_python.index import get_index_path
+
+
+def generate_projects(root: str, count: int) -> None:
+    for i in range(count):
+        project_dir = os.path.join(root, "apps", f"group{i % 10}", f"project{i}")
+        os.makedirs(project_dir)
+        with open(os.path.join(project_dir, "pyproject.toml"), "w") as f:
+            f.write(
+                f'[project]\nname = "project{i}"\nversion = "0.1.0"\ndependencies = ["pydantic>=2"]\n\n'
+                f'[tool.devops.scripts]\ntest = "pytest"\nlint = "ruff check ."\n\n'
+                f'[tool.devops.deployment]\nservice_name = "project{i}"\nport = {8000 + i}\n'
+            )
+
+
+def time_discovery(root: str, workers: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        try:
+            os.remove(get_index_path(root))
+        except FileNotFoundError:
+            pass
+        discovery._projects = None
+        with patch.dict(os.environ, {"MONOREPO_ROOT": root, "DEVOPS_DISCOVERY_WORKERS": str(workers)}):
+            with patch("builtins.print"):
+                start = time.perf_counter()
+                discovery.find_python_projects()
+                best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'projects':>10} " + " ".join(f"{f'workers={w}':>12}" for w in args.workers))
+    for count in args.projects:
+        root = tempfile.mkdtemp(prefix="devops-bench-")
+        try:
+            generate_projects(root, count)
+            timings = [time_discovery(root, workers, args.repeat) for workers in args.workers]
+        finally:
+            shutil.rmtree(root)
+        print(f"{count:>10} " + " ".join(f"{t * 1000:>10.1f}ms" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
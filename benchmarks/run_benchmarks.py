@@ -0,0 +1,184 @@
+"""
+Times devopspy's hot paths against a synthetic monorepo and writes the results as JSON.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--projects 200] [--depth 3] [--decoys 10] [--env-yamls 100]
+                                        [--repeat 5] [--output results.json] [--compare baseline.json]
+
+Benchmarks:
+    discovery.cold / discovery.warm        find_python_projects without / with the workspace index
+    validate_environment.cold / .warm      repo-wide validation without / with the schema and result caches
+    load_env_vars                          loading config/.env.* into the environment
+    get_service_endpoint.first / .next     endpoint resolution including / after discovery
+    cli.run                                end-to-end `devopspy run project0:noop` in a child interpreter
+    cli.run_many                           end-to-end `devopspy run-many noop` in a child interpreter
+
+Every result records the minimum and median of the runs in seconds. With --compare, each
+benchmark's median is reported relative to the same benchmark in an earlier result file.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import statistics
+import subprocess
+import tempfile
+from contextlib import redirect_stdout
+from typing import Callable, Dict
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth import generate_monorepo
+from devops_runner_python import discovery, services, workspace
+from devops_runner_python.cache import get_cache_dir
+from devops_runner_python.env import load_env_vars
+from devops_runner_python.env_validation import validate_environment
+from devops_runner_python.pyproject import get_service_endpoint
+
+CLI = "from devops_runner_python.cli import main; main()"
+
+
+def reset_process_state() -> None:
+    discovery._projects = None
+    workspace._scans.clear()
+    services._service_index = None
+
+
+def reset_disk_caches(root: str) -> None:
+    shutil.rmtree(get_cache_dir(root), ignore_errors=True)
+
+
+def measure(fn: Callable[[], None], repeat: int, setup: Callable[[], None] = lambda: None) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        setup()
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": repeat}
+
+
+def run_cli(root: str, *args: str) -> None:
+    env = {
+        **os.environ,
+        "PATH": os.path.join(root, "bin") + os.pathsep + os.environ.get("PATH", ""),
+        "PYTHONPATH": os.pathsep.join(sys.path),
+    }
+    env.pop("MONOREPO_ROOT", None)
+    result = subprocess.run([sys.executable, "-c", CLI, *args], cwd=root, env=env, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"devopspy {' '.join(args)} failed:\n{result.stdout.decode()}{result.stderr.decode()}")
+
+
+def run_benchmarks(root: str, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    def cold():
+        reset_process_state()
+        reset_disk_caches(root)
+
+    results["discovery.cold"] = measure(discovery.find_python_projects, repeat, setup=cold)
+    results["discovery.warm"] = measure(discovery.find_python_projects, repeat, setup=reset_process_state)
+
+    def load():
+        load_env_vars("development", root)
+
+    with patch.dict(os.environ):
+        results["load_env_vars"] = measure(load, repeat)
+
+        measure(load, 1)
+        results["validate_environment.cold"] = measure(validate_environment, repeat, setup=cold)
+        results["validate_environment.warm"] = measure(validate_environment, repeat, setup=reset_process_state)
+
+    def first_endpoint():
+        get_service_endpoint("svc-project0")
+
+    results["get_service_endpoint.first"] = measure(first_endpoint, repeat, setup=reset_process_state)
+    results["get_service_endpoint.next"] = measure(first_endpoint, repeat)
+
+    reset_disk_caches(root)
+    run_cli(root, "run", "project0:noop")
+    results["cli.run"] = measure(lambda: run_cli(root, "run", "project0:noop"), repeat)
+    results["cli.run_many"] = measure(lambda: run_cli(root, "run-many", "noop"), repeat)
+    return results
+
+
+def get_version() -> str:
+    try:
+        from importlib.metadata import version
+        return version("devops-runner-python")
+    except Exception:
+        return "unknown"
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\n{'benchmark':<30} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median"], result["median"]
+        print(f"{name:<30} {before * 1000:>10.2f}ms {after * 1000:>10.2f}ms {after / before:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--decoys", type=int, default=10)
+    parser.add_argument("--env-yamls", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="File to write the JSON results to (default: stdout)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="devops-bench-")
+    try:
+        generate_monorepo(root, args.projects, args.depth, args.decoys, args.env_yamls)
+        with patch.dict(os.environ, {"MONOREPO_ROOT": root}):
+            cwd = os.getcwd()
+            os.chdir(root)
+            try:
+                results = run_benchmarks(root, args.repeat)
+            finally:
+                os.chdir(cwd)
+    finally:
+        shutil.rmtree(root)
+
+    report = {
+        "meta": {
+            "version": get_version(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.time(),
+            "params": {
+                "projects": args.projects,
+                "depth": args.depth,
+                "decoys": args.decoys,
+                "env_yamls": args.env_yamls,
+                "repeat": args.repeat,
+            },
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Generates synthetic monorepos for benchmarking devopspy.
+
+A generated monorepo has:
+- `projects` projects spread over nested group directories `depth` levels deep, each
+  with a pyproject.toml declaring `noop` and `test` stub scripts, a deployment with a
+  unique service name and port, and a dependency on the previous project in its group
+- `decoys` decoy trees (venv/, .venv/ and node_modules/) full of pyproject.toml and
+  env.yaml files that discovery must skip
+- `env_yamls` env.yaml files, spread over the projects
+- config/.env.global and config/.env.development files satisfying every env.yaml
+- a bin/uv shim that runs its arguments directly, so dispatch can be timed without uv
+"""
+import os
+import stat
+import argparse
+from typing import List
+
+UV_SHIM = """#!/bin/sh
+[ "$1" = "run" ] && shift
+exec "$@"
+"""
+
+
+def project_dir(root: str, index: int, depth: int) -> str:
+    groups = [f"group{(index >> (2 * level)) % 4}" for level in range(max(depth - 1, 0))]
+    return os.path.join(root, "apps", *groups, f"project{index}")
+
+
+def generate_monorepo(root: str, projects: int = 50, depth: int = 2, decoys: int = 5, env_yamls: int = 20) -> List[str]:
+    """
+    Generates a synthetic monorepo under root.
+
+    Returns:
+        The names of the generated projects
+    """
+    names = []
+    env_keys = []
+    for i in range(projects):
+        name = f"project{i}"
+        names.append(name)
+        directory = project_dir(root, i, depth)
+        os.makedirs(os.path.join(directory, "src", name))
+        previous = f'"project{i - 1}"' if i % 4 else ""
+        with open(os.path.join(directory, "pyproject.toml"), "w") as f:
+            f.write(
+                f'[project]\nname = "{name}"\nversion = "0.1.0"\ndependencies = ["pydantic>=2", {previous}]\n\n'
+                f'[tool.devops.scripts]\nnoop = "true"\ntest = "python -c pass"\n\n'
+                f'[tool.devops.deployment]\nservice_name = "svc-{name}"\nport = {10000 + i}\n'
+            )
+        with open(os.path.join(directory, "src", name, "__init__.py"), "w") as f:
+            f.write("")
+
+    for i in range(env_yamls):
+        directory = project_dir(root, i % max(projects, 1), depth)
+        file_name = "env.yaml" if i < projects else os.path.join(f"service{i}", "env.yaml")
+        path = os.path.join(directory, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        keys = [f"BENCH_VAR_{i}_{j}" for j in range(5)]
+        env_keys.extend(keys)
+        with open(path, "w") as f:
+            f.write(f"- {keys[0]}\n- {keys[1]}: optional\n- {keys[2]}: boolean\n- {keys[3]}: [a, b]\n- {keys[4]}\n")
+
+    for i in range(decoys):
+        for decoy in ["venv", ".venv", "node_modules"]:
+            for j in range(10):
+                directory = os.path.join(root, "apps", f"decoy{i}", decoy, "lib", f"pkg{j}")
+                os.makedirs(directory)
+                with open(os.path.join(directory, "pyproject.toml"), "w") as f:
+                    f.write(f'[project]\nname = "decoy-{i}-{decoy}-{j}"\n')
+                with open(os.path.join(directory, "env.yaml"), "w") as f:
+                    f.write("- NEVER_SET\n")
+
+    os.makedirs(os.path.join(root, "config"))
+    with open(os.path.join(root, "config", ".env.global"), "w") as f:
+        f.write("".join(f"{key}={'true' if key.endswith('_2') else 'a'}\n" for key in env_keys))
+    with open(os.path.join(root, "config", ".env.development"), "w") as f:
+        f.write("MONOREPO_BENCH=1\n")
+
+    os.makedirs(os.path.join(root, "bin"))
+    shim = os.path.join(root, "bin", "uv")
+    with open(shim, "w") as f:
+        f.write(UV_SHIM)
+    os.chmod(shim, os.stat(shim).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic monorepo")
+    parser.add_argument("root", help="Directory to generate the monorepo in (must not exist)")
+    parser.add_argument("--projects", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--decoys", type=int, default=5)
+    parser.add_argument("--env-yamls", type=int, default=20)
+    args = parser.parse_args()
+
+    generate_monorepo(args.root, args.projects, args.depth, args.decoys, args.env_yamls)
+    print(f"Generated {args.projects} projects in {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,9 @@
-from .pyproject import get_pyproject_data, get_service_endpoint
+__all__ = ["get_pyproject_data", "get_service_endpoint", "get_service_endpoints"]
 
-__all__ = ["get_pyproject_data", "get_service_endpoint"]
\ No newline at end of file
+
+def __getattr__(name):
+    # Resolved lazily so that importing the CLI doesn't load pydantic and tomli up front
+    if name in __all__:
+        from . import pyproject
+        return getattr(pyproject, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
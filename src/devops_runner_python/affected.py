@@ -0,0 +1,79 @@
+import os
+import fnmatch
+import subprocess
+from typing import Dict, List, Optional, Set
+from .discovery import Project
+from .workspace import get_devops_config, get_monorepo_root
+from .graph import with_dependents
+
+DEFAULT_BASE = "main"
+
+# Changes to these files, relative to the monorepo root, affect every project
+DEFAULT_GLOBAL_FILES = ["pyproject.toml", "uv.lock"]
+
+
+class GitError(Exception):
+    """Raised when a git command needed to compute the affected projects fails."""
+
+
+def _git(args: List[str], cwd: str) -> str:
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=False)
+    except OSError as e:
+        raise GitError(f"Could not run git: {e}")
+    if result.returncode != 0:
+        raise GitError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def get_changed_files(base: str, cwd: str) -> List[str]:
+    """
+    Returns the absolute paths of files changed since the merge base of `base` and HEAD:
+    committed changes, uncommitted changes to tracked files and untracked files.
+    """
+    toplevel = _git(["rev-parse", "--show-toplevel"], cwd).strip()
+    merge_base = _git(["merge-base", base, "HEAD"], cwd).strip()
+    changed = _git(["diff", "--name-only", "--no-renames", merge_base], toplevel).splitlines()
+    untracked = _git(["ls-files", "--others", "--exclude-standard"], toplevel).splitlines()
+    return [os.path.join(toplevel, path) for path in dict.fromkeys(changed + untracked) if path]
+
+
+def find_owning_project(projects: Dict[str, Project], path: str) -> Optional[str]:
+    """Returns the name of the project whose directory most specifically contains path, or None."""
+    path = os.path.realpath(path)
+    owner, owner_depth = None, -1
+    for name, project in projects.items():
+        project_path = os.path.realpath(project.path)
+        if path == project_path or path.startswith(project_path + os.sep):
+            depth = project_path.count(os.sep)
+            if depth > owner_depth:
+                owner, owner_depth = name, depth
+    return owner
+
+
+def get_affected_projects(projects: Dict[str, Project], base: Optional[str] = None) -> Set[str]:
+    """
+    Returns the projects affected by the changes since `base`: the projects owning a changed
+    file and all projects depending on them. A change to one of the global files configured
+    under [tool.devops.affected] global_files (default: the root pyproject.toml and uv.lock)
+    affects every project.
+
+    Raises:
+        GitError: If the changed files can't be determined
+    """
+    root = get_monorepo_root()
+    affected_config = get_devops_config(root).get("affected", {})
+    base = base or affected_config.get("base", DEFAULT_BASE)
+    global_files = affected_config.get("global_files", DEFAULT_GLOBAL_FILES)
+    real_root = os.path.realpath(root)
+
+    owners = set()
+    for path in get_changed_files(base, root):
+        rel_path = os.path.relpath(os.path.realpath(path), real_root)
+        if any(fnmatch.fnmatch(rel_path, pattern) for pattern in global_files):
+            return set(projects)
+        owner = find_owning_project(projects, path)
+        if owner is not None:
+            owners.add(owner)
+
+    return with_dependents(projects, owners)
@@ -0,0 +1,317 @@
+"""
+Asynchronous API running project scripts from Python code, without going through the CLI.
+
+    from devops_runner_python.api import run_many, run_script, TaskOutput, TaskFinished
+
+    result = await run_script("api", "test", env="ci", args=["-x"], timeout=600)
+
+    async for event in run_many("test", projects=["api", "web"], jobs=4):
+        if isinstance(event, TaskOutput):
+            print(event.project, event.line)
+        elif isinstance(event, TaskFinished) and not event.result.ok:
+            print("\\n".join(event.result.tail))
+
+Projects are discovered and the environment is built and validated as the CLI commands do
+(see build_env), but nothing is printed: the output of the scripts is delivered as events,
+the messages of discovery and validation are logged to the devops_runner_python.api logger
+(validation errors are raised), and neither the working directory nor os.environ is modified. Scripts run as asyncio
+subprocesses, each in its own process group; a script that times out, a run-many fan-out
+that is closed early and a cancelled run_script all terminate the processes they started.
+"""
+import time
+import signal
+import asyncio
+import logging
+import subprocess
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, List, Optional, Union
+from pydantic import BaseModel
+from . import durations
+from .console import captured
+from .discovery import find_python_projects, get_monorepo_root
+from .env import build_env, validate_env_vars
+from .graph import task_dependencies
+from .logmux import DEFAULT_TAIL_LINES, READ_SIZE, split_lines
+from .scheduler import TERMINATE_GRACE_PERIOD, Task, TaskQueue, TaskResult, signal_group
+
+logger = logging.getLogger(__name__)
+
+# Events waiting for the consumer of run_many; once full, reading the output of the scripts
+# pauses, so a slow consumer slows the scripts down instead of piling up their output
+EVENT_QUEUE_SIZE = 1024
+
+
+class EnvironmentValidationError(RuntimeError):
+    """Raised when the environment doesn't satisfy the env.yaml manifests of the projects to run."""
+
+
+class ScriptResult(TaskResult):
+    """The result of a script in a project (named by the name field). A skipped script has an exit code of None."""
+    script: str
+    # Whether the script was terminated for exceeding its timeout
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == 0
+
+
+class TaskStarted(BaseModel):
+    project: str
+    script: str
+    cmd: List[str]
+    time: float
+
+
+class TaskOutput(BaseModel):
+    project: str
+    script: str
+    # "stdout" or "stderr"
+    stream: str
+    line: str
+    time: float
+
+
+class TaskFinished(BaseModel):
+    result: ScriptResult
+
+
+Event = Union[TaskStarted, TaskOutput, TaskFinished]
+
+
+async def run_script(project: str, script: str, env: str = "development", args: Optional[List[str]] = None,
+                     timeout: Optional[float] = None, on_output: Optional[Callable[[TaskOutput], None]] = None,
+                     validate: bool = True, tail_lines: int = DEFAULT_TAIL_LINES) -> ScriptResult:
+    """
+    Runs one of a project's scripts.
+
+    Args:
+        project: Name of the project
+        script: Name of the script in the project's [tool.devops.scripts]
+        env: Environment to build the script's environment variables from
+        args: Additional arguments to pass to the script
+        timeout: Seconds after which the script is terminated (default: no limit)
+        on_output: Called with every line of output of the script
+        validate: Whether to validate the environment against the project's env.yaml manifests
+        tail_lines: Number of output lines kept in the result
+
+    Returns:
+        The result of the script
+
+    Raises:
+        ValueError: If the project or script doesn't exist
+        EnvironmentValidationError: If the environment is invalid
+    """
+    result = None
+    async for event in _run(script, env, [project], args, None, timeout, False, validate, tail_lines, True):
+        if isinstance(event, TaskOutput) and on_output is not None:
+            on_output(event)
+        elif isinstance(event, TaskFinished):
+            result = event.result
+    return result
+
+
+async def run_many(script: str, env: str = "development", projects: Optional[List[str]] = None,
+                   args: Optional[List[str]] = None, jobs: Optional[int] = None, timeout: Optional[float] = None,
+                   kill_others_on_fail: bool = False, validate: bool = True,
+                   tail_lines: int = DEFAULT_TAIL_LINES) -> AsyncIterator[Event]:
+    """
+    Runs a script in all projects defining it, like the run-many command, yielding an event
+    whenever a script starts, prints a line and finishes. Scripts start once the script
+    succeeded in the workspace projects they depend on, and are packed against the jobs and
+    memory budgets (see run_tasks). Closing the iterator early terminates the running scripts.
+
+    Args:
+        script: Name of the script to run
+        env: Environment to build the scripts' environment variables from
+        projects: Restrict the run to these projects (default: all projects)
+        args: Additional arguments to pass to the scripts
+        jobs: Maximum number of scripts, and of CPU cores, in use at once (default: number of CPU cores)
+        timeout: Seconds after which each script is terminated (default: no limit)
+        kill_others_on_fail: Whether to terminate running scripts and skip pending ones once a script fails
+        validate: Whether to validate the environment against the projects' env.yaml manifests
+        tail_lines: Number of output lines kept in each result
+
+    Raises:
+        ValueError: If one of the projects doesn't exist
+        CycleError: If the projects' dependencies form a cycle
+        EnvironmentValidationError: If the environment is invalid
+    """
+    async for event in _run(script, env, projects, args, jobs, timeout, kill_others_on_fail, validate, tail_lines,
+                            False):
+        yield event
+
+
+async def _run(script: str, env: str, project_names: Optional[List[str]], args: Optional[List[str]],
+               jobs: Optional[int], timeout: Optional[float], kill_others_on_fail: bool, validate: bool,
+               tail_lines: int, require_script: bool) -> AsyncIterator[Event]:
+    # Discovery and validation read many files: keep them off the event loop
+    tasks = await asyncio.to_thread(_prepare, script, env, project_names, args or [], validate, require_script)
+    events: asyncio.Queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+    scheduler = asyncio.ensure_future(_schedule(tasks, script, jobs, timeout, kill_others_on_fail, tail_lines, events))
+    get = None
+    try:
+        while True:
+            get = asyncio.ensure_future(events.get())
+            await asyncio.wait({get, scheduler}, return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                yield get.result()
+                continue
+            # The scheduler is done: take the remaining events without the pending get
+            get.cancel()
+            while not events.empty():
+                yield events.get_nowait()
+            results = scheduler.result()
+            durations.record_durations(get_monorepo_root(), script, results.values())
+            return
+    finally:
+        if get is not None:
+            get.cancel()
+        if not scheduler.done():
+            scheduler.cancel()
+            await asyncio.gather(scheduler, return_exceptions=True)
+
+
+def _prepare(script: str, env: str, project_names: Optional[List[str]], args: List[str], validate: bool,
+             require_script: bool) -> List[Task]:
+    with captured() as messages:
+        try:
+            return _build_tasks(script, env, project_names, args, validate, require_script, messages)
+        finally:
+            for message in messages:
+                if message.strip():
+                    logger.info(message.strip())
+
+
+def _build_tasks(script: str, env: str, project_names: Optional[List[str]], args: List[str], validate: bool,
+                 require_script: bool, messages: List[str]) -> List[Task]:
+    from .cli.run_many import build_tasks
+
+    projects = find_python_projects()
+    for name in project_names or []:
+        if name not in projects:
+            raise ValueError(f"Project '{name}' not found")
+        if require_script and script not in projects[name].scripts:
+            raise ValueError(f"Script '{script}' not found in project '{name}'")
+    selected = set(project_names) if project_names else set(projects)
+    matching = [project for name, project in projects.items() if name in selected and script in project.scripts]
+    names = [project.name for project in matching]
+    deps = task_dependencies(projects, names)
+
+    environ = build_env(env, get_monorepo_root())
+    if validate and matching:
+        start = len(messages)
+        if not validate_env_vars(projects, names, environ):
+            details = "\n".join(message for message in messages[start:] if message.strip())
+            raise EnvironmentValidationError(f"Environment '{env}' does not satisfy the env.yaml manifests of "
+                                             f"{', '.join(names)}:\n{details}")
+    return build_tasks(matching, deps, script, args, environ)
+
+
+async def _schedule(tasks: List[Task], script: str, jobs: Optional[int], timeout: Optional[float],
+                    kill_others_on_fail: bool, tail_lines: int, events: asyncio.Queue) -> Dict[str, ScriptResult]:
+    """Runs tasks with the scheduling decisions of run_tasks (see TaskQueue), from the event loop."""
+    schedule = TaskQueue(tasks, jobs)
+    running: Dict[asyncio.Future, Task] = {}
+    halt = asyncio.Event()
+
+    async def skip(task: Task) -> None:
+        result = ScriptResult(name=task.name, script=script, exit_code=None, duration=0.0)
+        schedule.finish(result)
+        await events.put(TaskFinished(result=result))
+
+    try:
+        while schedule.pending or running:
+            while not halt.is_set() and (task := schedule.next_ready()) is not None:
+                if schedule.failed_deps(task):
+                    await skip(task)
+                    continue
+                running[asyncio.ensure_future(_run_task(task, script, timeout, tail_lines, events, halt))] = task
+                schedule.start(task)
+
+            if halt.is_set():
+                for task in schedule.halt():
+                    await skip(task)
+            if not running:
+                schedule.check_stalled()
+                continue
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                running.pop(future)
+                result = future.result()
+                schedule.finish(result)
+                if result.exit_code != 0 and kill_others_on_fail:
+                    halt.set()
+    finally:
+        for future in running:
+            future.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+    return schedule.results
+
+
+async def _run_task(task: Task, script: str, timeout: Optional[float], tail_lines: int, events: asyncio.Queue,
+                    halt: asyncio.Event) -> ScriptResult:
+    """Runs a task, reporting its events, until it exits, times out, or halt is set."""
+    tail = deque(maxlen=tail_lines)
+    start = time.monotonic()
+    try:
+        # Each task gets its own process group, as in run_tasks
+        proc = await asyncio.create_subprocess_exec(
+            *task.cmd, cwd=task.cwd, env=task.env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE, start_new_session=True,
+        )
+    except OSError as e:
+        result = ScriptResult(name=task.name, script=script, exit_code=127, duration=0.0,
+                              tail=[f"Error starting {' '.join(task.cmd)}: {e}"])
+        await events.put(TaskFinished(result=result))
+        return result
+    await events.put(TaskStarted(project=task.name, script=script, cmd=task.cmd, time=time.time()))
+
+    async def pump(reader: asyncio.StreamReader, stream: str) -> None:
+        partial = b""
+        while True:
+            data = await reader.read(READ_SIZE)
+            lines, partial = split_lines(partial, data) if data else ([partial] if partial else [], b"")
+            for line in lines:
+                text = line.rstrip(b"\r").decode(errors="replace")
+                tail.append(text)
+                await events.put(TaskOutput(project=task.name, script=script, stream=stream, line=text,
+                                            time=time.time()))
+            if not data:
+                return
+
+    completion = asyncio.ensure_future(asyncio.gather(pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"),
+                                                      proc.wait()))
+    halted = asyncio.ensure_future(halt.wait())
+    timed_out = False
+    try:
+        done, _ = await asyncio.wait({completion, halted}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        if completion not in done:
+            timed_out = halted not in done
+            await _terminate(proc)
+            await completion
+    except BaseException:
+        # Cancelled: stop the task's processes before giving up on it
+        completion.cancel()
+        await _terminate(proc)
+        raise
+    finally:
+        halted.cancel()
+
+    result = ScriptResult(name=task.name, script=script, exit_code=proc.returncode, duration=time.monotonic() - start,
+                          tail=list(tail), timed_out=timed_out)
+    await events.put(TaskFinished(result=result))
+    return result
+
+
+async def _terminate(proc: asyncio.subprocess.Process) -> None:
+    """Sends SIGTERM to the process group of proc, escalating to SIGKILL after the grace period."""
+    if proc.returncode is not None:
+        return
+    signal_group(proc, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(proc.wait(), TERMINATE_GRACE_PERIOD)
+    except asyncio.TimeoutError:
+        signal_group(proc, signal.SIGKILL)
+        await proc.wait()
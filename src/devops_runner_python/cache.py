@@ -0,0 +1,73 @@
+import os
+
+DEVOPS_DIR_NAME = ".devops"
+CACHE_DIR_NAME = os.path.join(DEVOPS_DIR_NAME, "cache")
+
+# Monorepo roots whose .devops directory is known to hold its .gitignore
+_ignored_roots: set = set()
+
+
+def get_cache_dir(base_dir: str) -> str:
+    """
+    Returns the directory holding the persistent caches of the monorepo rooted at base_dir.
+    The .devops directory holding the caches, logs and daemon socket is given a .gitignore
+    ignoring all of it, so none of it gets committed to the monorepo.
+    """
+    if base_dir not in _ignored_roots:
+        ensure_gitignore(base_dir)
+        _ignored_roots.add(base_dir)
+    return os.path.join(base_dir, CACHE_DIR_NAME)
+
+
+def ensure_gitignore(base_dir: str) -> None:
+    """Creates .devops/.gitignore ignoring every file of the directory, unless it exists."""
+    path = os.path.join(base_dir, DEVOPS_DIR_NAME, ".gitignore")
+    if os.path.exists(path):
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "x") as f:
+            f.write("# Created by devops-runner: caches, logs and daemon state are local to this checkout\n*\n")
+    except OSError:
+        # Already created concurrently, or a read-only checkout: the caches still work without it
+        pass
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Writes data to path atomically: the content is written to a temporary file in the
+    same directory which then replaces path, so readers never observe a partial file.
+    """
+    import tempfile
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(size) -> int:
+    """
+    Parses a size given as a number of bytes or as a string with a binary unit suffix,
+    e.g. 512, "512K", "2G" or "1.5GiB".
+    """
+    if isinstance(size, (int, float)):
+        return int(size)
+    value = str(size).strip().upper().removesuffix("IB").removesuffix("B")
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ""
+    try:
+        return int(float(value[:len(value) - len(unit)]) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size: {size}")
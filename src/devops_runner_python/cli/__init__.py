@@ -1,24 +1,41 @@
 import argparse
 import sys
-from .run import run
-from .run_many import run_many
-from .uv import uv
+
+# Subcommand modules are imported by their handlers, so every invocation only pays for
+# the imports of the subcommand it runs (see --startup-profile).
 
 
 def main():
+    # Profiling re-runs the rest of the command line in a child interpreter, before any parsing
+    if sys.argv[1:2] == ['--startup-profile']:
+        handle_startup_profile(sys.argv[2:])
+        return
+
     # Create the top-level parser
     parser = argparse.ArgumentParser(prog='devops')
+    # Only listed for --help: the flag is handled above, and must come before everything else
+    parser.add_argument('--startup-profile', action='store_true',
+                        help='Run the command under python -X importtime and report startup costs '
+                             '(must be the first argument)')
+    parser.add_argument('--trace', metavar='FILE', default=None,
+                        help='Record the time spent in each phase as a Chrome trace (chrome://tracing, Perfetto)')
     subparsers = parser.add_subparsers(dest='command', required=True)
 
     # Subparser for the 'exec' command under 'devopspy'
-    parser_exec = subparsers.add_parser('exec', help='Execute a command in a project')
+    parser_exec = subparsers.add_parser('exec', help='Execute a command in one or more projects')
     parser_exec.add_argument('--env', default='development', help='Environment to load (default: development)')
-    parser_exec.add_argument('--in', dest='project', required=True, help='Specify the project')
+    parser_exec_scope = parser_exec.add_mutually_exclusive_group(required=True)
+    parser_exec_scope.add_argument('--in', dest='projects', action='append',
+                                   help='Specify the project, or a glob pattern of project names (can be repeated)')
+    parser_exec_scope.add_argument('--all', action='store_true', help='Execute the command in every project')
+    parser_exec.add_argument('--jobs', '-j', type=int, default=None,
+                             help='Maximum number of projects running the command at once (default: number of CPU cores)')
     parser_exec.add_argument('args', nargs=argparse.REMAINDER, help='Arguments for the exec command')
 
     # Subparser for the 'run' command
     parser_run = subparsers.add_parser('run', help='Run a script in a specific project')
     parser_run.add_argument('--env', default='development', help='Environment to load (default: development)')
+    parser_run.add_argument('--no-cache', action='store_true', help='Run the script even if a cached result exists')
     parser_run.add_argument('arg', help='Argument for the run command, of the form "project:script"')
     parser_run.add_argument('script_args', nargs=argparse.REMAINDER, 
                          help='Additional arguments to pass to the script')
@@ -30,53 +47,193 @@ def main():
     parser_run_many.add_argument('script_name', help='Name of the script to run')
     parser_run_many.add_argument('--kill-others-on-fail', action='store_true', 
                               help='Kill all other running processes if one fails')
+    parser_run_many.add_argument('--jobs', '-j', type=int, default=None,
+                              help='Maximum number of scripts running at once (default: number of CPU cores)')
+    parser_run_many.add_argument('--project', '-p', dest='projects', action='append',
+                              help='Only run the script in this project (can be repeated)')
+    parser_run_many.add_argument('--with-deps', action='store_true',
+                              help='Also run the script in the workspace dependencies of the selected projects')
+    parser_run_many.add_argument('--dependents', action='store_true',
+                              help='Also run the script in the projects depending on the selected projects')
+    parser_run_many.add_argument('--affected', action='store_true',
+                              help='Only run the script in projects affected by changes since the base ref')
+    parser_run_many.add_argument('--base', default=None,
+                              help='Git ref to compute affected projects against (default: main)')
+    parser_run_many.add_argument('--no-cache', action='store_true',
+                              help='Run the scripts even if cached results exist')
+    parser_run_many.add_argument('--watch', action='store_true',
+                              help='Keep running, re-running the script in the projects affected by file changes')
+    parser_run_many.add_argument('--output', choices=['stream', 'grouped', 'jsonl'], default='stream',
+                                 help='How to show the output of the scripts: prefixed lines as they come (stream), '
+                                      'one block per project once it finishes (grouped) or JSON lines (jsonl)')
+    parser_run_many.add_argument('--shard', metavar='I/N', default=None,
+                                 help='Run only the I-th of N parts of the matching projects, balanced by how long '
+                                      'the script took in them before (for splitting a run across CI nodes)')
     parser_run_many.add_argument('script_args', nargs=argparse.REMAINDER, 
                               help='Additional arguments to pass to the script')
 
+    # Subparser for the 'watch' command
+    parser_watch = subparsers.add_parser('watch', help='Run a script in a project, and again whenever its files change')
+    parser_watch.add_argument('--env', default='development', help='Environment to load (default: development)')
+    parser_watch.add_argument('--no-cache', action='store_true', help='Run the script even if a cached result exists')
+    parser_watch.add_argument('arg', help='Argument for the watch command, of the form "project:script"')
+    parser_watch.add_argument('script_args', nargs=argparse.REMAINDER,
+                              help='Additional arguments to pass to the script')
+
     # Subparser for the 'uv' command
     parser_uv = subparsers.add_parser('uv', help='Run arbitrary uv commands on all discovered projects')
     parser_uv.add_argument('--env', default='development', help='Environment to load (default: development)')
+    parser_uv.add_argument('--jobs', '-j', type=int, default=1,
+                           help='Number of projects to run uv in concurrently (default: 1, 0: number of CPU cores)')
+    parser_uv.add_argument('--fail-fast', action='store_true', help='Stop at the first project where uv fails')
+    parser_uv.add_argument('--incremental', action='store_true',
+                           help='With sync: skip the projects whose pyproject.toml, uv.lock and interpreter '
+                                'did not change since their last successful sync')
     parser_uv.add_argument('args', nargs=argparse.REMAINDER, help='Arguments to pass to uv')
+
+    # Subparser for the 'env' command
+    parser_env = subparsers.add_parser('env', help='Validate the environment against env.yaml files')
+    parser_env.add_argument('action', choices=['validate'], help='Env action to perform')
+    parser_env.add_argument('--env', default='development', help='Environment to load (default: development)')
+    parser_env_scope = parser_env.add_mutually_exclusive_group()
+    parser_env_scope.add_argument('--in', dest='projects', action='append',
+                                  help='Validate for this project and its dependencies (can be repeated)')
+    parser_env_scope.add_argument('--all', action='store_true', help='Validate against every env.yaml in the repo')
+
+    # Subparser for the 'cache' command
+    parser_cache = subparsers.add_parser('cache', help='Manage the task result cache')
+    parser_cache.add_argument('action', choices=['clean'], help='Cache action to perform')
+
+    # Subparser for the 'daemon' command
+    parser_daemon = subparsers.add_parser('daemon', help='Keep the workspace state warm for faster commands')
+    parser_daemon.add_argument('action', choices=['start', 'stop', 'status'], help='Daemon action to perform')
+    parser_daemon.add_argument('--poll', action='store_true', help='Watch the repo by polling instead of inotify')
     
     # Parse the arguments
     args = parser.parse_args()
+    if args.startup_profile:
+        parser.error('--startup-profile must be the first argument, e.g. devopspy --startup-profile exec ...')
+
+    if args.trace:
+        handle_traced(args)
+    else:
+        dispatch(args)
 
+def dispatch(args):
+    try:
+        dispatch_command(args)
+    except ValueError as e:
+        # Every command discovers the projects; an invalid discovery configuration is reported like other errors
+        from ..discovery import DiscoveryConfigError
+        if not isinstance(e, DiscoveryConfigError):
+            raise
+        from colorama import Fore, Style
+        print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+        sys.exit(1)
+
+def dispatch_command(args):
     # Dispatch based on the command
     if args.command == 'exec':
-        handle_exec(args.project, args.args, args.env)
+        handle_exec(args.projects, args.args, args.env, args.all, args.jobs)
     elif args.command == 'run':
-        handle_run(args.arg, args.script_args, args.env)
+        handle_run(args.arg, args.script_args, args.env, args.no_cache)
     elif args.command == 'run-many':
-        handle_run_many(args.script_name, args.kill_others_on_fail, args.script_args, args.env)
+        handle_run_many(args.script_name, args.kill_others_on_fail, args.script_args, args.env, args.jobs,
+                        args.projects, args.with_deps, args.dependents, args.affected, args.base, args.no_cache,
+                        args.watch, args.output, args.shard)
+    elif args.command == 'watch':
+        handle_watch(args.arg, args.script_args, args.env, args.no_cache)
     elif args.command == 'uv':
-        handle_uv(args.args)
+        handle_uv(args.args, args.jobs, args.fail_fast, args.incremental)
+    elif args.command == 'env':
+        handle_env(args.action, args.env, args.projects, args.all)
+    elif args.command == 'cache':
+        handle_cache(args.action)
+    elif args.command == 'daemon':
+        handle_daemon(args.action, args.poll)
+
+def handle_traced(args):
+    from .. import tracing
+    tracing.enable()
+    try:
+        with tracing.span(f"devopspy {args.command}"):
+            dispatch(args)
+    finally:
+        # Handlers report failures through sys.exit, so the trace is written on the way out
+        tracing.write_trace(args.trace)
+        for line in tracing.summarize():
+            print(line, file=sys.stderr)
+        print(f"Trace written to {args.trace}", file=sys.stderr)
+
+def handle_exec(projects, args, env, all_projects, jobs):
+    # If the first argument is '--', remove it as it's just a separator
+    if args and args[0] == '--':
+        args = args[1:]
 
-def handle_exec(project, args, env):
     from .exec import exec
-    exit_code = exec(project, env, args)
+    exit_code = exec(projects, env, args, all_projects, jobs)
     if exit_code != 0:
         sys.exit(exit_code)
 
-def handle_run(arg, script_args, env):
+def handle_run(arg, script_args, env, no_cache):
     # If the first argument is '--', remove it as it's just a separator
     if script_args and script_args[0] == '--':
         script_args = script_args[1:]
         
-    exit_code = run(arg, env, script_args)
+    from .run import run
+    exit_code = run(arg, env, script_args, no_cache)
     if exit_code != 0:
         sys.exit(exit_code)
 
-def handle_run_many(script_name, kill_others_on_fail, script_args, env):
+def handle_run_many(script_name, kill_others_on_fail, script_args, env, jobs, projects, with_deps, dependents,
+                    affected, base, no_cache, watch, output, shard):
     # If the first argument is '--', remove it as it's just a separator
     if script_args and script_args[0] == '--':
         script_args = script_args[1:]
         
-    exit_code = run_many(script_name, env, kill_others_on_fail, script_args)
+    from .run_many import run_many
+    exit_code = run_many(script_name, env, kill_others_on_fail, script_args, jobs, projects, with_deps, dependents,
+                         affected, base, no_cache, watch, output, shard)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+def handle_watch(arg, script_args, env, no_cache):
+    # If the first argument is '--', remove it as it's just a separator
+    if script_args and script_args[0] == '--':
+        script_args = script_args[1:]
+
+    from .watch import watch
+    exit_code = watch(arg, env, script_args, no_cache)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+def handle_uv(args, jobs, fail_fast, incremental):
+    from .uv import uv
+    exit_code = uv(args, jobs or None, fail_fast, incremental)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+def handle_env(action, env, projects, all_projects):
+    from .env import env as env_command
+    exit_code = env_command(action, env, projects, all_projects)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+def handle_cache(action):
+    from .cache import cache
+    exit_code = cache(action)
+    if exit_code != 0:
+        sys.exit(exit_code)
+
+def handle_daemon(action, poll):
+    from .daemon import daemon
+    exit_code = daemon(action, poll)
     if exit_code != 0:
         sys.exit(exit_code)
 
-def handle_uv(args):
-    exit_code = uv(args)
+def handle_startup_profile(argv):
+    from .startup_profile import startup_profile
+    exit_code = startup_profile(argv)
     if exit_code != 0:
         sys.exit(exit_code)
 
@@ -0,0 +1,23 @@
+from ..workspace import get_monorepo_root
+from ..task_cache import clean, get_tasks_cache_dir
+from colorama import Fore, Style
+
+
+def cache(action: str) -> int:
+    """
+    Manage the task result cache.
+    
+    Args:
+        action: The cache action to perform. Only 'clean' is supported.
+        
+    Returns:
+        0 if the action succeeded, 1 otherwise
+    """
+    if action != "clean":
+        print(f"Error: Unknown cache action '{action}'")
+        return 1
+
+    base_dir = get_monorepo_root()
+    clean(base_dir)
+    print(f"{Fore.YELLOW}Removed cached task results in {get_tasks_cache_dir(base_dir)}{Style.RESET_ALL}")
+    return 0
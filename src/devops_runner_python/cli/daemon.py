@@ -0,0 +1,50 @@
+from .. import daemon as daemon_module
+from ..workspace import get_monorepo_root
+from colorama import Fore, Style
+
+
+def daemon(action: str, poll: bool = False) -> int:
+    """
+    Manage the workspace daemon of the monorepo (see daemon.py).
+
+    Args:
+        action: 'start' serves the monorepo in the foreground until stopped, 'stop' stops a
+            running daemon and 'status' reports whether one is running
+        poll: Watch the repo by polling instead of inotify
+
+    Returns:
+        0 if the action succeeded (for 'status': if a daemon is running), 1 otherwise
+    """
+    base_dir = get_monorepo_root()
+
+    if action == "start":
+        try:
+            server = daemon_module.serve(base_dir, poll)
+        except RuntimeError as e:
+            print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+            return 1
+        print(f"{Fore.YELLOW}Daemon serving {base_dir} on {daemon_module.get_socket_path(base_dir)} "
+              f"(watching with {server.state.watcher.name}){Style.RESET_ALL}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        print(f"{Fore.YELLOW}Daemon stopped{Style.RESET_ALL}")
+        return 0
+
+    if action in ("stop", "status"):
+        status = daemon_module.request(base_dir, "ping")
+        if status is None:
+            print(f"No daemon is serving {base_dir}")
+            return 0 if action == "stop" else 1
+        if action == "stop":
+            daemon_module.request(base_dir, "stop")
+            print(f"{Fore.YELLOW}Stopped the daemon (pid {status['pid']}){Style.RESET_ALL}")
+        else:
+            print(f"Daemon (pid {status['pid']}) is serving {status['root']}, watching with {status['watcher']}")
+        return 0
+
+    print(f"Error: Unknown daemon action '{action}'")
+    return 1
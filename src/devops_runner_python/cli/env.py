@@ -0,0 +1,50 @@
+import os
+from typing import List, Optional
+from ..affected import find_owning_project
+from ..discovery import find_python_projects
+from ..env import resolve_env_vars, validate_env_vars
+from colorama import Fore, Style
+
+
+def env(action: str, env_name: str, project_names: Optional[List[str]] = None, all_projects: bool = False) -> int:
+    """
+    Manage the environment. The only action is 'validate', which validates the environment
+    against the env.yaml files of the given projects, or of the project containing the
+    current directory.
+    
+    Args:
+        action: The env action to perform. Only 'validate' is supported.
+        env_name: Environment to load before validating
+        project_names: Projects whose env.yaml files (and those of their dependencies) are validated
+        all_projects: Validate against every env.yaml file in the repo instead
+        
+    Returns:
+        0 if validation passed, 1 otherwise
+    """
+    if action != "validate":
+        print(f"Error: Unknown env action '{action}'")
+        return 1
+
+    projects = None
+    if not all_projects:
+        projects = find_python_projects()
+        if not project_names:
+            owner = find_owning_project(projects, os.getcwd())
+            if owner is None:
+                print("Error: Not inside a project. Use --in to select projects or --all to validate the whole repo.")
+                return 1
+            project_names = [owner]
+        unknown = [name for name in project_names if name not in projects]
+        if unknown:
+            print(f"Error: Project '{unknown[0]}' not found. Available projects: {', '.join(projects.keys())}")
+            return 1
+
+    # Build the environment to validate
+    environ = resolve_env_vars(env_name)
+
+    if not validate_env_vars(projects, None if all_projects else project_names, environ):
+        print(f"{Fore.RED}Environment validation failed.{Style.RESET_ALL}")
+        return 1
+
+    print(f"{Fore.GREEN}Environment is valid.{Style.RESET_ALL}")
+    return 0
@@ -1,51 +1,96 @@
-import os
+import fnmatch
 import subprocess
-from typing import List
-from ..discovery import find_python_projects
-from ..env import load_env_vars
+from typing import Dict, List, Optional, Tuple
+from ..discovery import Project, find_python_projects
+from ..env import resolve_env_vars
 from colorama import Fore, Style
 
 
-def exec(project_name: str, env: str, command: List[str] = None) -> int:
+def exec(project_names: List[str], env: str, command: List[str] = None, all_projects: bool = False,
+         jobs: Optional[int] = None) -> int:
     """
-    Execute a command in a project's directory.
+    Execute a command in the directories of one or more projects.
+
+    With a single project the command runs attached to the terminal. With several, it runs
+    concurrently in all of them, with every output line prefixed by the project name.
+    Discovery and environment loading happen once either way.
     
     Args:
-        project_name: Name of the project to execute the command in
+        project_names: Names of the projects to execute the command in, or fnmatch patterns such as 'svc-*'
         command: Command to execute and its arguments
+        all_projects: Execute the command in every project instead
+        jobs: Maximum number of projects the command runs in at once (default: number of CPU cores)
         
     Returns:
-        The exit code of the executed command
+        The exit code of the command for a single project; for several, 0 if the command
+        succeeded in all of them and 1 otherwise
     """
     if not command:
-        print(f"Error: No command specified to execute in project '{project_name}'")
+        print(f"Error: No command specified to execute in {', '.join(project_names or ['all projects'])}")
         return 1
 
     # Find all projects
     projects = find_python_projects()
     
-    if project_name not in projects:
-        print(f"Error: Project '{project_name}' not found. Available projects: {', '.join(projects.keys())}")
+    if all_projects:
+        selected = list(projects.values())
+    else:
+        selected, unmatched = match_projects(projects, project_names)
+        if unmatched:
+            print(f"Error: Project '{unmatched[0]}' not found. Available projects: {', '.join(projects.keys())}")
+            return 1
+    if not selected:
+        print("No projects found")
         return 1
     
-    project = projects[project_name]
-    
-    # Change to the project directory
-    original_dir = os.getcwd()
-    os.chdir(project.path)
-    
     try:
-        # Load environment variables
-        load_env_vars(env, original_dir)
-        
-        print(f"{Fore.YELLOW}Executing: {' '.join(command)} in {project.path}\n{Style.RESET_ALL}")
+        # Build the environment from the .env files of the current directory
+        environ = resolve_env_vars(env)
+
+        if len(selected) == 1:
+            project = selected[0]
+            print(f"{Fore.YELLOW}Executing: {' '.join(command)} in {project.path}\n{Style.RESET_ALL}")
         
-        # Run the command
-        result = subprocess.run(command, check=False)
-        return result.returncode
+            # Run the command in the project directory
+            result = subprocess.run(command, cwd=project.path, env=environ, check=False)
+            return result.returncode
+
+        # Imported here so that the common single-project case starts as fast as possible
+        from ..scheduler import Task, run_tasks
+
+        print(f"{Fore.YELLOW}Executing: {' '.join(command)} in {len(selected)} projects:{Style.RESET_ALL}")
+        for project in selected:
+            print(f"  - {project.name} ({project.path})")
+        print()
+
+        tasks = [Task(name=project.name, cmd=command, cwd=project.path, env=environ) for project in selected]
+        results = run_tasks(tasks, jobs)
     except Exception as e:
         print(f"Error executing command: {e}")
         return 1
-    finally:
-        # Restore the original directory
-        os.chdir(original_dir)
\ No newline at end of file
+
+    failed = [result for result in results.values() if result.exit_code != 0]
+    if not failed:
+        return 0
+
+    print(f"\n{Fore.RED}Command failed in {len(failed)} of {len(selected)} projects:{Style.RESET_ALL}")
+    for result in failed:
+        print(f"  - {result.name} (exit code {result.exit_code})")
+    return 1
+
+
+def match_projects(projects: Dict[str, Project], patterns: List[str]) -> Tuple[List[Project], List[str]]:
+    """
+    Selects the projects whose name equals or matches (fnmatch) one of the patterns.
+
+    Returns:
+        A tuple of the selected projects in discovery order, and the patterns matching no project
+    """
+    matched = set()
+    unmatched = []
+    for pattern in patterns:
+        names = [pattern] if pattern in projects else fnmatch.filter(projects, pattern)
+        if not names:
+            unmatched.append(pattern)
+        matched.update(names)
+    return [project for name, project in projects.items() if name in matched], unmatched
@@ -1,19 +1,61 @@
-import os
+import sys
 import subprocess
-from typing import List, Optional
-from ..discovery import find_python_projects
-from ..env import load_env_vars, validate_env_vars
+from typing import Dict, List, Optional
+from ..discovery import Project, find_python_projects, get_monorepo_root
+from ..env import resolve_env_vars, validate_env_vars
+from ..scheduler import run_captured
+from .. import task_cache
+from ..venv import direct_command, is_direct_run_enabled
+from ..tracing import span
 from colorama import Fore, Style
 import shlex
 
 
-def run(script_spec: str, env: str, script_args: List[str] = None) -> int:
+def build_script_command(project: Project, script_name: str, script_args: List[str] = None) -> List[str]:
+    """
+    Builds the command that runs one of a project's scripts through uv.
+
+    Args:
+        project: The project defining the script
+        script_name: Name of the script in the project's [tool.devops.scripts]
+        script_args: Additional arguments to pass to the script
+
+    Returns:
+        The command line to execute from the project's directory
+    """
+    script_commands = shlex.split(project.scripts[script_name])
+    return ["uv", "run", *script_commands, *(script_args or [])]
+
+
+def resolve_script_command(project: Project, script_name: str, script_args: List[str], environ: Dict[str, str],
+                           direct: bool = False) -> tuple[List[str], Dict[str, str]]:
+    """
+    Builds the command and environment running one of a project's scripts. With direct set
+    (see venv.is_direct_run_enabled), the script's executable runs straight from the project's
+    virtual environment if it is synced, skipping the checks of `uv run`.
+
+    Returns:
+        A tuple of the command line to execute from the project's directory and its environment
+    """
+    if direct:
+        resolved = direct_command(project, [*shlex.split(project.scripts[script_name]), *(script_args or [])], environ)
+        if resolved is not None:
+            return resolved
+    return build_script_command(project, script_name, script_args), environ
+
+
+def run(script_spec: str, env: str, script_args: List[str] = None, no_cache: bool = False) -> int:
     """
     Execute a script from a project's scripts.
+
+    Scripts declared with cache = true replay the output of an earlier successful run with
+    the same inputs instead of executing (see task_cache.py). To capture their output, these
+    scripts run without a TTY and with their stderr merged into their stdout.
     
     Args:
         script_spec: String in the format "x:y" where x is a project name and y is a script name
         script_args: Additional arguments to pass to the script
+        no_cache: Whether to bypass the task cache
         
     Returns:
         The exit code of the executed script
@@ -43,38 +85,48 @@ def run(script_spec: str, env: str, script_args: List[str] = None) -> int:
             print(f"No scripts defined in project '{project_name}'.")
         return 1
 
-    script_str = project.scripts[script_name]
-    script_commands = shlex.split(script_str)
-    
-    # Load environment variables
-    load_env_vars(env)
+    # Build the environment of the script
+    environ = resolve_env_vars(env)
     
-    # Validate environment variables against env.yaml files
-    if not validate_env_vars():
+    # Validate environment variables against the env.yaml files of the project and its dependencies
+    if not validate_env_vars(projects, [project_name], environ):
         print(f"{Fore.RED}Environment validation failed. Aborting command.{Style.RESET_ALL}")
         return 1
     
-    # Change to the project directory
-    original_dir = os.getcwd()
-    os.chdir(project.path)
-    
+    cache_key = None
+    if not no_cache and task_cache.is_cacheable(project, script_name):
+        with span("task cache lookup"):
+            cache_key = task_cache.compute_cache_key(projects, project, script_name, script_args, environ)
+            cached = task_cache.lookup(get_monorepo_root(), cache_key)
+        if cached is not None:
+            print(f"{Fore.GREEN}Cache hit for {script_spec}, replaying output\n{Style.RESET_ALL}")
+            task_cache.restore_outputs(get_monorepo_root(), cache_key, project)
+            # The replayed bytes bypass the text layer, whose pending messages must come first
+            sys.stdout.flush()
+            sys.stdout.buffer.write(cached.output)
+            sys.stdout.buffer.flush()
+            sys.stdout.flush()
+            return cached.exit_code
+
     try:
-        
-        # Execute the script using uv run
-        cmd = ["uv", "run", *script_commands]
-        
-        # Add any script arguments
-        if script_args:
-            cmd.extend(script_args)
+        # Execute the script using uv run (or directly from the synced .venv), in the project directory
+        cmd, environ = resolve_script_command(project, script_name, script_args, environ,
+                                              is_direct_run_enabled(get_monorepo_root()))
             
         print(f"{Fore.YELLOW}Executing: {' '.join(cmd)} in {project.path}\n{Style.RESET_ALL}")
         
-        # Run the command
-        result = subprocess.run(cmd, check=False)
-        return result.returncode
+        if cache_key is None:
+            # Run the command
+            with span(script_spec, category="task"):
+                result = subprocess.run(cmd, cwd=project.path, env=environ, check=False)
+            return result.returncode
+
+        # Run the command, capturing its output for the cache. Only successful runs are stored.
+        with span(script_spec, category="task"):
+            exit_code, output = run_captured(cmd, project.path, environ)
+        if exit_code == 0:
+            task_cache.store(get_monorepo_root(), cache_key, project, script_name, exit_code, output)
+        return exit_code
     except Exception as e:
         print(f"Error executing script: {e}")
         return 1
-    finally:
-        # Restore the original directory
-        os.chdir(original_dir)
@@ -1,94 +1,294 @@
-import shutil
-import subprocess
-from typing import List
-from ..discovery import find_python_projects
-from ..env import load_env_vars, validate_env_vars
+import sys
+import threading
+import contextlib
+from typing import BinaryIO, Dict, Iterable, List, Optional
+from ..affected import GitError, get_affected_projects
+from ..discovery import Project, ScriptConfig, find_python_projects, get_monorepo_root
+from ..env import resolve_env_vars, validate_env_vars
+from ..graph import CycleError, task_dependencies, with_dependencies, with_dependents
+from ..logmux import OUTPUT_JSONL, OUTPUT_STREAM, LogMultiplexer, get_logs_dir
+from ..scheduler import Task, TaskResult, run_tasks
+from .. import durations, task_cache
+from ..tracing import span
+from ..venv import is_direct_run_enabled
+from .run import resolve_script_command
 from colorama import Fore, Style
 
 
-def run_many(script_name: str, env: str, kill_others_on_fail: bool = False, script_args: List[str] = None) -> int:
+def run_many(script_name: str, env: str, kill_others_on_fail: bool = False, script_args: List[str] = None,
+             jobs: Optional[int] = None, project_names: Optional[List[str]] = None, with_deps: bool = False,
+             dependents: bool = False, affected: bool = False, base: Optional[str] = None,
+             no_cache: bool = False, watch: bool = False, output: str = OUTPUT_STREAM,
+             shard: Optional[str] = None) -> int:
     """
     Run a script concurrently in all projects that define it.
+
+    Discovery, environment loading and validation happen once, in this process. The
+    scripts are then started directly as child processes with the resulting environment.
+    A project's script only starts once the script succeeded in the workspace projects
+    it depends on, so independent projects run in parallel and dependent ones in order.
     
     Args:
         script_name: The name of the script to run
         kill_others_on_fail: Whether to kill other processes if one fails
         script_args: Additional arguments to pass to the script
+        jobs: Maximum number of scripts running at once (default: number of CPU cores)
+        project_names: Restrict the run to these projects (default: all projects)
+        with_deps: Also include the transitive dependencies of the selected projects
+        dependents: Also include the projects transitively depending on the selected projects
+        affected: Restrict the run to projects affected by the changes since `base` (see affected.py)
+        base: Git ref to compare against when `affected` is set
+        no_cache: Whether to bypass the task cache for scripts declared with cache = true
+        watch: Keep running, re-running the script in the projects affected by file changes (see watch.py)
+        output: How the output of the scripts is shown, one of logmux.OUTPUT_MODES. With 'jsonl',
+            stdout only carries the JSON lines and all other messages go to stderr.
+        shard: Run only part of the matching projects, given as "i/N" for the i-th of N parts
+            of balanced historical duration (see durations.shard)
         
     Returns:
         0 if all scripts executed successfully, 1 otherwise
     """
+    if output != OUTPUT_JSONL:
+        return _run_many(script_name, env, kill_others_on_fail, script_args, jobs, project_names, with_deps,
+                         dependents, affected, base, no_cache, watch, output, shard, None)
+    tasks_out = sys.stdout.buffer
+    with contextlib.redirect_stdout(sys.stderr):
+        return _run_many(script_name, env, kill_others_on_fail, script_args, jobs, project_names, with_deps,
+                         dependents, affected, base, no_cache, watch, output, shard, tasks_out)
+
+
+def _run_many(script_name: str, env: str, kill_others_on_fail: bool, script_args: Optional[List[str]],
+              jobs: Optional[int], project_names: Optional[List[str]], with_deps: bool, dependents: bool,
+              affected: bool, base: Optional[str], no_cache: bool, watch: bool, output: str,
+              shard: Optional[str], tasks_out: Optional[BinaryIO]) -> int:
     if script_args is None:
         script_args = []
     
-    # Check if GNU parallel is installed
-    if shutil.which('parallel') is None:
-        print("Error: GNU parallel is not installed. Please install it to use the run-many command.")
-        print("On macOS: brew install parallel")
-        print("On Ubuntu/Debian: apt-get install parallel")
-        print("On CentOS/RHEL: yum install parallel")
-        return 1
-    
     # Find all projects
     projects = find_python_projects()
     
+    # Select the requested projects and expand the selection along the dependency graph
+    if project_names:
+        unknown = [name for name in project_names if name not in projects]
+        if unknown:
+            print(f"Error: Project '{unknown[0]}' not found. Available projects: {', '.join(projects.keys())}")
+            return 1
+        selected = set(project_names)
+        if with_deps:
+            selected |= with_dependencies(projects, project_names)
+        if dependents:
+            selected |= with_dependents(projects, project_names)
+    else:
+        selected = set(projects)
+
+    if affected:
+        try:
+            affected_projects = get_affected_projects(projects, base)
+        except GitError as e:
+            print(f"{Fore.RED}Error: could not determine affected projects. {e}{Style.RESET_ALL}")
+            return 1
+        selected &= affected_projects
+        print(f"Affected projects: {', '.join(sorted(affected_projects)) or 'none'}")
+
     # Filter projects that have the specified script
     matching_projects = []
-    for _project_name, project in projects.items():
-        if script_name in project.scripts:
+    for project_name, project in projects.items():
+        if project_name in selected and script_name in project.scripts:
             matching_projects.append(project)
     
     if not matching_projects:
         print(f"No projects found with script '{script_name}'.")
         return 0
+
+    if shard is not None:
+        try:
+            index, count = parse_shard(shard)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return 1
+        estimates = durations.load_estimates(get_monorepo_root())
+        expected = {project.name: durations.estimate(estimates, project.name, script_name)
+                    for project in matching_projects}
+        names = durations.shard(list(expected), expected, index, count)
+        matching_projects = [project for project in matching_projects if project.name in names]
+        print(f"Shard {index}/{count}: {len(matching_projects)} of {len(expected)} projects, "
+              f"about {sum(expected[name] for name in names):.0f}s of work")
+        if not matching_projects:
+            return 0
     
+    try:
+        deps = task_dependencies(projects, [project.name for project in matching_projects])
+    except CycleError as e:
+        print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+        return 1
+
     print(f"Found {len(matching_projects)} projects with script '{script_name}':")
     for project in matching_projects:
-        print(f"  - {project.name} ({project.path})")
+        after = f", after {', '.join(deps[project.name])}" if deps[project.name] else ""
+        print(f"  - {project.name} ({project.path}{after})")
     print()
     
-    # Prepare the command for GNU parallel
-    project_names = [project.name for project in matching_projects]
-    
-    # Base command
-    parallel_cmd = [
-        "parallel", 
-        "--link", 
-        "--tagstring", 
-        "[{1}]",
-        "--line-buffer"
-    ]
-    
-    # Add halt option if kill_others_on_fail is True
-    if kill_others_on_fail:
-        parallel_cmd.extend(["--halt", "now,fail=1"])
-    
-    # Add the command to execute
-    script_cmd = f"uv run devopspy run {{1}}:{script_name}"
-    
-    # Add script arguments if provided
-    if script_args:
-        script_args_str = ' '.join(script_args)
-        script_cmd += f" {script_args_str}"
-    
-    parallel_cmd.append(script_cmd)
-    
-    # Add the project names, paths, and script
-    parallel_cmd.extend([":::", *project_names])
-    
-    print(f"{Fore.YELLOW}Executing: {' '.join(parallel_cmd)}\n{Style.RESET_ALL}")
-    
     try:
-        # Load environment variables
-        load_env_vars(env)
+        # Build the environment of the scripts
+        environ = resolve_env_vars(env)
         
-        # Validate environment variables against env.yaml files
-        if not validate_env_vars():
+        # Validate environment variables against the env.yaml files of the selected projects and their dependencies
+        if not validate_env_vars(projects, [project.name for project in matching_projects], environ):
             print(f"{Fore.RED}Environment validation failed. Aborting command.{Style.RESET_ALL}")
             return 1
-        
-        result = subprocess.run(parallel_cmd, check=False)
-        return result.returncode
+
+        if watch:
+            from .watch import watch_projects
+            return watch_projects(projects, matching_projects, script_name, script_args, environ, jobs,
+                                  kill_others_on_fail, no_cache, output, tasks_out, env)
+
+        results = execute(projects, matching_projects, deps, script_name, script_args, environ, jobs,
+                          kill_others_on_fail, no_cache, None, output, tasks_out)
     except Exception as e:
-        print(f"Error executing parallel command: {e}")
-        return 1
\ No newline at end of file
+        print(f"Error executing scripts: {e}")
+        return 1
+
+    return report_failures(script_name, results)
+
+
+def execute(projects: Dict[str, Project], matching_projects: List[Project], deps: Dict[str, List[str]],
+            script_name: str, script_args: List[str], environ: Dict[str, str], jobs: Optional[int] = None,
+            kill_others_on_fail: bool = False, no_cache: bool = False,
+            cancel: Optional[threading.Event] = None, output: str = OUTPUT_STREAM,
+            tasks_out: Optional[BinaryIO] = None) -> Dict[str, TaskResult]:
+    """
+    Runs a script in the given projects, once discovery, environment loading and validation are done.
+    Cached results are replayed, the other scripts run as tasks ordered by deps and packed by
+    the resources their scripts declare (see run_tasks), and the results of successful
+    cacheable runs are stored. The full output of every script is kept in
+    .devops/logs/<script>/<project>.log (see get_logs_dir).
+
+    Args:
+        projects: All discovered projects
+        matching_projects: The projects to run the script in
+        deps: The ordering constraints between the matching projects (see task_dependencies)
+        environ: The environment of the scripts (see build_env)
+        cancel: An event that, once set, terminates the running scripts and skips the pending ones
+        output: How the output of the scripts is shown (see LogMultiplexer)
+        tasks_out: Binary stream receiving the output of the scripts (default: sys.stdout)
+
+    Returns:
+        The results of the runs, by project name
+    """
+    with LogMultiplexer(output, get_logs_dir(get_monorepo_root(), script_name), out=tasks_out) as mux:
+        return _execute(projects, matching_projects, deps, script_name, script_args, environ, jobs,
+                        kill_others_on_fail, no_cache, cancel, mux)
+
+
+def _execute(projects: Dict[str, Project], matching_projects: List[Project], deps: Dict[str, List[str]],
+             script_name: str, script_args: List[str], environ: Dict[str, str], jobs: Optional[int],
+             kill_others_on_fail: bool, no_cache: bool, cancel: Optional[threading.Event],
+             mux: LogMultiplexer) -> Dict[str, TaskResult]:
+    # Replay cached results; a cache hit counts as a success for the projects depending on it
+    cache_keys = {}
+    results = {}
+    for project in matching_projects:
+        if no_cache or not task_cache.is_cacheable(project, script_name):
+            continue
+        with span("task cache lookup", project=project.name):
+            cache_key = task_cache.compute_cache_key(projects, project, script_name, script_args, environ)
+            cached = task_cache.lookup(get_monorepo_root(), cache_key)
+        if cached is None:
+            cache_keys[project.name] = cache_key
+            continue
+        mux.message(f"{Fore.GREEN}[{project.name}] cache hit, replaying output{Style.RESET_ALL}")
+        task_cache.restore_outputs(get_monorepo_root(), cache_key, project)
+        mux.replay(project.name, cached.output)
+        results[project.name] = TaskResult(name=project.name, exit_code=cached.exit_code, duration=0.0)
+
+    tasks = build_tasks([project for project in matching_projects if project.name not in results], deps,
+                        script_name, script_args, environ, set(cache_keys))
+    for task in tasks:
+        print(f"{Fore.YELLOW}Executing: {' '.join(task.cmd)} in {task.cwd}{Style.RESET_ALL}")
+    print()
+
+    results.update(run_tasks(tasks, jobs, kill_others_on_fail, cancel, mux))
+    durations.record_durations(get_monorepo_root(), script_name, (results[task.name] for task in tasks))
+
+    # Only successful runs are stored in the cache
+    for name, cache_key in cache_keys.items():
+        result = results[name]
+        if result.exit_code == 0 and result.output is not None:
+            task_cache.store(get_monorepo_root(), cache_key, projects[name], script_name, 0, result.output)
+    return results
+
+
+def build_tasks(matching_projects: List[Project], deps: Dict[str, List[str]], script_name: str,
+                script_args: List[str], environ: Dict[str, str], capture: Iterable[str] = ()) -> List[Task]:
+    """
+    Builds the tasks running a script in the given projects, weighted by the resources the
+    script declares and ordered longest first (see durations.longest_first).
+
+    Args:
+        deps: The ordering constraints between the projects (see task_dependencies)
+        environ: The environment of the scripts (see build_env)
+        capture: Names of the projects whose output is kept in their results
+    """
+    capture = set(capture)
+    direct = is_direct_run_enabled(get_monorepo_root())
+    tasks = []
+    for project in matching_projects:
+        config = project.script_config.get(script_name) or ScriptConfig(cmd=project.scripts[script_name])
+        cmd, task_environ = resolve_script_command(project, script_name, script_args, environ, direct)
+        tasks.append(Task(
+            name=project.name,
+            cmd=cmd,
+            cwd=project.path,
+            deps=deps[project.name],
+            capture=project.name in capture,
+            env=task_environ,
+            cpu=config.cpu,
+            mem=config.mem or 0,
+            exclusive=config.exclusive,
+        ))
+    # Start the longest chains of work first, so they don't stretch the end of the run
+    estimates = durations.load_estimates(get_monorepo_root())
+    return durations.longest_first(
+        tasks, {task.name: durations.estimate(estimates, task.name, script_name) for task in tasks}
+    )
+
+
+def parse_shard(shard: str) -> tuple[int, int]:
+    """
+    Parses a shard specification of the form "i/N" (1 <= i <= N).
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    index, _, count = shard.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}'. Expected format 'i/N', e.g. 1/4")
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{shard}': the index must be between 1 and {max(count, 1)}")
+    return index, count
+
+
+def report_failures(script_name: str, results: Dict[str, TaskResult]) -> int:
+    """
+    Prints the projects in which the script failed or was skipped, along with the last lines
+    of output of the failed scripts. Returns 1 if there are any, 0 otherwise.
+    """
+    failed = [result for result in results.values() if result.exit_code != 0]
+    if not failed:
+        return 0
+
+    print(f"\n{Fore.RED}Script '{script_name}' failed in {len(failed)} of {len(results)} projects:{Style.RESET_ALL}")
+    for result in failed:
+        status = "skipped" if result.exit_code is None else f"exit code {result.exit_code}"
+        print(f"  - {result.name} ({status})")
+
+    for result in failed:
+        if not result.tail:
+            continue
+        log = f", full log in {result.log_path}" if result.log_path else ""
+        print(f"\n{Fore.RED}Last {len(result.tail)} lines of {result.name}{log}:{Style.RESET_ALL}")
+        for line in result.tail:
+            print(f"  {line}")
+    return 1
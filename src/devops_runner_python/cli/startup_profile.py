@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+import time
+from typing import List, NamedTuple
+
+
+class ImportTiming(NamedTuple):
+    module: str
+    # Microseconds spent importing the module itself, and including its own imports
+    self_us: int
+    cumulative_us: int
+    # Nesting level in the import tree, 0 for modules imported directly by the program
+    depth: int
+
+
+def parse_importtime(lines: List[str]) -> List[ImportTiming]:
+    """Parses the 'import time:' lines that python -X importtime writes to stderr."""
+    timings = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line
+            continue
+        module = fields[2].rstrip()
+        name = module.lstrip()
+        timings.append(ImportTiming(
+            module=name,
+            self_us=int(fields[0]),
+            cumulative_us=int(fields[1]),
+            depth=(len(module) - len(name) - 1) // 2,
+        ))
+    return timings
+
+
+def startup_profile(argv: List[str], top: int = 15) -> int:
+    """
+    Run devopspy with the given arguments under python -X importtime and report where
+    the startup time goes.
+    
+    Args:
+        argv: The devopspy arguments to profile, e.g. ["exec", "--in", "api", "true"]
+        top: Number of modules listed in the report
+        
+    Returns:
+        The exit code of the profiled command
+    """
+    cmd = [sys.executable, "-X", "importtime", "-c", "from devops_runner_python.cli import main; main()", *argv]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, stderr=subprocess.PIPE, text=True, check=False, env={**os.environ, "PYTHONUNBUFFERED": "1"})
+    elapsed = time.perf_counter() - start
+
+    stderr_lines = result.stderr.splitlines()
+    for line in stderr_lines:
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+
+    timings = parse_importtime(stderr_lines)
+    total_import_us = sum(timing.self_us for timing in timings)
+
+    print()
+    print(f"Startup profile for: devopspy {' '.join(argv)}")
+    print(f"  Wall time:   {elapsed * 1000:8.1f} ms (exit code {result.returncode})")
+    print(f"  Import time: {total_import_us / 1000:8.1f} ms across {len(timings)} modules")
+    print()
+    print(f"Top {top} imports by cumulative time (up to 2 levels deep):")
+    for timing in sorted((t for t in timings if t.depth <= 2), key=lambda t: -t.cumulative_us)[:top]:
+        print(f"  {timing.cumulative_us / 1000:8.1f} ms  {timing.module}")
+    print()
+    print(f"Top {top} modules by self time:")
+    for timing in sorted(timings, key=lambda t: -t.self_us)[:top]:
+        print(f"  {timing.self_us / 1000:8.1f} ms  {timing.module}")
+
+    return result.returncode
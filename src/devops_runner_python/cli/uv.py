@@ -1,15 +1,29 @@
 import os
 import subprocess
-from ..discovery import find_python_projects
+from typing import Optional
+from ..discovery import Project, find_python_projects
+from ..scheduler import Task, run_tasks
+from ..tracing import span
+from ..venv import is_stamping_sync, is_synced, write_stamp
 from colorama import Fore, Style
 
 
-def uv(args: list[str]) -> int:
+def uv(args: list[str], jobs: Optional[int] = 1, fail_fast: bool = False, incremental: bool = False) -> int:
     """
-    Run arbitrary uv commands on all discovered projects sequentially.
+    Run arbitrary uv commands on all discovered projects.
+
+    The command runs in the current directory first if it holds a pyproject.toml, then in
+    every project. With jobs > 1 the projects run concurrently and their output lines are
+    prefixed with the project name. A successful `uv sync` stamps the project's environment
+    as synced (see venv.py), which lets direct runs skip `uv run`, and incremental syncs skip
+    the project while its fingerprint stays the same.
     
     Args:
         args: List of arguments to pass to uv
+        jobs: Maximum number of projects processed at once (None: number of CPU cores)
+        fail_fast: Whether to stop at the first failure instead of running uv in every project
+        incremental: Only sync the projects whose environment is missing or was synced with
+            another pyproject.toml, uv.lock or interpreter (requires a `uv sync` command)
         
     Returns:
         0 if all commands were successful, 1 otherwise
@@ -17,15 +31,24 @@ def uv(args: list[str]) -> int:
     if not args:
         print("Error: No uv command specified")
         return 1
-    
+    stamping = is_stamping_sync(args)
+    if incremental and not stamping:
+        print(f"Error: --incremental only applies to 'uv sync', not 'uv {' '.join(args)}'")
+        return 1
+
     # Check if pyproject.toml exists in the current directory
-    if os.path.exists(os.path.join(os.getcwd(), "pyproject.toml")):
+    cwd_project = Project(name=os.path.basename(os.getcwd()), path=os.getcwd(), scripts={}, deployment={})
+    if incremental and is_synced(cwd_project):
+        print(f"{Fore.GREEN}Environment of the current directory is up to date, skipping it{Style.RESET_ALL}")
+    elif os.path.exists(os.path.join(os.getcwd(), "pyproject.toml")):
         print(f"{Fore.YELLOW}Found pyproject.toml in current directory, running uv {' '.join(args)}...{Style.RESET_ALL}")
         try:
             result = subprocess.run(["uv"] + args, check=False)
             if result.returncode != 0:
                 print(f"Error: uv {' '.join(args)} failed in current directory")
                 return 1
+            if stamping:
+                write_stamp(cwd_project)
         except Exception as e:
             print(f"Error running uv {' '.join(args)} in current directory: {e}")
             return 1
@@ -37,29 +60,55 @@ def uv(args: list[str]) -> int:
         print("No projects found")
         return 1
     
+    total = len(projects)
+    if incremental:
+        projects = {name: project for name, project in projects.items() if not is_synced(project)}
+        print(f"{Fore.GREEN}Skipping {total - len(projects)} of {total} projects whose environment is up to date"
+              f"{Style.RESET_ALL}")
+        if not projects:
+            return 0
+
     print(f"Running 'uv {' '.join(args)}' for {len(projects)} projects:")
     for project_name, project in projects.items():
         print(f"  - {project_name} ({project.path})")
-        
-        # Save current directory
-        original_dir = os.getcwd()
-        
+
+    if jobs == 1:
+        failed = _run_sequentially(projects, args, fail_fast)
+    else:
+        print()
+        tasks = [Task(name=project_name, cmd=["uv"] + args, cwd=project.path) for project_name, project in projects.items()]
+        results = run_tasks(tasks, jobs, kill_others_on_fail=fail_fast)
+        failed = [name for name, result in results.items() if result.exit_code != 0]
+        if stamping:
+            for name, result in results.items():
+                if result.exit_code == 0:
+                    write_stamp(projects[name])
+
+    if failed:
+        print(f"\n{Fore.RED}Error: uv {' '.join(args)} failed for {len(failed)} of {len(projects)} projects: {', '.join(failed)}{Style.RESET_ALL}")
+        return 1
+    return 0
+
+
+def _run_sequentially(projects, args: list[str], fail_fast: bool) -> list[str]:
+    """Runs uv in one project at a time with the terminal attached, returning the names of failed projects."""
+    failed = []
+    for project_name, project in projects.items():
         try:
-            # Change to project directory
-            os.chdir(project.path)
-            
             # Run uv command
             print(f"\n{Fore.YELLOW}Running uv {' '.join(args)} in {project.path}...{Style.RESET_ALL}")
-            result = subprocess.run(["uv"] + args, check=False)
+            with span(project_name, category="task"):
+                result = subprocess.run(["uv"] + args, cwd=project.path, check=False)
             
             if result.returncode != 0:
                 print(f"Error: uv {' '.join(args)} failed for project '{project_name}'")
-                return 1
+                failed.append(project_name)
+            elif is_stamping_sync(args):
+                write_stamp(project)
         except Exception as e:
             print(f"Error running uv command for project '{project_name}': {e}")
-            return 1
-        finally:
-            # Restore original directory
-            os.chdir(original_dir)
-    
-    return 0
+            failed.append(project_name)
+
+        if failed and fail_fast:
+            break
+    return failed
@@ -0,0 +1,231 @@
+import os
+import time
+import fnmatch
+import threading
+from typing import BinaryIO, Dict, Iterable, List, Optional, Set
+from ..affected import find_owning_project
+from ..discovery import Project, find_python_projects, forget_projects, get_monorepo_root
+from ..env import resolve_env_vars, validate_env_vars
+from ..graph import CycleError, task_dependencies, with_dependencies, with_dependents
+from ..logmux import OUTPUT_STREAM
+from ..watcher import create_watcher
+from ..workspace import get_devops_config, get_ignore_patterns, is_scanned_file
+from .run_many import execute, report_failures
+from colorama import Fore, Style
+
+# Seconds without further changes before a burst of changes triggers a re-run
+DEBOUNCE_SECONDS = 0.3
+# Seconds between two checks of the watchers
+WATCH_POLL_INTERVAL = 0.05
+
+
+def watch(script_spec: str, env: str, script_args: List[str] = None, no_cache: bool = False) -> int:
+    """
+    Run a script from a project's scripts, and run it again whenever files of the project or of
+    its workspace dependencies change, until interrupted.
+
+    Args:
+        script_spec: String in the format "x:y" where x is a project name and y is a script name
+        script_args: Additional arguments to pass to the script
+        no_cache: Whether to bypass the task cache
+
+    Returns:
+        0 when interrupted, 1 if the script cannot be run
+    """
+    if ":" not in script_spec:
+        print(f"Error: Invalid script specification '{script_spec}'. Expected format 'project:script'")
+        return 1
+    project_name, script_name = script_spec.split(":", 1)
+
+    projects = find_python_projects()
+    if project_name not in projects:
+        print(f"Error: Project '{project_name}' not found. Available projects: {', '.join(projects.keys())}")
+        return 1
+    project = projects[project_name]
+    if script_name not in project.scripts:
+        print(f"Error: Script '{script_name}' not found in project '{project_name}'.")
+        return 1
+
+    environ = resolve_env_vars(env)
+    if not validate_env_vars(projects, [project_name], environ):
+        print(f"{Fore.RED}Environment validation failed. Aborting command.{Style.RESET_ALL}")
+        return 1
+
+    return watch_projects(projects, [project], script_name, script_args or [], environ, no_cache=no_cache, env=env)
+
+
+def watch_projects(projects: Dict[str, Project], selected: List[Project], script_name: str, script_args: List[str],
+                   environ: Dict[str, str], jobs: Optional[int] = None, kill_others_on_fail: bool = False,
+                   no_cache: bool = False, output: str = OUTPUT_STREAM, tasks_out: Optional[BinaryIO] = None,
+                   env: Optional[str] = None) -> int:
+    """
+    Runs a script in the selected projects, then keeps watching the directories of the projects
+    and of their workspace dependencies. After every burst of changes (see DEBOUNCE_SECONDS),
+    the script runs again in the projects affected by the changed files (see get_stale_projects).
+    A run still in progress when some of its projects become stale is cancelled and restarted.
+    Output and tasks_out are passed on to execute.
+
+    When a manifest or .env file anywhere in the monorepo changes, the projects are discovered
+    again, and environ is resolved again from env (if given) and validated. Every project runs
+    again when the environment changed; none run while it is invalid.
+
+    Returns:
+        0 when interrupted with Ctrl+C, 1 if the task graph has a cycle
+    """
+    names = [project.name for project in selected]
+    root = get_monorepo_root()
+    valid = True
+
+    def create_watchers():
+        ignore = get_ignore_patterns(get_devops_config(root).get("discovery", {}))
+        watched = with_dependencies(projects, names)
+        print(f"{Fore.BLUE}Watching {', '.join(sorted(watched))} for changes (press Ctrl+C to stop){Style.RESET_ALL}\n")
+        # The manifests and .env files of the whole monorepo are watched for reloads
+        return [create_watcher(root, ignore, is_scanned_file)] + [
+            create_watcher(path, ignore) for path in get_watch_roots(projects, watched)
+        ]
+
+    def reload() -> Set[str]:
+        # Returns the projects to run again because of the reload, besides those owning the changed files
+        nonlocal projects, selected, environ, names, valid, watchers
+        forget_projects()
+        projects = find_python_projects()
+        gone = [name for name in names if name not in projects or script_name not in projects[name].scripts]
+        if gone:
+            print(f"{Fore.YELLOW}No longer watching {', '.join(gone)}: script '{script_name}' not found{Style.RESET_ALL}")
+        names = [name for name in names if name not in gone]
+        selected = [projects[name] for name in names]
+        for watcher in watchers:
+            watcher.close()
+        watchers = create_watchers()
+
+        previous, was_valid = environ, valid
+        if env is not None:
+            environ = resolve_env_vars(env)
+        valid = validate_env_vars(projects, names, environ)
+        if not valid:
+            print(f"{Fore.RED}Environment validation failed. Waiting for changes...{Style.RESET_ALL}")
+            return set()
+        return set(names) if environ != previous or not was_valid else set()
+
+    def stale_projects(timeout: Optional[float] = None) -> Set[str]:
+        changes = _collect_changes(watchers, timeout)
+        stale = set()
+        if any(is_scanned_file(os.path.basename(path)) for path in changes):
+            stale = reload()
+        return (stale | get_stale_projects(projects, names, script_name, changes)) if valid else set()
+
+    watchers = create_watchers()
+    to_run = set(names)
+    runner, cancel = None, None
+    try:
+        while True:
+            if not to_run:
+                to_run = stale_projects()
+                continue
+
+            batch = [project for project in selected if project.name in to_run]
+            try:
+                deps = task_dependencies(projects, [project.name for project in batch])
+            except CycleError as e:
+                print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+                return 1
+
+            cancel = threading.Event()
+            outcome = {}
+            # Bound now, since a reload may replace projects and environ while the run is in progress
+            args = (projects, batch, deps, script_name, script_args, environ, jobs, kill_others_on_fail, no_cache,
+                    cancel, output, tasks_out)
+            runner = threading.Thread(
+                target=lambda: outcome.update(results=execute(*args)),
+                daemon=True,
+            )
+            runner.start()
+
+            to_run = set()
+            while runner.is_alive():
+                to_run |= stale_projects(WATCH_POLL_INTERVAL)
+                if (to_run & {project.name for project in batch} or not valid) and not cancel.is_set():
+                    print(f"\n{Fore.YELLOW}Files changed, cancelling the current run{Style.RESET_ALL}")
+                    cancel.set()
+            runner.join()
+
+            results = outcome.get("results", {})
+            if cancel.is_set():
+                # Re-run what was interrupted along with what changed, once the environment is valid
+                if valid:
+                    to_run |= {name for name, result in results.items()
+                               if name in names and (result.exit_code is None or result.exit_code < 0)}
+                continue
+
+            report_failures(script_name, results)
+            if not to_run:
+                print(f"\n{Fore.BLUE}Waiting for changes...{Style.RESET_ALL}")
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        if runner is not None and runner.is_alive():
+            cancel.set()
+            runner.join()
+        for watcher in watchers:
+            watcher.close()
+
+
+def get_watch_roots(projects: Dict[str, Project], names: Iterable[str]) -> List[str]:
+    """Returns the directories of the given projects, leaving out those nested inside another one."""
+    paths = sorted({os.path.realpath(projects[name].path) for name in names})
+    roots = []
+    for path in paths:
+        if not any(path.startswith(root + os.sep) for root in roots):
+            roots.append(path)
+    return roots
+
+
+def get_stale_projects(projects: Dict[str, Project], names: List[str], script_name: str,
+                       changed_paths: Iterable[str]) -> Set[str]:
+    """
+    Returns the projects among names whose script result is stale after changes to the given
+    paths: the projects owning a changed file, and those depending on them. Changes to a
+    project's declared outputs of the script (see ScriptConfig.outputs) are ignored, so
+    scripts writing their outputs don't trigger themselves.
+    """
+    owners = set()
+    for path in changed_paths:
+        owner = find_owning_project(projects, path)
+        if owner is None or owner in owners:
+            continue
+        config = projects[owner].script_config.get(script_name)
+        if config and _is_output(os.path.relpath(os.path.realpath(path), os.path.realpath(projects[owner].path)),
+                                 config.outputs):
+            continue
+        owners.add(owner)
+    return with_dependents(projects, owners) & set(names)
+
+
+def _is_output(rel_path: str, patterns: List[str]) -> bool:
+    # A pattern matches the file itself or one of the directories containing it
+    parts = rel_path.split(os.sep)
+    candidates = [os.sep.join(parts[:i]) for i in range(1, len(parts) + 1)]
+    return any(fnmatch.fnmatch(candidate, pattern.rstrip("/")) for pattern in patterns for candidate in candidates)
+
+
+def _collect_changes(watchers, timeout: Optional[float] = None) -> Set[str]:
+    """
+    Waits up to timeout seconds (forever if None) for a change, then until no further change
+    happened for DEBOUNCE_SECONDS, and returns all changed paths.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    changes: Set[str] = set()
+    last_change = 0.0
+    while True:
+        for watcher in watchers:
+            new_changes = watcher.changes()
+            if new_changes:
+                changes |= new_changes
+                last_change = time.monotonic()
+        now = time.monotonic()
+        if changes and now - last_change >= DEBOUNCE_SECONDS:
+            return changes
+        if not changes and deadline is not None and now >= deadline:
+            return changes
+        time.sleep(WATCH_POLL_INTERVAL)
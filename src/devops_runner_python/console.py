@@ -0,0 +1,31 @@
+import re
+import threading
+import contextlib
+from typing import Iterator, List
+
+# Messages of the workspace modules (discovery, environment validation) are printed for the
+# CLI, but collected instead when they come from a library call (see api.py). Capturing is
+# per thread, so it never touches sys.stdout, which belongs to the host process.
+_local = threading.local()
+
+_ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def echo(message: str = "") -> None:
+    """Prints a message, unless the current thread captures messages (see captured)."""
+    messages = getattr(_local, "messages", None)
+    if messages is None:
+        print(message)
+    else:
+        messages.append(_ANSI_ESCAPE.sub("", message))
+
+
+@contextlib.contextmanager
+def captured() -> Iterator[List[str]]:
+    """Collects the messages echoed by the current thread, without their colors, instead of printing them."""
+    previous = getattr(_local, "messages", None)
+    _local.messages = messages = []
+    try:
+        yield messages
+    finally:
+        _local.messages = previous
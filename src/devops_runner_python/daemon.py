@@ -0,0 +1,295 @@
+import os
+import sys
+import json
+import socket
+import time
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# The daemon keeps the workspace state of one monorepo warm and serves it to devopspy
+# commands over a Unix domain socket, one JSON object per line in each direction:
+#   request:  {"op": "projects", ...parameters}
+#   response: {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+# Every lookup that can be served has an in-process fallback, used whenever no daemon is
+# running, the daemon fails, or DEVOPS_DAEMON=0 is set.
+
+DAEMON_SOCKET_NAME = "daemon.sock"
+# sun_path holds about 108 bytes; longer socket paths are moved to a private runtime directory
+MAX_SOCKET_PATH_LENGTH = 100
+# Seconds a client waits for a response, e.g. while the daemon re-discovers a large repo
+REQUEST_TIMEOUT = 60.0
+
+# Set in the daemon process itself, whose lookups must not go through the socket
+_serving = False
+# The open connection of this process: (base_dir, socket, reader). Requests from several threads
+# (e.g. the asyncio API's worker threads) take turns on it, holding the lock for a whole exchange
+_connection: Optional[Tuple[str, socket.socket, Any]] = None
+_connection_lock = threading.RLock()
+# Monorepo roots without a reachable daemon, so the socket is only tried once per process
+_unavailable: set = set()
+
+
+def get_socket_path(base_dir: str) -> str:
+    """
+    Returns the path of the socket of the daemon serving the monorepo rooted at base_dir.
+    Paths too long for a socket are moved to a private runtime directory (see get_runtime_dir).
+
+    Raises:
+        RuntimeError: If the runtime directory is not private to the current user
+    """
+    base_dir = os.path.abspath(base_dir)
+    path = os.path.join(base_dir, ".devops", DAEMON_SOCKET_NAME)
+    if len(os.fsencode(path)) > MAX_SOCKET_PATH_LENGTH:
+        digest = hashlib.sha256(os.fsencode(base_dir)).hexdigest()[:16]
+        path = os.path.join(get_runtime_dir(), f"{digest}.sock")
+    return path
+
+
+def get_runtime_dir() -> str:
+    """
+    Returns the directory holding the sockets of long monorepo paths: devopspy in
+    $XDG_RUNTIME_DIR, or devopspy-<uid> in the temp directory. It is created with mode 0700,
+    and must be owned by the current user and inaccessible to others, since anyone able to
+    bind a socket in it could serve arbitrary projects and environments to devopspy.
+
+    Raises:
+        RuntimeError: If the directory is not private to the current user
+    """
+    import stat
+    import tempfile
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        path = os.path.join(runtime_dir, "devopspy")
+    else:
+        path = os.path.join(tempfile.gettempdir(), f"devopspy-{os.getuid()}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{path} must be a directory owned by the current user and only accessible to them")
+    return path
+
+
+def is_disabled() -> bool:
+    return _serving or os.environ.get("DEVOPS_DAEMON", "").lower() in ("0", "false", "no", "off")
+
+
+def request(base_dir: str, op: str, **params: Any) -> Any:
+    """
+    Sends a request to the daemon serving base_dir.
+
+    Returns:
+        The result of the request, or None if no daemon is running or the request failed,
+        in which case the caller does the work in-process
+    """
+    base_dir = os.path.abspath(base_dir)
+    if is_disabled() or base_dir in _unavailable:
+        return None
+    with _connection_lock:
+        return _request(base_dir, op, params)
+
+
+def _request(base_dir: str, op: str, params: Dict[str, Any]) -> Any:
+    global _connection
+    if base_dir in _unavailable:
+        return None
+
+    if _connection is None or _connection[0] != base_dir:
+        close_connection()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(REQUEST_TIMEOUT)
+        try:
+            socket_path = get_socket_path(base_dir)
+            # Only trust a daemon run by the current user
+            if os.stat(socket_path).st_uid != os.getuid():
+                raise PermissionError(f"{socket_path} is owned by another user")
+            sock.connect(socket_path)
+        except (OSError, RuntimeError):
+            sock.close()
+            _unavailable.add(base_dir)
+            return None
+        _connection = (base_dir, sock, sock.makefile("rb"))
+
+    _, sock, reader = _connection
+    try:
+        sock.sendall(json.dumps({"op": op, **params}).encode() + b"\n")
+        response = json.loads(reader.readline())
+    except (OSError, ValueError):
+        close_connection()
+        _unavailable.add(base_dir)
+        return None
+    if not response.get("ok"):
+        return None
+    return response["result"]
+
+
+def close_connection() -> None:
+    global _connection
+    with _connection_lock:
+        if _connection is not None:
+            _connection[2].close()
+            _connection[1].close()
+            _connection = None
+
+
+class WarmState:
+    """
+    The in-memory workspace state of the daemon: the discovered projects and workspace scan
+    (through the memos of discovery.py and workspace.py), parsed .env files and compiled
+    env.yaml schemas. Everything is dropped whenever the watcher reports a change. Compiled
+    schemas are also checked against the mtime and size of their files, since manifests
+    listed in [tool.devops] env_manifests can have any name, which the watcher doesn't track;
+    as in the workspace index, that check is not trusted for files modified around the time
+    the schema was compiled (see index.is_racy).
+    """
+
+    def __init__(self, base_dir: str, poll: bool = False):
+        self.base_dir = base_dir
+        self.poll = poll
+        self.watcher = self._create_watcher()
+        self.lock = threading.Lock()
+        self.dotenv: Dict[str, Optional[Dict[str, Optional[str]]]] = {}
+        # files -> (stat signature of the files, compile time in ns, (schema, schema hash))
+        self.schemas: Dict[Tuple[str, ...], Tuple[Any, int, Tuple[Any, Optional[str]]]] = {}
+
+    def handle(self, op: str, params: Dict[str, Any]) -> Any:
+        handler = getattr(self, f"op_{op}", None)
+        if handler is None:
+            raise ValueError(f"Unknown request {op!r}")
+        with self.lock:
+            changes = self.watcher.changes()
+            if changes:
+                self.invalidate()
+            if os.path.join(self.base_dir, "pyproject.toml") in changes:
+                # The ignore patterns may have changed
+                self.watcher.close()
+                self.watcher = self._create_watcher()
+            return handler(**params)
+
+    def _create_watcher(self):
+        from .watcher import create_watcher
+        from .workspace import get_devops_config, get_ignore_patterns, is_scanned_file
+
+        ignore = get_ignore_patterns(get_devops_config(self.base_dir).get("discovery", {}))
+        return create_watcher(self.base_dir, ignore, is_scanned_file, self.poll)
+
+    def invalidate(self) -> None:
+        from .discovery import forget_projects
+
+        forget_projects()
+        self.dotenv.clear()
+        self.schemas.clear()
+
+    def op_ping(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "root": self.base_dir, "watcher": self.watcher.name}
+
+    def op_stop(self) -> Dict[str, Any]:
+        # The server is shut down by the connection handler, once the response is sent
+        return {"pid": os.getpid()}
+
+    def op_scan(self, ignore: List[str]) -> Dict[str, List[str]]:
+        from .workspace import scan_workspace
+        return scan_workspace(self.base_dir, ignore)._asdict()
+
+    def op_projects(self) -> Dict[str, Dict[str, Any]]:
+        from .discovery import find_python_projects
+        return {name: project.model_dump() for name, project in find_python_projects().items()}
+
+    def op_dotenv(self, paths: List[str]) -> Dict[str, Optional[Dict[str, Optional[str]]]]:
+        from dotenv import dotenv_values
+
+        for path in paths:
+            if path not in self.dotenv:
+                # Values are not interpolated: ${VAR} references resolve against the client's environment
+                self.dotenv[path] = dict(dotenv_values(path, interpolate=False)) if os.path.isfile(path) else None
+        return {path: self.dotenv[path] for path in paths}
+
+    def op_schema(self, files: List[str]) -> Dict[str, Any]:
+        from .env_validation import compile_env_schema
+        from .index import is_racy
+
+        key = tuple(files)
+        signature = [_stat_signature(path) for path in files]
+        memo = self.schemas.get(key)
+        if memo is None or memo[0] != signature or any(
+            stat is not None and is_racy({"mtime_ns": stat[0]}, memo[1]) for stat in signature
+        ):
+            self.schemas[key] = signature, time.time_ns(), compile_env_schema(files)
+        schema, schema_hash = self.schemas[key][2]
+        return {"schema": schema, "hash": schema_hash}
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def serve(base_dir: str, poll: bool = False):
+    """
+    Creates the daemon server for the monorepo rooted at base_dir, listening on its socket.
+    Call serve_forever() on the result to start serving, and shutdown() to stop.
+
+    Raises:
+        RuntimeError: If a daemon is already serving base_dir
+    """
+    import socketserver
+
+    global _serving
+    _serving = True
+
+    base_dir = os.path.abspath(base_dir)
+    socket_path = get_socket_path(base_dir)
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+            raise RuntimeError(f"A daemon is already serving {base_dir} on {socket_path}")
+        except OSError:
+            # Left behind by a daemon that did not shut down cleanly
+            os.unlink(socket_path)
+        finally:
+            probe.close()
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    state = WarmState(base_dir, poll)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    message = json.loads(line)
+                    op = message.pop("op")
+                    response = {"ok": True, "result": state.handle(op, message)}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                    op = None
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+                if op == "stop":
+                    threading.Thread(target=self.server.shutdown).start()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def server_close(self):
+            super().server_close()
+            state.watcher.close()
+            try:
+                os.unlink(socket_path)
+            except OSError:
+                pass
+
+    old_umask = os.umask(0o177)
+    try:
+        server = Server(socket_path, Handler)
+    finally:
+        os.umask(old_umask)
+    server.state = state
+    return server
@@ -1,93 +1,369 @@
 import os
-import glob
+import re
 import tomli
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import BaseModel, field_validator
 from colorama import Fore, Style
+from . import daemon
+from .console import echo
+from .index import load_index, save_index, is_fresh
+from .cache import parse_size
+from .tracing import span
+from .workspace import get_devops_config, get_ignore_patterns, get_monorepo_root, scan_workspace
+
+# Parsing tomli manifests is CPU bound, so beyond this many manifests to (re-)parse the
+# GIL makes a process pool worth its startup cost. Configurable with
+# [tool.devops.discovery] process_pool_threshold.
+DEFAULT_PROCESS_POOL_THRESHOLD = 500
+
+# The distribution name at the start of a PEP 508 requirement string
+_REQUIREMENT_NAME = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+class ScriptConfig(BaseModel):
+    """
+    Configuration of a script. Scripts are declared in [tool.devops.scripts] either as a
+    command string or as a table, e.g. test = { cmd = "pytest", cache = true }.
+    """
+    cmd: str
+    # Whether the script's results are cached (see task_cache.py). The output of a cacheable script is
+    # captured to be replayed: it runs without a TTY, with its stderr merged into its stdout
+    cache: bool = False
+    # Glob patterns, relative to the project directory, of the files the script produces
+    outputs: List[str] = []
+    # Environment variables the script's result depends on, besides those in the project's env.yaml
+    env: List[str] = []
+    # Resources the script needs while running, packed against the budgets of run-many (see run_tasks):
+    # CPU cores, memory in bytes (given as e.g. "2G"), and whether it must run alone
+    cpu: float = 1.0
+    mem: Optional[int] = None
+    exclusive: bool = False
+
+    @field_validator("cpu")
+    @classmethod
+    def _check_cpu(cls, value: float) -> float:
+        if value <= 0:
+            raise ValueError("cpu must be positive")
+        return value
+
+    @field_validator("mem", mode="before")
+    @classmethod
+    def _parse_mem(cls, value: Any) -> Optional[int]:
+        if value is None:
+            return None
+        # parse_size would read true as 1 byte
+        if isinstance(value, bool):
+            raise ValueError(f"Invalid memory size: {value}")
+        size = parse_size(value)
+        if size < 0:
+            raise ValueError(f"Invalid memory size {value}: must not be negative")
+        return size
 
 class Project(BaseModel):
     name: str
     path: str
     scripts: Dict[str, str]
     deployment: dict[str, Any]
+    # Names of the other workspace projects this project depends on
+    dependencies: List[str] = []
+    script_config: Dict[str, ScriptConfig] = {}
+    # Shared env.yaml manifests the project declares in [tool.devops] env_manifests, as absolute paths
+    env_manifests: List[str] = []
 
 _projects: Dict[str, Project] | None = None
 
+
+class DiscoveryConfigError(ValueError):
+    """Raised when the [tool.devops.discovery] configuration (or its environment override) is invalid."""
+
+
+def get_parse_workers(discovery_config: dict[str, Any]) -> int:
+    """
+    Returns the number of workers used to parse manifests concurrently, taken from the
+    DEVOPS_DISCOVERY_WORKERS environment variable or [tool.devops.discovery] workers.
+    Defaults to the same bound as concurrent.futures.ThreadPoolExecutor.
+
+    Raises:
+        DiscoveryConfigError: If the number of workers is not an integer
+    """
+    workers = os.getenv("DEVOPS_DISCOVERY_WORKERS", discovery_config.get("workers"))
+    if workers is None:
+        return min(32, (os.cpu_count() or 1) + 4)
+    try:
+        return max(1, int(workers))
+    except (TypeError, ValueError):
+        raise DiscoveryConfigError(f"Invalid number of discovery workers: {workers}")
+
+
+def parse_manifest(pyproject_path: str) -> dict[str, Any] | None:
+    """
+    Reads a pyproject.toml file and extracts the data discovery needs from it.
+
+    Returns:
+        A dictionary with the project's name, scripts and deployment configuration,
+        or None if the file does not declare a project name.
+    """
+    # Read and parse the pyproject.toml file
+    with open(pyproject_path, "rb") as f:
+        pyproject_data = tomli.load(f)
+
+    # Extract the project name if it exists
+    if "project" not in pyproject_data or "name" not in pyproject_data["project"]:
+        return None
+
+    devops_config = pyproject_data.get("tool", {}).get("devops", {})
+
+    # Extract the names of the project's requirements, to be matched against the workspace later
+    requires = []
+    for requirement in pyproject_data["project"].get("dependencies", []):
+        match = _REQUIREMENT_NAME.match(requirement)
+        if match:
+            requires.append(normalize_name(match.group(1)))
+
+    # Extract uv sources: local paths, or None for workspace members
+    sources = {}
+    for source_name, source in pyproject_data.get("tool", {}).get("uv", {}).get("sources", {}).items():
+        if isinstance(source, dict) and ("path" in source or source.get("workspace")):
+            sources[normalize_name(source_name)] = source.get("path")
+
+    return {
+        "name": pyproject_data["project"]["name"],
+        # Extract scripts if they exist
+        "scripts": devops_config.get("scripts", {}),
+        # Extract deployment configuration if it exists
+        "deployment": devops_config.get("deployment", {}),
+        "requires": requires,
+        "sources": sources,
+        "env_manifests": devops_config.get("env_manifests", []),
+    }
+
+
+def parse_scripts(raw_scripts: dict[str, Any]) -> Tuple[Dict[str, str], Dict[str, ScriptConfig]]:
+    """
+    Splits the [tool.devops.scripts] table into script commands and script configurations.
+
+    Returns:
+        A tuple of dictionaries mapping script names to their commands and to their configurations
+    """
+    script_config = {}
+    for script_name, script in raw_scripts.items():
+        if isinstance(script, dict):
+            script_config[script_name] = ScriptConfig(**script)
+        else:
+            script_config[script_name] = ScriptConfig(cmd=script)
+    return {script_name: config.cmd for script_name, config in script_config.items()}, script_config
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a distribution name as specified by PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def resolve_dependencies(projects: Dict[str, Project], manifests: Dict[str, dict[str, Any]]) -> None:
+    """
+    Fills in the dependencies of every project: the requirements and uv sources of its
+    manifest that point at other discovered projects. A requirement matches a project by
+    normalized name; a uv path source matches the project located at that path.
+    """
+    by_name = {normalize_name(name): name for name in projects}
+    by_path = {os.path.normpath(project.path): project.name for project in projects.values()}
+
+    for name, project in projects.items():
+        manifest = manifests[name]
+        dependencies = []
+        for requirement in manifest.get("requires", []):
+            if requirement in by_name:
+                dependencies.append(by_name[requirement])
+        for source_name, source_path in manifest.get("sources", {}).items():
+            if source_path is not None:
+                dependency = by_path.get(os.path.normpath(os.path.join(project.path, source_path)))
+            else:
+                dependency = by_name.get(source_name)
+            if dependency is not None:
+                dependencies.append(dependency)
+        project.dependencies = [dependency for dependency in dict.fromkeys(dependencies) if dependency != name]
+
+
+def _parse_manifest_safe(pyproject_path: str) -> Tuple[dict[str, Any] | None, str | None]:
+    """
+    Calls parse_manifest, returning the error message instead of raising so one bad file
+    doesn't abort a batch. Messages rather than exceptions cross process boundaries cleanly.
+    """
+    try:
+        return parse_manifest(pyproject_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def parse_manifests(
+    pyproject_paths: List[str], workers: int, process_pool_threshold: int = DEFAULT_PROCESS_POOL_THRESHOLD
+) -> List[Tuple[dict[str, Any] | None, str | None]]:
+    """
+    Parses manifests concurrently on a bounded pool. Thread pools hide per-file read latency
+    (network filesystems, cold page caches); a process pool is used once the batch reaches
+    process_pool_threshold, since parsing itself holds the GIL.
+
+    Returns:
+        A list of (manifest, error message) tuples in the same order as pyproject_paths.
+    """
+    if workers <= 1 or len(pyproject_paths) <= 1:
+        return [_parse_manifest_safe(path) for path in pyproject_paths]
+
+    # Imported here since warm runs rarely have manifests to parse, and
+    # concurrent.futures.process pulls in multiprocessing
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    workers = min(workers, len(pyproject_paths))
+    cpus = os.cpu_count() or 1
+    if len(pyproject_paths) >= process_pool_threshold and cpus > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, cpus)) as executor:
+            return list(executor.map(_parse_manifest_safe, pyproject_paths, chunksize=16))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_parse_manifest_safe, pyproject_paths))
+
+
 def find_python_projects() -> Dict[str, Project]:
     """
     Finds all pyproject.toml files under the monorepo root directory
     and creates a dictionary mapping project names to their paths and scripts.
+
+    The manifests come from the shared workspace scan (see workspace.scan_workspace), in
+    which directories matching the ignore patterns are not descended into.
+    The extracted manifest data is persisted in the workspace index (see index.py), so
+    subsequent runs only re-parse manifests that were added or changed since. Those are
+    parsed concurrently (see parse_manifests). When a daemon serves the monorepo, the
+    projects it keeps in memory are used instead (see daemon.py).
     
     Returns:
         A dictionary mapping project names to tuples containing:
         - The directory path
         - A dictionary of script names to their entry points
+
+    Raises:
+        DiscoveryConfigError: If the discovery configuration is invalid (see get_parse_workers)
     """
     global _projects
 
     if _projects is not None:
         return _projects
 
-    base_dir = os.getenv("MONOREPO_ROOT", os.getcwd())
-
-    # Find all pyproject.toml files recursively
-    pattern = os.path.join(base_dir, "**/pyproject.toml")
-    pyproject_files = glob.glob(pattern, recursive=True)
-    
-    projects = {}
+    base_dir = get_monorepo_root()
+    with span("discovery"):
+        served = daemon.request(base_dir, "projects")
+        if served is not None:
+            projects = {name: Project.model_validate(project) for name, project in served.items()}
+        else:
+            projects = discover_projects(base_dir)
     
+    echo(f"{Fore.YELLOW}Workspace Discovery initialized in {base_dir}. Workspaces found: {', '.join(projects.keys())}{Style.RESET_ALL}")
+
+    _projects = projects
+    return projects
+
+
+def forget_projects() -> None:
+    """
+    Drops the projects memoized by this process, along with the workspace scans and service
+    index derived from the manifests, so that they are discovered again after manifests changed.
+    """
+    global _projects
+    from . import services, workspace
+
+    _projects = None
+    workspace._scans.clear()
+    services._service_index = None
+
+
+def discover_projects(base_dir: str) -> Dict[str, Project]:
+    """
+    Discovers the projects of the monorepo rooted at base_dir, refreshing the workspace index.
+    Unlike find_python_projects, the result is neither memoized nor requested from the daemon,
+    and only manifest errors are printed.
+    """
+    discovery_config = get_devops_config(base_dir).get("discovery", {})
+
+    # Find all pyproject.toml files recursively, pruning ignored directories
+    ignore = get_ignore_patterns(discovery_config)
+    pyproject_files = scan_workspace(base_dir, ignore).pyprojects
+
+    index = load_index(base_dir)
+    index_dirty = index is None
+    if index is None:
+        index = {}
+    entries = {}
+
+    # Reuse the index entries of unchanged manifests and collect the ones to (re-)parse
+    stale = []
     for pyproject_path in pyproject_files:
-        pyproject_dir = os.path.dirname(pyproject_path)
-        if base_dir == pyproject_dir or 'venv/' in pyproject_dir or 'node_modules/' in pyproject_dir:
+        if base_dir == os.path.dirname(pyproject_path):
             continue
 
+        rel_path = os.path.relpath(pyproject_path, base_dir)
         try:
-            # Read and parse the pyproject.toml file
-            with open(pyproject_path, "rb") as f:
-                pyproject_data = tomli.load(f)
-            
-            # Extract the project name if it exists
-            if "project" in pyproject_data and "name" in pyproject_data["project"]:
-                project_name = pyproject_data["project"]["name"]
-                
-                # Extract scripts if they exist
-                scripts = pyproject_data.get("tool", {}).get("devops", {}).get("scripts", {})
-
-                # Extract deployment configuration if it exists
-                deployment = pyproject_data.get("tool", {}).get("devops", {}).get("deployment", {})
-                
-                # Store the directory containing the pyproject.toml file and its scripts
-                projects[project_name] = Project(
-                    name=project_name, 
-                    path=pyproject_dir, 
-                    scripts=scripts,
-                    deployment=deployment
-                )
-        except Exception as e:
+            stat = os.stat(pyproject_path)
+        except OSError as e:
+            echo(f"Error processing {pyproject_path}: {e}")
+            continue
+        entry = index.get(rel_path)
+        if is_fresh(entry, stat):
+            entries[rel_path] = entry
+        else:
+            entries[rel_path] = None
+            stale.append((rel_path, pyproject_path, stat))
+
+    workers = get_parse_workers(discovery_config)
+    threshold = discovery_config.get("process_pool_threshold", DEFAULT_PROCESS_POOL_THRESHOLD)
+    with span("parse manifests", count=len(stale)):
+        results = parse_manifests([pyproject_path for _, pyproject_path, _ in stale], workers, threshold)
+    for (rel_path, pyproject_path, stat), (manifest, error) in zip(stale, results):
+        if error is not None:
             # Skip files that can't be parsed
-            print(f"Error processing {pyproject_path}: {e}")
-    
-    print(f"{Fore.YELLOW}Workspace Discovery initialized in {base_dir}. Workspaces found: {', '.join(projects.keys())}{Style.RESET_ALL}")
+            echo(f"Error processing {pyproject_path}: {error}")
+            del entries[rel_path]
+            continue
+        entries[rel_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "project": manifest}
+        index_dirty = True
+
+    projects = {}
+    manifests = {}
+
+    # Build the project map in walk order, independently of the order manifests were parsed in
+    for rel_path, entry in entries.items():
+        manifest = entry["project"]
+        if manifest is None:
+            continue
+        pyproject_path = os.path.join(base_dir, rel_path)
+        try:
+            # Store the directory containing the pyproject.toml file and its scripts
+            scripts, script_config = parse_scripts(manifest["scripts"])
+            projects[manifest["name"]] = Project(
+                name=manifest["name"],
+                path=os.path.dirname(pyproject_path),
+                scripts=scripts,
+                deployment=manifest["deployment"],
+                script_config=script_config,
+                env_manifests=[
+                    os.path.normpath(os.path.join(os.path.dirname(pyproject_path), env_manifest))
+                    for env_manifest in manifest["env_manifests"]
+                ]
+            )
+            manifests[manifest["name"]] = manifest
+        except Exception as e:
+            echo(f"Error processing {pyproject_path}: {e}")
+
+    resolve_dependencies(projects, manifests)
+
+    # Manifests that disappeared since the index was written also require a rewrite
+    if index_dirty or index.keys() - entries.keys():
+        save_index(base_dir, entries)
 
-    _projects = projects
     return projects
 
 
 def get_port_for_service_name(service_name: str) -> int | None:
     """
     Returns the port for the given service name, or None if not found.
-    Iterates the discovered projects and returns as soon as a match is found.
+    Lookups go through the memoized service index (see services.py).
     """
-    projects = find_python_projects()
-    for project in projects.values():
-        svc_name = project.deployment.get("service_name")
-        if svc_name != service_name:
-            continue
-        port = project.deployment.get("port")
-        if port is None:
-            continue
-        try:
-            return int(port)
-        except (TypeError, ValueError):
-            raise ValueError(f"Invalid port value for service {service_name}: {port}")
-    return None
+    from .services import get_service_port
+    return get_service_port(service_name)
@@ -0,0 +1,141 @@
+import os
+import json
+import time
+from typing import Dict, Iterable, List, Mapping, Tuple
+from .cache import get_cache_dir, write_atomic
+from .scheduler import Task, TaskResult
+
+HISTORY_FILE_NAME = "durations.jsonl"
+
+# Number of recent successful runs of a project's script averaged into its estimate
+HISTORY_SAMPLES = 5
+# Once the history has this many lines, it is rewritten keeping only the recent samples
+MAX_HISTORY_LINES = 10000
+
+# Estimates are keyed by (project name, script name)
+DurationKey = Tuple[str, str]
+
+
+def get_history_path(base_dir: str) -> str:
+    """Returns the path of the duration history of the monorepo rooted at base_dir."""
+    return os.path.join(get_cache_dir(base_dir), HISTORY_FILE_NAME)
+
+
+def _read_history(base_dir: str) -> List[dict]:
+    try:
+        with open(get_history_path(base_dir), "rb") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    entries = []
+    for line in lines:
+        try:
+            entry = json.loads(line)
+            entries.append({"project": str(entry["project"]), "script": str(entry["script"]),
+                            "duration": float(entry["duration"]), "time": float(entry.get("time", 0))})
+        except (ValueError, KeyError, TypeError):
+            # Lines cut short by a crash or written by another version are skipped
+            continue
+    return entries
+
+
+def load_estimates(base_dir: str) -> Dict[DurationKey, float]:
+    """
+    Returns the expected duration in seconds of every project's script with a recorded
+    history: the mean of its last HISTORY_SAMPLES successful runs.
+    """
+    samples: Dict[DurationKey, List[float]] = {}
+    for entry in _read_history(base_dir):
+        samples.setdefault((entry["project"], entry["script"]), []).append(entry["duration"])
+    return {key: sum(values[-HISTORY_SAMPLES:]) / len(values[-HISTORY_SAMPLES:]) for key, values in samples.items()}
+
+
+def record_durations(base_dir: str, script_name: str, results: Iterable[TaskResult]) -> None:
+    """
+    Appends the wall time of the successful runs among results to the duration history.
+    Cache hits (which take no time) and failed or cancelled runs are not recorded.
+    """
+    now = time.time()
+    lines = [
+        json.dumps({"project": result.name, "script": script_name, "duration": round(result.duration, 3),
+                    "time": now}) + "\n"
+        for result in results
+        if result.exit_code == 0 and result.duration > 0
+    ]
+    if not lines:
+        return
+
+    path = get_history_path(base_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A single O_APPEND write per run keeps concurrent runs from interleaving their lines
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, "".join(lines).encode())
+        size = os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+    # Lines are well below 200 bytes, so this only reads the history once it likely needs compacting
+    if size > MAX_HISTORY_LINES * 100:
+        _compact(base_dir)
+
+
+def _compact(base_dir: str) -> None:
+    entries = _read_history(base_dir)
+    if len(entries) < MAX_HISTORY_LINES:
+        return
+    kept: Dict[DurationKey, List[dict]] = {}
+    for entry in entries:
+        kept.setdefault((entry["project"], entry["script"]), []).append(entry)
+    recent = sorted((entry for values in kept.values() for entry in values[-HISTORY_SAMPLES:]),
+                    key=lambda entry: entry["time"])
+    write_atomic(get_history_path(base_dir), "".join(json.dumps(entry) + "\n" for entry in recent).encode())
+
+
+def estimate(estimates: Mapping[DurationKey, float], project_name: str, script_name: str) -> float:
+    """
+    Returns the expected duration of a project's script. Scripts without history are assumed
+    to take as long as the median of the known ones (1 second if none is known).
+    """
+    known = estimates.get((project_name, script_name))
+    if known is not None:
+        return known
+    values = sorted(value for (_, script), value in estimates.items() if script == script_name)
+    return values[len(values) // 2] if values else 1.0
+
+
+def longest_first(tasks: List[Task], durations: Mapping[str, float]) -> List[Task]:
+    """
+    Orders tasks so that run_tasks starts those on the longest chain of dependent work first:
+    a task's priority is its own duration plus that of the longest chain of tasks waiting on it.
+    """
+    dependents: Dict[str, List[str]] = {task.name: [] for task in tasks}
+    for task in tasks:
+        for dep in task.deps:
+            if dep in dependents:
+                dependents[dep].append(task.name)
+
+    priorities: Dict[str, float] = {}
+
+    def priority(name: str) -> float:
+        if name not in priorities:
+            priorities[name] = durations.get(name, 0.0) + max((priority(other) for other in dependents[name]),
+                                                              default=0.0)
+        return priorities[name]
+
+    return sorted(tasks, key=lambda task: (-priority(task.name), task.name))
+
+
+def shard(names: List[str], durations: Mapping[str, float], index: int, count: int) -> List[str]:
+    """
+    Splits names into count shards of balanced total duration, assigning the longest first
+    to the shard with the least work so far, and returns the names of shard index (1-based).
+    The split only depends on names and durations, so every CI node computes the same one.
+    """
+    loads = [0.0] * count
+    assigned: List[List[str]] = [[] for _ in range(count)]
+    for name in sorted(names, key=lambda name: (-durations[name], name)):
+        target = min(range(count), key=lambda i: (loads[i], i))
+        loads[target] += durations[name]
+        assigned[target].append(name)
+    selected = set(assigned[index - 1])
+    return [name for name in names if name in selected]
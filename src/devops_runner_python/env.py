@@ -1,39 +1,144 @@
 import os
-from typing import Optional
-from dotenv import load_dotenv
-from .env_validation import validate_environment
+from typing import Dict, List, Mapping, Optional, Tuple
+from dotenv import dotenv_values
+from dotenv.variables import parse_variables
 from colorama import Fore, Style
+from . import daemon
+from .tracing import span
+
+# Raw (not interpolated) values of the .env files read by this process, by path, along with
+# the (mtime_ns, size) signature of the file they were read from (None if it does not exist)
+_dotenv_files: Dict[str, Tuple[Optional[Tuple[int, int]], Dict[str, Optional[str]]]] = {}
+
+
+def build_env(env: str, root: str, base: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """
+    Builds the environment of the commands run for an environment, without modifying os.environ.
+
+    Variables already set in base take precedence over those in config/.env.<env>, which take
+    precedence over those in config/.env.global, as with loading both files into os.environ with
+    load_dotenv. ${VAR} references are expanded the same way too. MONOREPO_ROOT and MONOREPO_ENV
+    are always set. The parsed files are cached until they change.
+
+    Args:
+        env: Environment name
+        root: The monorepo root, containing the config/ directory
+        base: The environment to start from (default: os.environ)
+
+    Returns:
+        A new dictionary holding the environment
+    """
+    environ = dict(os.environ if base is None else base)
+    paths = [os.path.join(root, 'config', f'.env.{env}'), os.path.join(root, 'config', '.env.global')]
+    with span("load dotenv files"):
+        for values in _read_dotenv_files(root, paths):
+            resolved = {}
+            for key, value in values.items():
+                # References resolve against the environment so far, then against the file's own earlier values
+                resolved[key] = None if value is None else "".join(
+                    atom.resolve({**resolved, **environ}) for atom in parse_variables(value)
+                )
+            for key, value in resolved.items():
+                if value is not None and key not in environ:
+                    environ[key] = value
+
+    environ["MONOREPO_ROOT"] = root
+    environ["MONOREPO_ENV"] = env
+    return environ
+
+
+def _read_dotenv_files(root: str, paths: List[str]) -> List[Dict[str, Optional[str]]]:
+    """Returns the raw values of the given .env files (empty for missing files), from the cache, the daemon or the files."""
+    signatures = {path: _stat_signature(path) for path in paths}
+    stale = [path for path in paths if path not in _dotenv_files or _dotenv_files[path][0] != signatures[path]]
+    if stale:
+        served = daemon.request(root, "dotenv", paths=stale)
+        for path in stale:
+            if served is not None:
+                values = served[path]
+            else:
+                values = dotenv_values(path, interpolate=False) if signatures[path] is not None else None
+            _dotenv_files[path] = (signatures[path], dict(values or {}))
+    return [_dotenv_files[path][1] for path in paths]
+
+
+def _stat_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def resolve_env_vars(env: str, cwd: Optional[str] = None) -> Dict[str, str]:
+    """
+    Announces and builds the environment for the commands devopspy runs (see build_env).
+
+    Args:
+        env: Environment name (default: 'development')
+        cwd: The monorepo root. If None, uses os.getcwd()
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+
+    print(f"\n{Fore.BLUE}Loading environment variables for {env} in {cwd}{Style.RESET_ALL}\n")
+    return build_env(env, cwd)
+
 
 def load_env_vars(env: str, cwd: Optional[str] = None) -> None:
     """
     Load environment variables from config/.env.global and config/.env.<env> files
-    relative to the current working directory.
+    relative to the current working directory into os.environ.
     
     Args:
         env: Environment name (default: 'development')
         cwd: Current working directory. If None, uses os.getcwd()
     """
-    if cwd is None:
-        cwd = os.getcwd()
+    os.environ.update(resolve_env_vars(env, cwd))
 
-    print(f"\n{Fore.BLUE}Loading environment variables for {env} in {cwd}{Style.RESET_ALL}\n")
 
-    # Load environment-specific variables
-    env_specific_path = os.path.join(cwd, 'config', f'.env.{env}')
-    load_dotenv(env_specific_path)
+def get_project_env_manifests(projects: Dict, project_names: List[str]) -> List[str]:
+    """
+    Returns the env.yaml files that apply to the given projects and their workspace dependencies:
+    the env.yaml files in each project's directory (excluding those of nested projects), the
+    manifests each project lists in [tool.devops] env_manifests, and the shared manifests listed
+    in [tool.devops] env_manifests of the root pyproject.toml.
+    """
+    from .affected import find_owning_project
+    from .graph import with_dependencies
+    from .workspace import get_devops_config, get_monorepo_root, scan_workspace
+
+    root = get_monorepo_root()
+    owners = {}
+    for path in scan_workspace(root).env_yamls:
+        owners.setdefault(find_owning_project(projects, path), []).append(path)
 
-    # Load global environment variables
-    global_env_path = os.path.join(cwd, 'config', '.env.global')
-    load_dotenv(global_env_path)
+    manifests = [os.path.normpath(os.path.join(root, path)) for path in get_devops_config(root).get("env_manifests", [])]
+    for name in sorted(with_dependencies(projects, project_names)):
+        manifests.extend(owners.get(name, []))
+        manifests.extend(projects[name].env_manifests)
 
-    os.environ["MONOREPO_ROOT"] = cwd
-    os.environ["MONOREPO_ENV"] = env
+    return list(dict.fromkeys(manifests))
 
-def validate_env_vars() -> bool:
+
+def validate_env_vars(projects: Optional[Dict] = None, project_names: Optional[List[str]] = None,
+                      environ: Optional[Mapping[str, str]] = None) -> bool:
     """
     Validate environment variables against env.yaml files.
+
+    Args:
+        projects: The discovered projects, required when project_names is given
+        project_names: Only validate against the manifests applying to these projects
+            (see get_project_env_manifests). If None, all env.yaml files in the repo are used.
+        environ: The environment to validate (default: os.environ)
     
     Returns:
         True if validation passed, False otherwise
     """
-    return validate_environment()
+    # Imported here so that commands which don't validate (e.g. exec) don't load PyYAML
+    from .env_validation import validate_environment
+
+    with span("validate environment"):
+        if project_names is None:
+            return validate_environment(environ=environ)
+        return validate_environment(get_project_env_manifests(projects, project_names), environ)
@@ -1,26 +1,42 @@
 import os
+import json
+import time
 import yaml
-from typing import Dict, List, Union, Optional
-from glob import glob
+import hashlib
+from typing import Dict, List, Mapping, Union, Optional
 from dotenv import dotenv_values
 from colorama import Fore, Style
+from . import daemon
+from .console import echo
+from .cache import get_cache_dir, write_atomic
+from .index import is_racy
+from .workspace import scan_workspace
+
+# Use libyaml's loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
 # Type definitions
 EnvRequirement = Union[str, List[str]]
 ParsedEnvYaml = Dict[str, EnvRequirement]
 
+SCHEMA_CACHE_FILE_NAME = "env-schema.json"
+VALIDATION_CACHE_FILE_NAME = "env-validation.json"
+ENV_CACHE_VERSION = 1
+
+# Number of successful validation results remembered, e.g. one per environment and branch
+VALIDATION_CACHE_SIZE = 32
+
 
 def find_env_yaml_files() -> List[str]:
-    """Find all env.yaml files in the project, excluding node_modules/ and venv/ folders."""
-    all_files = glob("**/env.yaml", recursive=True)
-    
-    # Filter out files in node_modules/ and venv/ directories
-    filtered_files = []
-    for file_path in all_files:
-        if 'node_modules/' not in file_path and 'venv/' not in file_path:
-            filtered_files.append(file_path)
-    
-    return filtered_files
+    """
+    Find all env.yaml files in the project, excluding ignored folders such as node_modules/ and venv/.
+    The files come from the shared workspace scan, relative to the current directory.
+    """
+    scan = scan_workspace(os.getenv("MONOREPO_ROOT", os.getcwd()))
+    return [os.path.relpath(file_path) for file_path in scan.env_yamls]
 
 
 def find_dotenv_files() -> List[str]:
@@ -28,9 +44,10 @@ def find_dotenv_files() -> List[str]:
     files = []
     
     # Add global .env file if it exists
-    global_env_file = "config/.env.global"
-    if os.path.exists(global_env_file):
-        files.append(global_env_file)
+    root = os.getenv("MONOREPO_ROOT", os.getcwd())
+    global_env_file = os.path.join(root, "config", ".env.global")
+    if global_env_file in scan_workspace(root).dotenv_files:
+        files.append(os.path.relpath(global_env_file))
     
     return files
 
@@ -38,27 +55,27 @@ def find_dotenv_files() -> List[str]:
 def parse_env_yaml(file_path: str) -> Optional[ParsedEnvYaml]:
     """Parse an env.yaml file and return the environment requirements."""
     if not os.path.exists(file_path):
-        print(f"Skipping {file_path}: does not exist")
+        echo(f"Skipping {file_path}: does not exist")
         return None
     
     try:
         with open(file_path, 'r') as f:
-            env_manifest = yaml.safe_load(f)
+            env_manifest = yaml.load(f, Loader=YamlLoader)
         
         if not isinstance(env_manifest, list):
-            print(f"Error in {file_path}: env.yaml file must resolve to an array")
+            echo(f"Error in {file_path}: env.yaml file must resolve to an array")
             return None
         
         all_env = {}
         for env in env_manifest:
             if isinstance(env, dict):
                 if len(env) != 1:
-                    print(f"Error in {file_path}: every object in env.yaml must have one key. Error near: {list(env.keys())[0]}")
+                    echo(f"Error in {file_path}: every object in env.yaml must have one key. Error near: {list(env.keys())[0]}")
                     return None
                 
                 name, value = list(env.items())[0]
                 if not (isinstance(value, list) or value in ['optional', 'boolean']):
-                    print(f"Error in {file_path}: invalid value for {name}: {value}")
+                    echo(f"Error in {file_path}: invalid value for {name}: {value}")
                     return None
                 
                 all_env[name] = value
@@ -67,19 +84,22 @@ def parse_env_yaml(file_path: str) -> Optional[ParsedEnvYaml]:
         
         return all_env
     except yaml.YAMLError as e:
-        print(f"Error parsing {file_path}: {e}")
+        echo(f"Error parsing {file_path}: {e}")
         return None
 
 
-def validate_env_vars(env_requirements: ParsedEnvYaml, file_path: str) -> Dict[str, str]:
-    """Validate environment variables against requirements."""
+def validate_env_vars(env_requirements: ParsedEnvYaml, file_path: str,
+                      environ: Optional[Mapping[str, str]] = None) -> Dict[str, str]:
+    """Validate environment variables (default: os.environ) against requirements."""
+    if environ is None:
+        environ = os.environ
     errors = {}
     
     # Get the relative path to make error messages more helpful
     rel_path = os.path.relpath(file_path)
     
     for key, requirement in env_requirements.items():
-        value = os.environ.get(key)
+        value = environ.get(key)
         
         if requirement != 'optional' and not value:
             errors[key] = f"Error in {rel_path}: {key} is required but missing"
@@ -100,50 +120,183 @@ def parse_dotenv_file(file_path: str) -> List[str]:
         env_vars = dotenv_values(file_path)
         return list(env_vars.keys())
     except Exception as e:
-        print(f"Error parsing {file_path}: {e}")
+        echo(f"Error parsing {file_path}: {e}")
         return []
 
 
-def validate_environment() -> bool:
+def _get_env_cache_path(file_name: str) -> str:
+    return os.path.join(get_cache_dir(os.getenv("MONOREPO_ROOT", os.getcwd())), file_name)
+
+
+def _load_env_cache(file_name: str) -> dict:
+    try:
+        with open(_get_env_cache_path(file_name), "rb") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != ENV_CACHE_VERSION:
+        return {}
+    return data
+
+
+def _save_env_cache(file_name: str, data: dict) -> None:
+    try:
+        write_atomic(_get_env_cache_path(file_name), json.dumps({**data, "version": ENV_CACHE_VERSION}).encode())
+    except OSError:
+        pass
+
+
+def compile_env_schema(env_yaml_files: List[str]) -> tuple[Optional[Dict[str, ParsedEnvYaml]], Optional[str]]:
     """
-    Validate environment variables against all env.yaml files.
+    Parses env.yaml files into a schema mapping each file to its requirements, reusing the
+    compiled requirements cached in .devops/cache/env-schema.json for files whose mtime and
+    size, or failing that content hash, are unchanged. As in the workspace index, the mtime
+    and size of files modified around the time the cache was written are not trusted (see
+    index.is_racy), so those files are hashed again.
+
+    Returns:
+        A tuple of the schema (None if a file failed to parse) and a hash identifying it
+        (None if some file could not be read, in which case results must not be memoized)
+    """
+    # A running daemon keeps compiled schemas in memory. Failures are compiled again
+    # in-process, so that the errors are reported here.
+    served = daemon.request(os.getenv("MONOREPO_ROOT", os.getcwd()), "schema",
+                            files=[os.path.abspath(file_path) for file_path in env_yaml_files])
+    if served is not None and served["schema"] is not None:
+        requirements = [served["schema"][os.path.abspath(file_path)] for file_path in env_yaml_files]
+        return dict(zip(env_yaml_files, requirements)), served["hash"]
+
+    cache_data = _load_env_cache(SCHEMA_CACHE_FILE_NAME)
+    cache = cache_data.get("files", {})
+    written_ns = cache_data.get("written_ns", 0)
+    racy = False
+    files = {}
+    schema = {}
+    schema_digest = hashlib.sha256()
+    hashable = True
+
+    for file_path in env_yaml_files:
+        abs_path = os.path.abspath(file_path)
+        cached = cache.get(abs_path)
+        try:
+            stat = os.stat(file_path)
+            trusted = cached is not None and not is_racy(cached, written_ns)
+            racy = racy or (cached is not None and not trusted)
+            if trusted and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                content_hash = cached["sha256"]
+            else:
+                with open(file_path, "rb") as f:
+                    content_hash = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            # Let parse_env_yaml report the problem
+            hashable = False
+            content_hash = None
+
+        if content_hash is not None and cached and cached["sha256"] == content_hash:
+            requirements = cached["requirements"]
+        else:
+            requirements = parse_env_yaml(file_path)
+            if requirements is None:
+                echo(f"Failed to parse {file_path}")
+                return None, None
+
+        schema[file_path] = requirements
+        if content_hash is not None:
+            files[abs_path] = {
+                "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": content_hash, "requirements": requirements
+            }
+            schema_digest.update(f"{abs_path}\0{content_hash}\0".encode())
+
+    # Rewriting the cache once the racy entries are old enough makes them trusted again
+    if racy or files != {path: cache.get(path) for path in files}:
+        _save_env_cache(SCHEMA_CACHE_FILE_NAME, {"files": files, "written_ns": time.time_ns()})
+
+    return schema, schema_digest.hexdigest() if hashable else None
+
+
+def _validation_key(schema_hash: str, schema: Dict[str, ParsedEnvYaml], dotenv_files: List[str],
+                    environ: Mapping[str, str], scoped: bool) -> Optional[str]:
+    """
+    Digest of everything a validation result depends on: the schema, the referenced env values,
+    the .env files, and whether the validation was scoped (scoped results lack the unused keys).
+    """
+    digest = hashlib.sha256(schema_hash.encode() + (b"\0scoped" if scoped else b"\0all"))
+    keys = sorted({key for requirements in schema.values() for key in requirements})
+    for key in keys:
+        value = environ.get(key)
+        digest.update(key.encode() + b"\0" + (b"\1" if value is None else value.encode() + b"\0"))
+    for file_path in dotenv_files:
+        try:
+            with open(file_path, "rb") as f:
+                digest.update(f"{file_path}\0".encode() + hashlib.sha256(f.read()).digest())
+        except OSError:
+            return None
+    return digest.hexdigest()
+
+
+def validate_environment(env_yaml_files: Optional[List[str]] = None, environ: Optional[Mapping[str, str]] = None) -> bool:
+    """
+    Validate environment variables against env.yaml files.
+
+    The env.yaml files are compiled into a cached schema (see compile_env_schema), and
+    successful results are memoized per schema, referenced env values and .env files, so
+    an unchanged environment is only validated once.
+
+    Keys of the .env files missing from every env.yaml file are reported as warnings, but only
+    when validating against all the env.yaml files of the repo: a scoped validation only sees
+    the env.yaml files of some projects, so it can't tell which keys are unused.
+
+    Args:
+        env_yaml_files: The env.yaml files to validate against (default: all env.yaml files in the repo)
+        environ: The environment to validate (default: os.environ)
     
     Returns:
         True if validation passed, False otherwise
     """
+    if environ is None:
+        environ = os.environ
+
     # Find all env.yaml files
-    env_yaml_files = find_env_yaml_files()
+    scoped = env_yaml_files is not None
+    if not scoped:
+        env_yaml_files = find_env_yaml_files()
     if not env_yaml_files:
-        print("No env.yaml files found")
+        echo("No env.yaml files found")
         return True
     
     # Find .env.global file
     dotenv_files = find_dotenv_files()
     
     # Parse env.yaml files
-    yaml_requirements = {}
+    yaml_requirements, schema_hash = compile_env_schema(env_yaml_files)
+    if yaml_requirements is None:
+        return False
+
+    memo = _load_env_cache(VALIDATION_CACHE_FILE_NAME).get("results", {})
+    memo_key = None
+    if schema_hash is not None:
+        memo_key = _validation_key(schema_hash, yaml_requirements, dotenv_files, environ, scoped)
+    if memo_key is not None and memo_key in memo:
+        if not scoped:
+            _print_unused_keys(memo[memo_key]["unused"])
+        return True
+
     all_keys_from_yaml = set()
     all_errors = {}
     
-    for file_path in env_yaml_files:
-        requirements = parse_env_yaml(file_path)
-        if requirements is None:
-            print(f"Failed to parse {file_path}")
-            return False
-        
-        yaml_requirements[file_path] = requirements
+    for file_path, requirements in yaml_requirements.items():
         all_keys_from_yaml.update(requirements.keys())
         
         # Validate environment variables against requirements
-        errors = validate_env_vars(requirements, file_path)
+        errors = validate_env_vars(requirements, file_path, environ)
         for key, error in errors.items():
             if key not in all_errors:
                 all_errors[key] = []
             all_errors[key].append(error)
     
-    # Parse .env files and check for unused variables
+    # Parse .env files and check for unused variables, which needs the env.yaml files of the whole repo
     keys_from_dotenv = {}
-    for file_path in dotenv_files:
+    for file_path in dotenv_files if not scoped else []:
         keys = parse_dotenv_file(file_path)
         for key in keys:
             if key not in keys_from_dotenv:
@@ -151,22 +304,31 @@ def validate_environment() -> bool:
             keys_from_dotenv[key].append(file_path)
     
     # Find unused keys in .env files
-    unused_keys = [key for key in keys_from_dotenv if key not in all_keys_from_yaml]
+    unused_keys = {key: files for key, files in keys_from_dotenv.items() if key not in all_keys_from_yaml}
     
     # Print warnings for unused keys
-    if unused_keys:
-        print(f"{Fore.YELLOW}WARNING: some env variables exist in .env but not in env.yaml:{Style.RESET_ALL}")
-        for key in unused_keys:
-            print(f"\t{key} in: {', '.join(keys_from_dotenv[key])}")
-        print()
+    _print_unused_keys(unused_keys)
     
     # Print errors
     if all_errors:
         for key, errors in all_errors.items():
-            print(f"{Fore.RED}Errors for {key}:{Style.RESET_ALL}")
+            echo(f"{Fore.RED}Errors for {key}:{Style.RESET_ALL}")
             for error in errors:
-                print(f"\t{error}")
-            print()
+                echo(f"\t{error}")
+            echo()
         return False
+
+    if memo_key is not None:
+        memo[memo_key] = {"unused": unused_keys}
+        # Keep only the most recent results
+        _save_env_cache(VALIDATION_CACHE_FILE_NAME, {"results": dict(list(memo.items())[-VALIDATION_CACHE_SIZE:])})
     
     return True
+
+
+def _print_unused_keys(unused_keys: Dict[str, List[str]]) -> None:
+    if unused_keys:
+        echo(f"{Fore.YELLOW}WARNING: some env variables exist in .env but not in env.yaml:{Style.RESET_ALL}")
+        for key, files in unused_keys.items():
+            echo(f"\t{key} in: {', '.join(files)}")
+        echo()
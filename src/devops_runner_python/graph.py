@@ -0,0 +1,104 @@
+from typing import Dict, Iterable, List, Set
+from .discovery import Project
+
+
+class CycleError(Exception):
+    """Raised when the workspace dependency graph contains a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Dependency cycle detected: {' -> '.join(cycle)}")
+
+
+def get_dependents(projects: Dict[str, Project]) -> Dict[str, List[str]]:
+    """Returns a dictionary mapping every project name to the names of the projects depending on it."""
+    dependents = {name: [] for name in projects}
+    for name, project in projects.items():
+        for dependency in project.dependencies:
+            dependents[dependency].append(name)
+    return dependents
+
+
+def with_dependencies(projects: Dict[str, Project], names: Iterable[str]) -> Set[str]:
+    """Returns the given project names together with all their transitive dependencies."""
+    return _closure(names, lambda name: projects[name].dependencies)
+
+
+def with_dependents(projects: Dict[str, Project], names: Iterable[str]) -> Set[str]:
+    """Returns the given project names together with all projects transitively depending on them."""
+    dependents = get_dependents(projects)
+    return _closure(names, lambda name: dependents[name])
+
+
+def find_cycle(projects: Dict[str, Project], names: Iterable[str]) -> List[str] | None:
+    """
+    Looks for a dependency cycle reachable from the given projects.
+
+    Returns:
+        The projects forming the cycle, starting and ending with the same project, or None
+    """
+    # Iterative depth-first search: 0 = unvisited, 1 = on the current path, 2 = done
+    state: Dict[str, int] = {}
+    for root in names:
+        if state.get(root):
+            continue
+        path = [root]
+        stack = [iter(projects[root].dependencies)]
+        state[root] = 1
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                state[path.pop()] = 2
+                stack.pop()
+            elif state.get(dependency) == 1:
+                return path[path.index(dependency):] + [dependency]
+            elif not state.get(dependency):
+                state[dependency] = 1
+                path.append(dependency)
+                stack.append(iter(projects[dependency].dependencies))
+    return None
+
+
+def task_dependencies(projects: Dict[str, Project], selected: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Computes the ordering constraints between selected projects. A selected project waits
+    for the nearest selected projects among its transitive dependencies, looking through
+    projects that are not selected (e.g. because they don't define the script being run).
+
+    Raises:
+        CycleError: If the dependencies of the selected projects contain a cycle
+    """
+    selected = list(selected)
+    cycle = find_cycle(projects, selected)
+    if cycle:
+        raise CycleError(cycle)
+
+    selected_set = set(selected)
+    constraints = {}
+    for name in selected:
+        waits_for = []
+        seen = set()
+        stack = list(projects[name].dependencies)
+        while stack:
+            dependency = stack.pop()
+            if dependency in seen:
+                continue
+            seen.add(dependency)
+            if dependency in selected_set:
+                waits_for.append(dependency)
+            else:
+                stack.extend(projects[dependency].dependencies)
+        constraints[name] = sorted(waits_for)
+    return constraints
+
+
+def _closure(names: Iterable[str], neighbours) -> Set[str]:
+    result = set()
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name in result:
+            continue
+        result.add(name)
+        stack.extend(neighbours(name))
+    return result
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+from typing import Any, Dict, Optional
+from .cache import get_cache_dir, write_atomic
+
+INDEX_FILE_NAME = "workspace.idx"
+INDEX_VERSION = 3
+
+# Filesystems record mtimes with limited granularity, so a manifest modified within the
+# same tick as the index write can keep its recorded mtime. Such "racily clean" entries
+# are not trusted and get re-parsed on the next run.
+RACY_WINDOW_NS = 2_000_000_000
+
+# An index entry records the stat signature of one pyproject.toml (keyed by its path
+# relative to the monorepo root) and the data extracted from it:
+#   {"mtime_ns": int, "size": int, "project": {"name", "scripts", "deployment", "requires", "sources", "env_manifests"} | None}
+IndexEntry = Dict[str, Any]
+
+
+def get_index_path(base_dir: str) -> str:
+    """Returns the path of the persistent workspace index of the monorepo rooted at base_dir."""
+    return os.path.join(get_cache_dir(base_dir), INDEX_FILE_NAME)
+
+
+def load_index(base_dir: str) -> Optional[Dict[str, IndexEntry]]:
+    """
+    Loads the persistent workspace index, leaving out racily clean entries.
+
+    Returns:
+        A dictionary mapping manifest paths (relative to base_dir) to their index entries,
+        or None if the index does not exist, is corrupt or was written by another version.
+    """
+    data = read_index(base_dir)
+    if data is None:
+        return None
+    written_ns = data["written_ns"]
+    return {
+        rel_path: entry for rel_path, entry in data["entries"].items()
+        if not is_racy(entry, written_ns)
+    }
+
+
+def read_index(base_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Reads the persistent workspace index as written by save_index, with all its entries.
+
+    Returns:
+        The index data ({"version", "written_ns", "entries"}), or None if the index does not
+        exist, is corrupt or was written by another version.
+    """
+    try:
+        with open(get_index_path(base_dir), "rb") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+        return None
+    entries = data.get("entries")
+    if not isinstance(entries, dict) or not isinstance(data.get("written_ns"), int):
+        return None
+    if not all(_is_valid_entry(entry) for entry in entries.values()):
+        return None
+    return data
+
+
+def save_index(base_dir: str, entries: Dict[str, IndexEntry]) -> None:
+    """
+    Persists the workspace index. Failures (e.g. a read-only checkout) are ignored,
+    since the index is only an optimization.
+    """
+    data = {"version": INDEX_VERSION, "written_ns": time.time_ns(), "entries": entries}
+    try:
+        write_atomic(get_index_path(base_dir), json.dumps(data).encode())
+    except OSError:
+        pass
+
+
+def is_fresh(entry: Optional[IndexEntry], stat: os.stat_result) -> bool:
+    """Returns True if the index entry still describes a file with the given stat result."""
+    return entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+
+def is_racy(entry: IndexEntry, written_ns: int) -> bool:
+    """Returns True if the manifest may have changed in the same mtime tick the index was written in."""
+    return entry["mtime_ns"] >= written_ns - RACY_WINDOW_NS
+
+
+def _is_valid_entry(entry: Any) -> bool:
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("mtime_ns"), int)
+        and isinstance(entry.get("size"), int)
+        and (entry.get("project") is None or isinstance(entry.get("project"), dict))
+    )
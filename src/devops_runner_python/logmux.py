@@ -0,0 +1,365 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import selectors
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from colorama import Fore, Style
+
+OUTPUT_STREAM = "stream"
+OUTPUT_GROUPED = "grouped"
+OUTPUT_JSONL = "jsonl"
+OUTPUT_MODES = [OUTPUT_STREAM, OUTPUT_GROUPED, OUTPUT_JSONL]
+
+# Number of output lines kept in memory per task, shown when the task fails
+DEFAULT_TAIL_LINES = 20
+# Output is written to the terminal at most this often (seconds), or once this many bytes are pending
+FLUSH_INTERVAL = 0.02
+FLUSH_SIZE = 256 * 1024
+# Longest line kept in one piece; longer output without a newline (e.g. progress bars) is split
+MAX_LINE_LENGTH = 64 * 1024
+READ_SIZE = 65536
+# How often (seconds) tasks whose pipes are closed are checked for having exited. Their processes
+# are polled rather than waited for, so one that closes its pipes early doesn't stall the others
+EXIT_POLL_INTERVAL = 0.005
+
+LOGS_DIR_NAME = os.path.join(".devops", "logs")
+
+# Prefix colors, assigned to tasks in the order they start
+_COLORS = [Fore.CYAN, Fore.MAGENTA, Fore.GREEN, Fore.YELLOW, Fore.BLUE, Fore.LIGHTCYAN_EX, Fore.LIGHTMAGENTA_EX,
+           Fore.LIGHTGREEN_EX, Fore.LIGHTYELLOW_EX, Fore.LIGHTBLUE_EX]
+
+
+def get_logs_dir(base_dir: str, run_name: str) -> str:
+    """Returns the directory holding the per-task logs of the latest run named run_name (e.g. a script name)."""
+    return os.path.join(base_dir, LOGS_DIR_NAME, re.sub(r"[^\w.-]", "_", run_name))
+
+
+def split_lines(partial: bytes, data: bytes) -> Tuple[List[bytes], bytes]:
+    """
+    Splits output read from a pipe into complete lines, given the unterminated line left over
+    from the previous read. Lines longer than MAX_LINE_LENGTH are cut into pieces.
+
+    Returns:
+        A tuple of the complete lines (without their newline) and the new unterminated rest
+    """
+    lines = (partial + data).split(b"\n")
+    partial = lines.pop()
+    while len(partial) > MAX_LINE_LENGTH:
+        lines.append(partial[:MAX_LINE_LENGTH])
+        partial = partial[MAX_LINE_LENGTH:]
+    return lines, partial
+
+
+class _TaskLog:
+    def __init__(self, name: str, proc: subprocess.Popen, prefix: bytes, tail_lines: int, log_file,
+                 log_path: Optional[str], captured: Optional[List[bytes]], on_exit: Callable[[str], None]):
+        self.name = name
+        self.proc = proc
+        self.prefix = prefix
+        self.tail: Deque[str] = deque(maxlen=tail_lines)
+        self.log_file = log_file
+        self.log_path = log_path
+        self.captured = captured
+        self.on_exit = on_exit
+        self.exited = False
+        self.open_streams = 0
+        self.partial: Dict[int, bytes] = {}
+
+
+class LogMultiplexer:
+    """
+    Copies the output of many child processes to the terminal from a single thread. The
+    stdout and stderr pipes of all tasks are read without blocking as they become ready,
+    and the resulting lines are written in batches (see FLUSH_INTERVAL), so that dozens of
+    noisy tasks neither interleave within lines nor turn every line into a terminal write.
+
+    The output mode decides what reaches the terminal:
+    - stream: every line as it arrives, prefixed with the task name (colored on a terminal)
+    - grouped: the whole output of each task in one block once the task exits
+    - jsonl: one JSON object per line ({"task", "stream", "line", "time"}) and per exit
+
+    Every task keeps its last lines in memory (see tail()), and its full output is written
+    to <log_dir>/<task>.log when a log directory is given.
+
+    Should the multiplexer thread fail, the exception is kept in error, and every task that
+    was or is still added gets its on_exit call right away, so that nobody waits for it forever.
+    """
+
+    def __init__(self, mode: str = OUTPUT_STREAM, log_dir: Optional[str] = None,
+                 tail_lines: int = DEFAULT_TAIL_LINES, out=None):
+        """
+        Args:
+            mode: One of OUTPUT_MODES
+            log_dir: Directory receiving the full output of every task (see get_logs_dir)
+            tail_lines: Number of output lines kept in memory per task
+            out: Binary stream receiving the output (default: sys.stdout)
+        """
+        if mode not in OUTPUT_MODES:
+            raise ValueError(f"Unknown output mode '{mode}', expected one of {', '.join(OUTPUT_MODES)}")
+        self.mode = mode
+        self.log_dir = log_dir
+        self.tail_lines = tail_lines
+        # None writes to whatever sys.stdout is at the time, after flushing its pending text
+        self.out = out
+        self.colors = bool(getattr(out if out is not None else sys.stdout, "isatty", lambda: False)())
+        self._tasks: Dict[str, _TaskLog] = {}
+        self._added: queue.Queue = queue.Queue()
+        self._buffer = bytearray()
+        self._buffer_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        # Set when the multiplexer thread failed; guarded by _tasks_lock along with _tasks
+        self.error: Optional[BaseException] = None
+        self._tasks_lock = threading.Lock()
+        if log_dir is not None:
+            os.makedirs(log_dir, exist_ok=True)
+
+    def add(self, name: str, proc: subprocess.Popen, on_exit: Callable[[str], None],
+            captured: Optional[List[bytes]] = None) -> None:
+        """
+        Starts copying the output of a task's process, started with stdout and stderr pipes.
+        Once both pipes are closed and the process exited, on_exit(name) is called from the
+        multiplexer thread. Raw output lines are appended to captured if given.
+        """
+        color = _COLORS[len(self._tasks) % len(_COLORS)] if self.colors else ""
+        prefix = f"{color}[{name}]{Style.RESET_ALL if color else ''} ".encode()
+        log_path = None
+        if self.log_dir is not None:
+            log_path = os.path.join(self.log_dir, re.sub(r"[^\w.-]", "_", name) + ".log")
+            log_file = open(log_path, "w+b")
+        elif self.mode == OUTPUT_GROUPED:
+            import tempfile
+            log_file = tempfile.TemporaryFile()
+        else:
+            log_file = None
+
+        task = _TaskLog(name, proc, prefix, self.tail_lines, log_file, log_path, captured, on_exit)
+        with self._tasks_lock:
+            self._tasks[name] = task
+            if self.error is not None:
+                self._abandon(task)
+                return
+            self._added.put(task)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="devopspy-logmux", daemon=True)
+            self._thread.start()
+        self._wake()
+
+    def tail(self, name: str) -> List[str]:
+        """Returns the last output lines of a task (see DEFAULT_TAIL_LINES)."""
+        task = self._tasks.get(name)
+        return list(task.tail) if task is not None else []
+
+    def log_path(self, name: str) -> Optional[str]:
+        """Returns the path of the file holding the full output of a task, if logs are kept."""
+        task = self._tasks.get(name)
+        return task.log_path if task is not None else None
+
+    def replay(self, name: str, output: bytes) -> None:
+        """Writes previously captured output of a task (e.g. a cached result) in the current output mode."""
+        lines = output.splitlines()
+        with self._buffer_lock:
+            if self.mode == OUTPUT_STREAM:
+                for line in lines:
+                    self._buffer += self._prefix(name) + line + b"\n"
+            elif self.mode == OUTPUT_GROUPED:
+                self._buffer += self._header(name, "cached") + b"".join(line + b"\n" for line in lines)
+            else:
+                for line in lines:
+                    self._buffer += self._json_line(name, "stdout", line)
+        self.flush()
+
+    def message(self, text: str) -> None:
+        """Writes a message of the scheduler in between task output (to stderr in jsonl mode)."""
+        if self.mode == OUTPUT_JSONL:
+            print(text, file=sys.stderr)
+            return
+        with self._buffer_lock:
+            self._buffer += text.encode() + b"\n"
+        self.flush()
+
+    def flush(self) -> None:
+        """Writes the pending output."""
+        with self._buffer_lock:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self._last_flush = time.monotonic()
+        if not data:
+            return
+        if self.out is not None:
+            self.out.write(data)
+            self.out.flush()
+        elif hasattr(sys.stdout, "buffer"):
+            sys.stdout.flush()
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+        else:
+            sys.stdout.write(data.decode(errors="replace"))
+            sys.stdout.flush()
+
+    def close(self) -> None:
+        """Waits for the output of all added tasks to be copied, then releases the multiplexer's resources."""
+        self._closing = True
+        if self._thread is not None:
+            self._wake()
+            self._thread.join()
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _wake(self) -> None:
+        try:
+            os.write(self._wake_w, b"\0")
+        except BlockingIOError:
+            # The multiplexer has wake-ups pending already
+            pass
+
+    def _run(self) -> None:
+        try:
+            self._copy()
+        except BaseException as e:
+            with self._tasks_lock:
+                self.error = e
+                for task in list(self._tasks.values()):
+                    if not task.exited:
+                        self._abandon(task)
+
+    def _abandon(self, task: _TaskLog) -> None:
+        # Stops copying the output of a task after a failure of the multiplexer thread
+        for pipe in (task.proc.stdout, task.proc.stderr):
+            if pipe is not None:
+                pipe.close()
+        if task.log_file is not None:
+            task.log_file.close()
+        task.exited = True
+        task.on_exit(task.name)
+
+    def _copy(self) -> None:
+        open_tasks = 0
+        # Tasks whose pipes are all closed, waiting for their process to exit
+        exiting: List[_TaskLog] = []
+        while True:
+            timeout = EXIT_POLL_INTERVAL if exiting else FLUSH_INTERVAL if self._buffer else None
+            for key, _ in self._selector.select(timeout):
+                if key.fileobj == self._wake_r:
+                    try:
+                        while os.read(self._wake_r, 4096):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    while not self._added.empty():
+                        task = self._added.get()
+                        open_tasks += 1
+                        for stream_name, pipe in (("stdout", task.proc.stdout), ("stderr", task.proc.stderr)):
+                            if pipe is not None:
+                                os.set_blocking(pipe.fileno(), False)
+                                self._selector.register(pipe, selectors.EVENT_READ, (task, stream_name))
+                                task.open_streams += 1
+                        if task.open_streams == 0:
+                            exiting.append(task)
+                else:
+                    task, stream_name = key.data
+                    if self._read(key.fileobj, task, stream_name):
+                        exiting.append(task)
+
+            for task in [task for task in exiting if task.proc.poll() is not None]:
+                exiting.remove(task)
+                self._finish(task)
+                open_tasks -= 1
+            if len(self._buffer) >= FLUSH_SIZE or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+                self.flush()
+            if self._closing and open_tasks == 0 and self._added.empty():
+                return
+
+    def _read(self, pipe, task: _TaskLog, stream_name: str) -> bool:
+        """Copies the available output of a pipe. Returns True once all the pipes of the task are closed."""
+        fd = pipe.fileno()
+        try:
+            data = os.read(fd, READ_SIZE)
+        except BlockingIOError:
+            return False
+        except OSError:
+            data = b""
+
+        if data:
+            lines, partial = split_lines(task.partial.pop(fd, b""), data)
+            if partial:
+                task.partial[fd] = partial
+            for line in lines:
+                self._emit(task, stream_name, line)
+            return False
+
+        # End of file: the last line may lack its newline
+        self._selector.unregister(pipe)
+        pipe.close()
+        partial = task.partial.pop(fd, b"")
+        if partial:
+            self._emit(task, stream_name, partial)
+        task.open_streams -= 1
+        return task.open_streams == 0
+
+    def _emit(self, task: _TaskLog, stream_name: str, line: bytes) -> None:
+        line = line.rstrip(b"\r")
+        task.tail.append(line.decode(errors="replace"))
+        if task.log_file is not None:
+            task.log_file.write(line + b"\n")
+        if task.captured is not None:
+            task.captured.append(line + b"\n")
+        if self.mode == OUTPUT_STREAM:
+            with self._buffer_lock:
+                self._buffer += task.prefix + line + b"\n"
+        elif self.mode == OUTPUT_JSONL:
+            with self._buffer_lock:
+                self._buffer += self._json_line(task.name, stream_name, line)
+
+    def _finish(self, task: _TaskLog) -> None:
+        exit_code = task.proc.returncode
+        try:
+            if task.log_file is not None:
+                if self.mode == OUTPUT_GROUPED:
+                    task.log_file.seek(0)
+                    with self._buffer_lock:
+                        self._buffer += self._header(task.name, f"exit code {exit_code}")
+                        self._buffer += task.log_file.read()
+                task.log_file.close()
+            if self.mode == OUTPUT_JSONL:
+                event = {"task": task.name, "event": "exit", "exit_code": exit_code, "time": time.time()}
+                with self._buffer_lock:
+                    self._buffer += json.dumps(event).encode() + b"\n"
+            self.flush()
+        finally:
+            # The scheduler waits for this, whatever happened to the output
+            task.exited = True
+            task.on_exit(task.name)
+
+    def _prefix(self, name: str) -> bytes:
+        task = self._tasks.get(name)
+        return task.prefix if task is not None else f"[{name}] ".encode()
+
+    def _header(self, name: str, status: str) -> bytes:
+        color = Fore.BLUE if self.colors else ""
+        return f"{color}==> {name} ({status}) <=={Style.RESET_ALL if color else ''}\n".encode()
+
+    @staticmethod
+    def _json_line(name: str, stream_name: str, line: bytes) -> bytes:
+        event = {"task": name, "stream": stream_name, "line": line.decode(errors="replace"), "time": time.time()}
+        return json.dumps(event).encode() + b"\n"
@@ -1,8 +1,8 @@
 import os
-from typing import Any
+from typing import Any, Dict, Iterable
 import tomli
 from pydantic import BaseModel
-from .discovery import get_port_for_service_name
+from .services import get_service_index
 
 class PyprojectData(BaseModel):
     data: dict[str, Any]
@@ -28,11 +28,24 @@ def get_service_endpoint(service_name: str) -> str:
     - If running inside Kubernetes (IS_KUBERNETES == "true"), returns http://{service_name}
     - Otherwise, uses local port discovery and returns http://127.0.0.1:{port}
     """
+    return get_service_endpoints([service_name])[service_name]
+
+
+def get_service_endpoints(service_names: Iterable[str]) -> Dict[str, str]:
+    """
+    Resolves the HTTP endpoints of several services at once, like get_service_endpoint.
+
+    Raises:
+        RuntimeError: If the port of any of the services is not found
+        ServiceConfigError: If the deployment configuration of any of the services is invalid
+    """
+    service_names = list(service_names)
     if os.environ.get("IS_KUBERNETES", "").lower() == "true":
-        return f"http://{service_name}"
+        return {service_name: f"http://{service_name}" for service_name in service_names}
 
-    service_port = get_port_for_service_name(service_name)
-    if not service_port:
-        raise RuntimeError(f"Port not found for service {service_name}")
-    return f"http://127.0.0.1:{service_port}"
-    
\ No newline at end of file
+    index = get_service_index()
+    ports = {service_name: index.get_port(service_name) for service_name in service_names}
+    missing = [service_name for service_name, port in ports.items() if port is None]
+    if missing:
+        raise RuntimeError(f"Port not found for service {', '.join(missing)}")
+    return {service_name: f"http://127.0.0.1:{ports[service_name]}" for service_name in service_names}
@@ -0,0 +1,308 @@
+import os
+import sys
+import queue
+import signal
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+from colorama import Fore, Style
+from . import tracing
+from .logmux import LogMultiplexer
+
+# Seconds a task gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE_PERIOD = 5
+
+# Seconds between two checks of the cancel event of run_tasks
+CANCEL_POLL_INTERVAL = 0.1
+
+
+class Task(BaseModel):
+    name: str
+    cmd: List[str]
+    cwd: str
+    # Names of the tasks that must succeed before this task starts
+    deps: List[str] = []
+    # Whether to keep the task's output in its result
+    capture: bool = False
+    # Environment of the task's process (default: inherited from this process)
+    env: Optional[Dict[str, str]] = None
+    # Resources the task occupies while running (see run_tasks)
+    cpu: float = 1.0
+    mem: int = 0
+    exclusive: bool = False
+
+
+class TaskResult(BaseModel):
+    name: str
+    exit_code: Optional[int]
+    duration: float
+    output: Optional[bytes] = None
+    # Last lines of the task's output, and the file holding all of it if logs are kept (see LogMultiplexer)
+    tail: List[str] = []
+    log_path: Optional[str] = None
+
+
+def default_jobs() -> int:
+    """Returns the default concurrency limit: one task per CPU core."""
+    return os.cpu_count() or 1
+
+
+def available_memory() -> Optional[int]:
+    """
+    Returns the memory available to new processes in bytes (MemAvailable on Linux, free
+    physical pages elsewhere), or None if it cannot be determined.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+class TaskQueue:
+    """
+    The scheduling decisions of run_tasks, shared with the asynchronous API (see api.py): which
+    pending task is ready next, whether it is skipped because a dependency did not succeed,
+    and when the remaining tasks can never start. Callers start the tasks next_ready returns
+    and report every task's result through finish.
+    """
+
+    def __init__(self, tasks: List[Task], jobs: Optional[int] = None, memory: Optional[int] = None):
+        """
+        Args:
+            tasks: The tasks to schedule, in order of preference; deps naming other tasks are ignored
+            jobs: Maximum number of tasks, and of CPU cores, in use at once (default: number of CPU cores)
+            memory: Memory budget in bytes (default: the memory available now, if any task has a mem weight)
+        """
+        self.jobs = max(1, jobs or default_jobs())
+        if memory is None and any(task.mem for task in tasks):
+            memory = available_memory()
+        self.memory = memory
+        names = {task.name for task in tasks}
+        self.pending = [task.model_copy(update={"deps": [dep for dep in task.deps if dep in names]}) for task in tasks]
+        self.running: Dict[str, Task] = {}
+        self.results: Dict[str, TaskResult] = {}
+
+    def next_ready(self) -> Optional[Task]:
+        """
+        Removes and returns the first pending task whose deps all finished and that either fits
+        the budgets next to the running tasks, or is to be skipped (see failed_deps), whatever
+        its weights. Returns None if no pending task is ready.
+        """
+        for i, task in enumerate(self.pending):
+            if (all(dep in self.results for dep in task.deps)
+                    and (self.failed_deps(task) or _fits(task, list(self.running.values()), self.jobs, self.memory))):
+                return self.pending.pop(i)
+        return None
+
+    def failed_deps(self, task: Task) -> List[str]:
+        """Returns the deps of a task that did not succeed, in which case the task is to be skipped."""
+        return [dep for dep in task.deps if dep in self.results and self.results[dep].exit_code != 0]
+
+    def start(self, task: Task) -> None:
+        """Records that a task returned by next_ready is running."""
+        self.running[task.name] = task
+
+    def finish(self, result: TaskResult) -> None:
+        """Records the result of a task, whether it ran, failed to start or was skipped."""
+        self.running.pop(result.name, None)
+        self.results[result.name] = result
+
+    def halt(self) -> List[Task]:
+        """Removes and returns the pending tasks, which are not to be started anymore."""
+        halted, self.pending = self.pending, []
+        return halted
+
+    def check_stalled(self) -> None:
+        """
+        Raises:
+            ValueError: If nothing runs and pending tasks wait for tasks that will never finish
+        """
+        if not self.running and self.pending and not any(
+            all(dep in self.results for dep in task.deps) for task in self.pending
+        ):
+            raise ValueError(f"Tasks with unsatisfiable dependencies: {', '.join(task.name for task in self.pending)}")
+
+
+def run_tasks(tasks: List[Task], jobs: Optional[int] = None, kill_others_on_fail: bool = False,
+              cancel: Optional[threading.Event] = None, mux: Optional[LogMultiplexer] = None,
+              memory: Optional[int] = None) -> Dict[str, TaskResult]:
+    """
+    Runs tasks as child processes, copying their output through a LogMultiplexer (by default,
+    every line prefixed with the task name). A task starts once all of its deps have succeeded,
+    and is skipped if one of them fails or is skipped; deps naming tasks outside of `tasks`
+    are ignored.
+
+    Ready tasks are packed against resource budgets: at most `jobs` tasks run at once, the cpu
+    weights of the running tasks add up to at most `jobs`, and their mem weights to at most
+    `memory`. An exclusive task only runs alone, and a task exceeding a budget on its own
+    runs once nothing else does. A ready task that doesn't fit is passed by smaller ones.
+
+    Args:
+        tasks: The tasks to run, started in order as soon as they are ready
+        jobs: Maximum number of tasks, and of CPU cores, in use at once (default: number of CPU cores)
+        kill_others_on_fail: Whether to terminate running tasks and skip pending ones once a task fails
+        cancel: An event that, once set, terminates the running tasks and skips the pending ones
+        mux: The multiplexer receiving the output of the tasks (default: a stream mode one, closed on return)
+        memory: Memory budget in bytes (default: the memory available when the run starts)
+
+    Returns:
+        A dictionary mapping task names to their results. Tasks that never started have an exit code of None.
+
+    Raises:
+        RuntimeError: If the multiplexer failed to copy the output, after terminating the running tasks
+    """
+    schedule = TaskQueue(tasks, jobs, memory)
+    running: Dict[str, subprocess.Popen] = {}
+    started_at: Dict[str, float] = {}
+    # Trace lanes: every running task occupies the lowest free lane
+    lanes: Dict[str, int] = {}
+    captured: Dict[str, List[bytes]] = {}
+    finished: queue.Queue = queue.Queue()
+    owns_mux = mux is None
+    if owns_mux:
+        mux = LogMultiplexer()
+    halted = False
+
+    try:
+        while schedule.pending or running:
+            if cancel is not None and cancel.is_set() and not halted:
+                halted = True
+                _terminate(running.values())
+            while not halted and (task := schedule.next_ready()) is not None:
+                failed_deps = schedule.failed_deps(task)
+                if failed_deps:
+                    mux.message(f"{Fore.RED}[{task.name}] skipped: dependency {', '.join(failed_deps)} did not succeed{Style.RESET_ALL}")
+                    schedule.finish(TaskResult(name=task.name, exit_code=None, duration=0.0))
+                    continue
+                started_at[task.name] = time.monotonic()
+                lanes[task.name] = min(set(range(1, len(lanes) + 2)) - set(lanes.values()))
+                try:
+                    if task.capture:
+                        captured[task.name] = []
+                    proc = _start(task, mux, finished, captured.get(task.name))
+                except OSError as e:
+                    mux.message(f"{Fore.RED}[{task.name}] Error starting {' '.join(task.cmd)}: {e}{Style.RESET_ALL}")
+                    schedule.finish(TaskResult(name=task.name, exit_code=127, duration=0.0))
+                    lanes.pop(task.name)
+                    if kill_others_on_fail:
+                        halted = True
+                    continue
+                running[task.name] = proc
+                schedule.start(task)
+
+            if halted:
+                for task in schedule.halt():
+                    schedule.finish(TaskResult(name=task.name, exit_code=None, duration=0.0))
+            if not running:
+                schedule.check_stalled()
+                continue
+
+            try:
+                name = finished.get(timeout=CANCEL_POLL_INTERVAL if cancel is not None else None)
+            except queue.Empty:
+                continue
+            if mux.error is not None:
+                # The output of the tasks can no longer be copied
+                _terminate(running.values())
+                raise RuntimeError(f"Copying the output of the tasks failed: {mux.error!r}") from mux.error
+            exit_code = running.pop(name).wait()
+            duration = time.monotonic() - started_at[name]
+            lane = lanes.pop(name)
+            if tracing.is_enabled():
+                tracing.name_lane(lane, f"task slot {lane}")
+                tracing.add_span(name, tracing.now_us() - duration * 1e6, duration * 1e6, lane=lane,
+                                 category="task", exit_code=exit_code)
+            output = b"".join(captured.pop(name)) if name in captured else None
+            schedule.finish(TaskResult(name=name, exit_code=exit_code, duration=duration, output=output,
+                                       tail=mux.tail(name), log_path=mux.log_path(name)))
+
+            if exit_code != 0 and kill_others_on_fail and not halted:
+                halted = True
+                mux.message(f"{Fore.RED}[{name}] failed with exit code {exit_code}, terminating other tasks{Style.RESET_ALL}")
+                _terminate(running.values())
+    except KeyboardInterrupt:
+        _terminate(running.values())
+        raise
+    finally:
+        if owns_mux:
+            mux.close()
+
+    return schedule.results
+
+
+def _fits(task: Task, running: List[Task], jobs: int, memory: Optional[int]) -> bool:
+    """Returns whether task can start next to the running tasks within the budgets (see run_tasks)."""
+    if not running:
+        return True
+    if len(running) >= jobs or task.exclusive or any(other.exclusive for other in running):
+        return False
+    if sum(other.cpu for other in running) + task.cpu > jobs:
+        return False
+    return memory is None or sum(other.mem for other in running) + task.mem <= memory
+
+
+def _start(task: Task, mux: LogMultiplexer, finished: queue.Queue,
+           captured: Optional[List[bytes]]) -> subprocess.Popen:
+    # Each task gets its own process group so that terminating it also stops the
+    # processes it spawned (uv run forks the actual script).
+    proc = subprocess.Popen(
+        task.cmd,
+        cwd=task.cwd,
+        env=task.env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    mux.add(task.name, proc, finished.put, captured)
+    return proc
+
+
+def run_captured(cmd: List[str], cwd: str, env: Optional[Dict[str, str]] = None) -> tuple[int, bytes]:
+    """
+    Runs a command, copying its combined stdout and stderr to stdout while also capturing it.
+    The command inherits the environment of this process unless env is given.
+
+    Returns:
+        A tuple of the exit code and the captured output
+    """
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    chunks = []
+    try:
+        for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+            chunks.append(chunk)
+            sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+    finally:
+        proc.stdout.close()
+    return proc.wait(), b"".join(chunks)
+
+
+def _terminate(procs) -> None:
+    """Sends SIGTERM to the process groups of procs, escalating to SIGKILL after the grace period."""
+    procs = [proc for proc in procs if proc.poll() is None]
+    for proc in procs:
+        signal_group(proc, signal.SIGTERM)
+    deadline = time.monotonic() + TERMINATE_GRACE_PERIOD
+    for proc in procs:
+        try:
+            proc.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            signal_group(proc, signal.SIGKILL)
+
+
+def signal_group(proc, sig: int) -> None:
+    """Sends a signal to the process group of a task's process (see _start), ignoring exited groups."""
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
@@ -0,0 +1,133 @@
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel
+from .index import read_index, is_fresh, is_racy
+from .workspace import get_monorepo_root
+
+
+class ServiceConfigError(ValueError):
+    """Raised when the deployment configuration of a looked up service conflicts with another or is invalid."""
+
+
+class ServiceIndex(BaseModel):
+    # Port of every service declaring one without conflicts
+    ports: Dict[str, int] = {}
+    # Configuration problems of the misconfigured services, raised when one of them is looked up
+    errors: Dict[str, List[str]] = {}
+
+    def get_port(self, service_name: str) -> Optional[int]:
+        """
+        Returns the port of the given service, or None if no project declares it.
+
+        Raises:
+            ServiceConfigError: If the service's port is invalid, or conflicts with another declaration
+        """
+        if service_name in self.errors:
+            raise ServiceConfigError("\n".join(self.errors[service_name]))
+        return self.ports.get(service_name)
+
+
+# Memoized service index of the monorepo, built on first lookup
+_service_index: Optional[ServiceIndex] = None
+
+
+def build_service_index(deployments: Iterable[Tuple[str, Dict[str, Any]]]) -> ServiceIndex:
+    """
+    Builds the service index from the deployment configurations of the projects. A service
+    whose port is not an integer, that is declared by two projects, or that shares its port
+    with another service, is recorded with its errors instead of its port, so that looking
+    it up fails while the other services resolve.
+
+    Args:
+        deployments: (project name, [tool.devops.deployment] table) pairs
+    """
+    index = ServiceIndex()
+    owners: Dict[str, str] = {}
+    # port -> (project name, service name) of its first declaration
+    port_owners: Dict[int, Tuple[str, str]] = {}
+
+    def add_error(service_names: Iterable[str], error: str) -> None:
+        for service_name in service_names:
+            index.errors.setdefault(service_name, []).append(error)
+
+    for project_name, deployment in deployments:
+        service_name = deployment.get("service_name")
+        port = deployment.get("port")
+        if service_name is None or port is None:
+            continue
+        try:
+            port = int(port)
+        except (TypeError, ValueError):
+            add_error([service_name], f"Invalid port value for service {service_name}: {port}")
+            continue
+        if service_name in owners:
+            add_error([service_name], f"Service {service_name} is declared by both {owners[service_name]} and "
+                                      f"{project_name}")
+            continue
+        owners[service_name] = project_name
+        if port in port_owners:
+            other_project, other_service = port_owners[port]
+            add_error(dict.fromkeys([other_service, service_name]),
+                      f"Port {port} is used by both {other_project} and {project_name}")
+            continue
+        port_owners[port] = (project_name, service_name)
+        index.ports[service_name] = port
+
+    for service_name in index.errors:
+        index.ports.pop(service_name, None)
+    return index
+
+
+def load_service_index(base_dir: str) -> ServiceIndex:
+    """
+    Builds the service index of the monorepo from the persistent workspace index, without
+    walking the repo. Manifests changed since the index was written are re-read; projects
+    added since then are only picked up by the next devopspy command that refreshes the index.
+
+    Falls back to a (silent) workspace discovery if there is no index yet.
+    """
+    from .discovery import discover_projects, parse_manifest
+
+    data = read_index(base_dir)
+    if data is None:
+        projects = discover_projects(base_dir)
+        return build_service_index((project.name, project.deployment) for project in projects.values())
+
+    deployments = []
+    for rel_path, entry in data["entries"].items():
+        pyproject_path = os.path.join(base_dir, rel_path)
+        try:
+            stat = os.stat(pyproject_path)
+        except OSError:
+            # The project was removed
+            continue
+        manifest = entry["project"]
+        if not is_fresh(entry, stat) or is_racy(entry, data["written_ns"]):
+            try:
+                manifest = parse_manifest(pyproject_path)
+            except Exception:
+                continue
+        if manifest is not None:
+            deployments.append((manifest["name"], manifest["deployment"]))
+    return build_service_index(deployments)
+
+
+def get_service_index() -> ServiceIndex:
+    """
+    Returns the memoized service index of the monorepo. Within a devopspy command
+    it is built from the discovered projects, elsewhere from the persistent workspace index.
+    """
+    global _service_index
+    if _service_index is None:
+        from . import discovery
+        if discovery._projects is not None:
+            projects = discovery._projects.values()
+            _service_index = build_service_index((project.name, project.deployment) for project in projects)
+        else:
+            _service_index = load_service_index(get_monorepo_root())
+    return _service_index
+
+
+def get_service_port(service_name: str) -> int | None:
+    """Returns the port of the given service, or None if no project declares it (see ServiceIndex.get_port)."""
+    return get_service_index().get_port(service_name)
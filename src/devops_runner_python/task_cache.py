@@ -0,0 +1,239 @@
+import os
+import glob
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from typing import Dict, List, Mapping, Optional
+from pydantic import BaseModel
+from .cache import get_cache_dir, parse_size
+from .discovery import Project
+from .workspace import get_devops_config, get_ignore_patterns, get_monorepo_root, walk_files
+from .graph import with_dependencies
+
+TASKS_DIR_NAME = "tasks"
+DEFAULT_MAX_SIZE = "1G"
+
+# Bump to invalidate all existing cache entries when the key derivation changes
+CACHE_KEY_VERSION = "2"
+
+META_FILE_NAME = "meta.json"
+OUTPUT_FILE_NAME = "output.log"
+OUTPUTS_DIR_NAME = "outputs"
+
+
+class CachedResult(BaseModel):
+    key: str
+    exit_code: int
+    output: bytes
+
+
+def get_tasks_cache_dir(base_dir: str) -> str:
+    """Returns the directory holding the cached task results of the monorepo rooted at base_dir."""
+    return os.path.join(get_cache_dir(base_dir), TASKS_DIR_NAME)
+
+
+def is_cacheable(project: Project, script_name: str) -> bool:
+    """Returns True if the script opted into result caching in its [tool.devops.scripts] entry."""
+    config = project.script_config.get(script_name)
+    return config is not None and config.cache
+
+
+def get_max_size(base_dir: str) -> int:
+    """
+    Returns the maximum size of the task cache in bytes, taken from the DEVOPS_CACHE_MAX_SIZE
+    environment variable or [tool.devops.cache] max_size (default: 1G).
+    """
+    max_size = os.getenv("DEVOPS_CACHE_MAX_SIZE", get_devops_config(base_dir).get("cache", {}).get("max_size"))
+    return parse_size(max_size if max_size is not None else DEFAULT_MAX_SIZE)
+
+
+def hash_project_sources(project: Project, ignore: List[str], exclude: Optional[set] = None) -> str:
+    """
+    Hashes the relative paths and contents of all files in a project directory, skipping
+    ignored directories and the files in exclude (paths relative to the project directory).
+    """
+    digest = hashlib.sha256()
+    for path in walk_files(project.path, ignore):
+        rel_path = os.path.relpath(path, project.path)
+        if exclude and rel_path in exclude:
+            continue
+        digest.update(rel_path.encode() + b"\0")
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            # Unreadable files (e.g. dangling symlinks) only contribute their path
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def find_outputs(project: Project, patterns: List[str]) -> List[str]:
+    """Returns the files, relative to the project directory, matched by the script's output patterns."""
+    outputs = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern, root_dir=project.path, recursive=True):
+            full_path = os.path.join(project.path, match)
+            if os.path.isdir(full_path):
+                outputs.update(os.path.relpath(path, project.path) for path in walk_files(full_path, []))
+            elif os.path.isfile(full_path):
+                outputs.add(os.path.normpath(match))
+    return sorted(outputs)
+
+
+def compute_cache_key(
+    projects: Dict[str, Project],
+    project: Project,
+    script_name: str,
+    script_args: List[str],
+    environ: Mapping[str, str] = os.environ
+) -> str:
+    """
+    Computes the cache key of running a script: a hash of the script command and arguments,
+    the sources of the project and of its workspace dependencies, the project and root
+    lockfiles, and the values of the environment variables the script depends on (those
+    listed in the project's env.yaml and in the script's `env` setting).
+    """
+    from .env_validation import parse_env_yaml
+
+    base_dir = get_monorepo_root()
+    ignore = get_ignore_patterns(get_devops_config(base_dir).get("discovery", {}))
+    config = project.script_config[script_name]
+    digest = hashlib.sha256()
+
+    def add(label: str, value: str) -> None:
+        digest.update(f"{label}\0{value}\0".encode())
+
+    add("version", CACHE_KEY_VERSION)
+    add("project", project.name)
+    add("cmd", config.cmd)
+    add("args", json.dumps(script_args))
+
+    add("sources", hash_project_sources(project, ignore, set(find_outputs(project, config.outputs))))
+    for dependency in sorted(with_dependencies(projects, [project.name]) - {project.name}):
+        add(f"dependency:{dependency}", hash_project_sources(projects[dependency], ignore))
+
+    # Lockfiles are labelled by their path relative to the monorepo root, so keys match across checkouts
+    for lockfile in [os.path.join(project.path, "uv.lock"), os.path.join(base_dir, "uv.lock")]:
+        try:
+            with open(lockfile, "rb") as f:
+                add(f"lockfile:{os.path.relpath(lockfile, base_dir)}", hashlib.sha256(f.read()).hexdigest())
+        except OSError:
+            pass
+
+    env_keys = set(config.env)
+    env_yaml_path = os.path.join(project.path, "env.yaml")
+    if os.path.exists(env_yaml_path):
+        env_keys.update(parse_env_yaml(env_yaml_path) or {})
+    for key in sorted(env_keys):
+        add(f"env:{key}", environ.get(key, "\0unset"))
+
+    return digest.hexdigest()
+
+
+def lookup(base_dir: str, key: str) -> Optional[CachedResult]:
+    """Returns the cached result stored under key, or None. A hit marks the entry as recently used."""
+    entry_dir = os.path.join(get_tasks_cache_dir(base_dir), key)
+    meta_path = os.path.join(entry_dir, META_FILE_NAME)
+    try:
+        with open(meta_path, "rb") as f:
+            meta = json.load(f)
+        with open(os.path.join(entry_dir, OUTPUT_FILE_NAME), "rb") as f:
+            output = f.read()
+        # The mtime of the meta file tracks the last use, for LRU eviction
+        os.utime(meta_path)
+        return CachedResult(key=key, exit_code=meta["exit_code"], output=output)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def store(base_dir: str, key: str, project: Project, script_name: str, exit_code: int, output: bytes) -> None:
+    """
+    Stores a task result under key, together with copies of the script's declared outputs,
+    then evicts the least recently used entries beyond the maximum cache size. Failures to
+    write are ignored, since the cache is only an optimization.
+    """
+    tasks_dir = get_tasks_cache_dir(base_dir)
+    try:
+        os.makedirs(tasks_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=tasks_dir, prefix=".tmp-")
+    except OSError:
+        return
+
+    try:
+        with open(os.path.join(tmp_dir, OUTPUT_FILE_NAME), "wb") as f:
+            f.write(output)
+        for rel_path in find_outputs(project, project.script_config[script_name].outputs):
+            target = os.path.join(tmp_dir, OUTPUTS_DIR_NAME, rel_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(project.path, rel_path), target)
+        meta = {"exit_code": exit_code, "project": project.name, "script": script_name, "created": time.time()}
+        with open(os.path.join(tmp_dir, META_FILE_NAME), "w") as f:
+            json.dump(meta, f)
+        os.rename(tmp_dir, os.path.join(tasks_dir, key))
+    except OSError:
+        # Another process stored the same key first, or the cache is not writable
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    evict(base_dir, get_max_size(base_dir))
+
+
+def restore_outputs(base_dir: str, key: str, project: Project) -> int:
+    """
+    Copies the outputs stored with a cache entry back into the project directory.
+
+    Returns:
+        The number of files restored
+    """
+    outputs_dir = os.path.join(get_tasks_cache_dir(base_dir), key, OUTPUTS_DIR_NAME)
+    restored = 0
+    for path in walk_files(outputs_dir, []):
+        target = os.path.join(project.path, os.path.relpath(path, outputs_dir))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(path, target)
+        restored += 1
+    return restored
+
+
+def evict(base_dir: str, max_size: int) -> int:
+    """
+    Removes the least recently used cache entries until the cache fits in max_size bytes.
+
+    Returns:
+        The number of entries removed
+    """
+    tasks_dir = get_tasks_cache_dir(base_dir)
+    entries = []
+    total_size = 0
+    try:
+        with os.scandir(tasks_dir) as it:
+            entry_dirs = [entry.path for entry in it if entry.is_dir() and not entry.name.startswith(".tmp-")]
+    except OSError:
+        return 0
+
+    for entry_dir in entry_dirs:
+        try:
+            last_used = os.stat(os.path.join(entry_dir, META_FILE_NAME)).st_mtime
+        except OSError:
+            last_used = 0
+        size = sum(os.path.getsize(path) for path in walk_files(entry_dir, []))
+        entries.append((last_used, size, entry_dir))
+        total_size += size
+
+    removed = 0
+    for _last_used, size, entry_dir in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total_size -= size
+        removed += 1
+    return removed
+
+
+def clean(base_dir: str) -> None:
+    """Removes all cached task results."""
+    shutil.rmtree(get_tasks_cache_dir(base_dir), ignore_errors=True)
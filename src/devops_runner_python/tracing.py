@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# Recorded trace events in Chrome trace-event format, or None while tracing is disabled
+_events: Optional[List[Dict[str, Any]]] = None
+_lock = threading.Lock()
+_lane_names: Dict[int, str] = {}
+
+
+def enable() -> None:
+    """Starts recording spans. Until then, span() and add_span() are no-ops."""
+    global _events
+    _events = []
+
+
+def is_enabled() -> bool:
+    return _events is not None
+
+
+def now_us() -> float:
+    return time.perf_counter_ns() / 1000
+
+
+def add_span(name: str, start_us: float, duration_us: float, lane: Optional[int] = None,
+             category: str = "devopspy", **args: Any) -> None:
+    """
+    Records a complete span. Spans of the same lane are drawn on one row of the trace
+    viewer; by default that is the row of the current thread.
+    """
+    if _events is None:
+        return
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start_us,
+        "dur": duration_us,
+        "pid": os.getpid(),
+        "tid": threading.get_ident() if lane is None else lane,
+    }
+    if args:
+        event["args"] = args
+    with _lock:
+        _events.append(event)
+
+
+def name_lane(lane: int, name: str) -> None:
+    """Sets the name the trace viewer shows for a lane."""
+    _lane_names[lane] = name
+
+
+@contextmanager
+def span(name: str, category: str = "devopspy", **args: Any) -> Iterator[None]:
+    """Records the duration of the enclosed block as a span of the current thread."""
+    if _events is None:
+        yield
+        return
+    start = now_us()
+    try:
+        yield
+    finally:
+        add_span(name, start, now_us() - start, category=category, **args)
+
+
+def write_trace(path: str) -> None:
+    """Writes the recorded spans as a Chrome trace (loadable in chrome://tracing or Perfetto)."""
+    metadata = [
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": lane, "args": {"name": name}}
+        for lane, name in _lane_names.items()
+    ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": metadata + (_events or []), "displayTimeUnit": "ms"}, f)
+
+
+def summarize(top: int = 10) -> List[str]:
+    """
+    Returns a short timing summary of the recorded spans: the total time per phase, and
+    the slowest spans of the 'task' category (the children of run-many and uv).
+    """
+    if not _events:
+        return []
+
+    phases: Dict[str, List[float]] = {}
+    tasks = []
+    for event in _events:
+        if event["cat"] == "task":
+            tasks.append(event)
+        else:
+            phases.setdefault(event["name"], []).append(event["dur"])
+
+    lines = ["Timing summary:"]
+    for name, durations in sorted(phases.items(), key=lambda item: -sum(item[1]))[:top]:
+        count = f" ({len(durations)}x)" if len(durations) > 1 else ""
+        lines.append(f"  {sum(durations) / 1000:9.1f} ms  {name}{count}")
+    if tasks:
+        wall = (max(t["ts"] + t["dur"] for t in tasks) - min(t["ts"] for t in tasks)) / 1000
+        busy = sum(t["dur"] for t in tasks) / 1000
+        lines.append(f"  {len(tasks)} tasks: {wall:.1f} ms wall, {busy:.1f} ms total, slowest:")
+        for task in sorted(tasks, key=lambda t: -t["dur"])[:top]:
+            lines.append(f"  {task['dur'] / 1000:9.1f} ms  {task['name']}")
+    return lines
@@ -0,0 +1,188 @@
+import os
+import json
+import glob
+import shutil
+import hashlib
+import contextlib
+from typing import Dict, Iterator, List, Optional
+from .cache import write_atomic
+from .discovery import Project
+from .workspace import get_devops_config, get_monorepo_root
+
+STAMP_FILE_NAME = ".devops-sync.json"
+STAMP_LOCK_FILE_NAME = ".devops-sync.lock"
+# Bump to invalidate all existing stamps when the fingerprint derivation or stamp format changes
+STAMP_VERSION = 2
+
+# Flags of `uv sync` that leave the environment as `uv run` would sync it
+SAFE_SYNC_FLAGS = {"--frozen", "--locked", "--offline", "--quiet", "-q", "--verbose", "-v", "--no-progress"}
+
+
+def get_environment_root(project: Project) -> str:
+    """
+    Returns the directory uv keeps the lockfile and environment of a project in: the project
+    directory, or the root of the uv workspace it belongs to (the closest directory up to
+    the monorepo root holding a uv.lock).
+    """
+    root = os.path.realpath(get_monorepo_root())
+    directory = os.path.realpath(project.path)
+    while not os.path.exists(os.path.join(directory, "uv.lock")):
+        if directory == root or directory == os.path.dirname(directory):
+            return project.path
+        directory = os.path.dirname(directory)
+    return directory
+
+
+def get_venv_path(project: Project) -> str:
+    """Returns the path of the virtual environment uv uses for a project."""
+    return os.path.join(get_environment_root(project), os.getenv("UV_PROJECT_ENVIRONMENT", ".venv"))
+
+
+def get_bin_dir(venv: str) -> str:
+    return os.path.join(venv, "Scripts" if os.name == "nt" else "bin")
+
+
+def get_site_packages(venv: str) -> List[str]:
+    """Returns the site-packages directories of a virtual environment."""
+    if os.name == "nt":
+        return [os.path.join(venv, "Lib", "site-packages")]
+    return sorted(glob.glob(os.path.join(venv, "lib", "python*", "site-packages")))
+
+
+def compute_environment_digest(venv: str) -> str:
+    """
+    Hashes the distributions installed in a virtual environment (the names of their
+    .dist-info directories, which include their versions), so that a sync that changed
+    the environment can be told from one that left it as it was.
+    """
+    digest = hashlib.sha256()
+    for site_packages in get_site_packages(venv):
+        try:
+            names = sorted(name for name in os.listdir(site_packages) if name.endswith(".dist-info"))
+        except OSError:
+            continue
+        digest.update(site_packages.encode() + b"\0" + "\0".join(names).encode() + b"\0")
+    return digest.hexdigest()
+
+
+def compute_fingerprint(project: Project) -> str:
+    """
+    Fingerprints what a sync of the project depends on: the contents of its pyproject.toml,
+    of the workspace root's pyproject.toml and uv.lock, of its .python-version pin, and the
+    interpreter of its virtual environment (pyvenv.cfg).
+    """
+    env_root = get_environment_root(project)
+    paths = [
+        os.path.join(project.path, "pyproject.toml"),
+        os.path.join(env_root, "pyproject.toml"),
+        os.path.join(env_root, "uv.lock"),
+        os.path.join(project.path, ".python-version"),
+        os.path.join(env_root, ".python-version"),
+        os.path.join(get_venv_path(project), "pyvenv.cfg"),
+    ]
+    digest = hashlib.sha256(f"{STAMP_VERSION}\0{os.getenv('UV_PYTHON', '')}\0".encode())
+    for path in paths:
+        digest.update(path.encode() + b"\0")
+        try:
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b"missing")
+    return digest.hexdigest()
+
+
+def write_stamp(project: Project) -> None:
+    """
+    Records that the project's environment was just synced. The stamp lives in the virtual
+    environment, so it disappears with it. Projects of a uv workspace share one environment,
+    whose stamp maps each synced project to its fingerprint and to the installed distributions
+    (see compute_environment_digest): syncing another member of the workspace only keeps the
+    earlier projects synced if it left the installed distributions as they were, since `uv sync`
+    removes the packages the synced member doesn't need.
+    """
+    venv = get_venv_path(project)
+    if not os.path.isdir(venv):
+        return
+    with _locked_stamp(venv):
+        environment = compute_environment_digest(venv)
+        stamps = {path: stamp for path, stamp in _read_stamps(venv).items() if stamp.get("environment") == environment}
+        stamps[os.path.realpath(project.path)] = {"fingerprint": compute_fingerprint(project), "environment": environment}
+        data = {"version": STAMP_VERSION, "projects": stamps}
+        write_atomic(os.path.join(venv, STAMP_FILE_NAME), json.dumps(data).encode())
+
+
+def is_synced(project: Project) -> bool:
+    """Returns whether the project's environment exists and was synced with its current fingerprint."""
+    venv = get_venv_path(project)
+    stamp = _read_stamps(venv).get(os.path.realpath(project.path))
+    return (isinstance(stamp, dict) and stamp.get("fingerprint") == compute_fingerprint(project)
+            and stamp.get("environment") == compute_environment_digest(venv))
+
+
+def _read_stamps(venv: str) -> Dict[str, dict]:
+    """Returns the stamps of a virtual environment by project path, ignoring stamps of other versions."""
+    try:
+        with open(os.path.join(venv, STAMP_FILE_NAME), "rb") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != STAMP_VERSION or not isinstance(data.get("projects"), dict):
+        return {}
+    return data["projects"]
+
+
+@contextlib.contextmanager
+def _locked_stamp(venv: str) -> Iterator[None]:
+    """Serializes updates of a virtual environment's stamp across processes (where file locks are available)."""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(os.path.join(venv, STAMP_LOCK_FILE_NAME), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def is_stamping_sync(args: List[str]) -> bool:
+    """Returns whether `uv <args>` is a sync leaving the environment as `uv run` expects it, so it can be stamped."""
+    return args[:1] == ["sync"] and all(arg in SAFE_SYNC_FLAGS for arg in args[1:])
+
+
+def is_direct_run_enabled(base_dir: str) -> bool:
+    """
+    Returns whether scripts may skip `uv run` (see direct_command), as set by the
+    DEVOPS_DIRECT_RUN environment variable or [tool.devops.run] direct (default: off).
+    """
+    value = os.getenv("DEVOPS_DIRECT_RUN")
+    if value is not None:
+        return value.lower() not in ("", "0", "false", "no", "off")
+    return bool(get_devops_config(base_dir).get("run", {}).get("direct", False))
+
+
+def direct_command(project: Project, command: List[str],
+                   environ: Dict[str, str]) -> Optional[tuple[List[str], Dict[str, str]]]:
+    """
+    Resolves a command to the executable in the project's virtual environment, provided the
+    environment is synced (see is_synced), so it can run without `uv run` re-checking it.
+
+    Returns:
+        The command with its executable resolved and the environment `uv run` would give it
+        (VIRTUAL_ENV set and the environment's scripts first on PATH), or None to fall back to
+        `uv run` if the environment is stale or lacks the executable
+    """
+    if not command or not is_synced(project):
+        return None
+    venv = get_venv_path(project)
+    bin_dir = get_bin_dir(venv)
+    executable = shutil.which(command[0], path=bin_dir) if os.sep not in command[0] else None
+    if executable is None:
+        return None
+    environ = dict(environ)
+    environ["VIRTUAL_ENV"] = venv
+    environ["PATH"] = os.pathsep.join(filter(None, [bin_dir, environ.get("PATH")]))
+    environ.pop("PYTHONHOME", None)
+    return [executable, *command[1:]], environ
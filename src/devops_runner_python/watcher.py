@@ -0,0 +1,190 @@
+import os
+import sys
+import errno
+import struct
+import threading
+from typing import Callable, Dict, List, Set, Tuple
+from .workspace import _walk, is_ignored, walk_dirs
+
+# Seconds between two scans of the polling watcher
+DEFAULT_POLL_INTERVAL = 1.0
+
+# Predicate on file names selecting the files a watcher reports
+FileMatcher = Callable[[str], bool]
+
+
+def match_all(name: str) -> bool:
+    return True
+
+
+class PollingWatcher:
+    """Detects changes by periodically re-scanning the matching files under base_dir and comparing their stat signatures."""
+    name = "polling"
+
+    def __init__(self, base_dir: str, ignore: List[str], match: FileMatcher = match_all,
+                 interval: float = DEFAULT_POLL_INTERVAL):
+        self.base_dir = base_dir
+        self.ignore = ignore
+        self.match = match
+        self.interval = interval
+        self._snapshot = self._take_snapshot()
+        self._changes: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="devopspy-poll", daemon=True)
+        self._thread.start()
+
+    def changes(self) -> Set[str]:
+        """Returns the paths of the files added, modified or removed since the previous call."""
+        with self._lock:
+            changes, self._changes = self._changes, set()
+        return changes
+
+    def close(self) -> None:
+        self._stopped.set()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            snapshot = self._take_snapshot()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed:
+                with self._lock:
+                    self._changes |= changed
+
+    def _take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in _walk(self.base_dir, self.ignore, self.match):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """
+    Detects changes with inotify (Linux), watching every directory under base_dir that is not ignored.
+    Events are queued by the kernel as files change, so draining the queue gives an up-to-date view
+    without any delay.
+    """
+    name = "inotify"
+
+    def __init__(self, base_dir: str, ignore: List[str], match: FileMatcher = match_all):
+        import ctypes
+        import ctypes.util
+
+        self.base_dir = base_dir
+        self.ignore = ignore
+        self.match = match
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._watches: Dict[int, str] = {}
+        try:
+            self._watch_tree(base_dir)
+        except OSError:
+            self.close()
+            raise
+
+    def changes(self) -> Set[str]:
+        """
+        Returns the paths of the matching files, and of the directories, added, modified or
+        removed since the previous call. If events were lost, base_dir itself is reported.
+        """
+        changes = set()
+        for wd, mask, name in self._read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: start over with a fresh set of watches
+                self._rewatch()
+                changes.add(self.base_dir)
+                continue
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if is_ignored(name, self.ignore):
+                    continue
+                changes.add(path)
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                    # Files created before the new directory was watched produce no events of their own
+                    changes.update(_walk(path, self.ignore, self.match))
+            elif self.match(name):
+                changes.add(path)
+        return changes
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _read_events(self):
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                yield wd, mask, name
+
+    def _watch_tree(self, path: str) -> None:
+        import ctypes
+
+        for directory in walk_dirs(path, self.ignore):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if directory == self.base_dir or err == errno.ENOSPC:
+                    # ENOSPC: the fs.inotify.max_user_watches limit is reached
+                    raise OSError(err, f"Cannot watch {directory}: {os.strerror(err)}")
+                # The directory was removed in the meantime
+                continue
+            self._watches[wd] = directory
+
+    def _rewatch(self) -> None:
+        for wd in list(self._watches):
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self._watches.clear()
+        self._watch_tree(self.base_dir)
+
+
+def create_watcher(base_dir: str, ignore: List[str], match: FileMatcher = match_all, poll: bool = False):
+    """
+    Returns a watcher reporting changes to the files under base_dir whose name matches, pruning
+    ignored directories: an InotifyWatcher where inotify is available (unless poll is set), and
+    a PollingWatcher otherwise.
+    """
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(base_dir, ignore, match)
+        except (OSError, AttributeError) as e:
+            print(f"inotify is unavailable ({e}), falling back to polling")
+    return PollingWatcher(base_dir, ignore, match)
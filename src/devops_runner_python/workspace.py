@@ -0,0 +1,176 @@
+import os
+import fnmatch
+import tomli
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+from . import daemon
+from .console import echo
+from .tracing import span
+
+# Directory names that never contain workspace projects. Matching is done on the
+# directory's basename with fnmatch, so glob patterns such as "*.egg-info" work too.
+DEFAULT_IGNORE_DIRS = [
+    ".git",
+    ".hg",
+    ".svn",
+    ".venv",
+    "venv",
+    "node_modules",
+    "__pycache__",
+    "dist",
+    ".mypy_cache",
+    ".pytest_cache",
+    ".ruff_cache",
+    ".tox",
+    ".nox",
+    "*.egg-info",
+    ".devops",
+]
+
+# Names of the files collected by scan_workspace
+PYPROJECT_FILE_NAME = "pyproject.toml"
+ENV_YAML_FILE_NAME = "env.yaml"
+DOTENV_DIR_NAME = "config"
+DOTENV_PREFIX = ".env."
+
+
+class WorkspaceScan(NamedTuple):
+    """The locations of the files devopspy cares about, collected in one pass over the monorepo."""
+    # pyproject.toml files, in walk order
+    pyprojects: List[str]
+    # env.yaml files, in walk order
+    env_yamls: List[str]
+    # .env.* files located in a config/ directory, in walk order
+    dotenv_files: List[str]
+
+
+_scans: Dict[Tuple[str, Tuple[str, ...]], WorkspaceScan] = {}
+
+
+def get_monorepo_root() -> str:
+    """Returns the monorepo root directory: $MONOREPO_ROOT, or the current working directory."""
+    return os.getenv("MONOREPO_ROOT", os.getcwd())
+
+
+def get_devops_config(base_dir: str) -> dict[str, Any]:
+    """
+    Returns the [tool.devops] table of the root pyproject.toml, or an empty dict
+    if the file does not exist or cannot be parsed.
+    """
+    root_pyproject = os.path.join(base_dir, "pyproject.toml")
+    try:
+        with open(root_pyproject, "rb") as f:
+            return tomli.load(f).get("tool", {}).get("devops", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        echo(f"Error processing {root_pyproject}: {e}")
+        return {}
+
+
+def get_ignore_patterns(discovery_config: dict[str, Any]) -> List[str]:
+    """
+    Returns the directory patterns pruned during workspace discovery: the defaults plus
+    any patterns listed under [tool.devops.discovery] ignore in the root pyproject.toml.
+    """
+    extra = discovery_config.get("ignore", [])
+    return DEFAULT_IGNORE_DIRS + [pattern for pattern in extra if pattern not in DEFAULT_IGNORE_DIRS]
+
+
+def walk_workspace(base_dir: str, file_name: str, ignore: List[str]) -> Iterator[str]:
+    """
+    Yields the paths of all files called file_name under base_dir, in sorted order.
+
+    Directories whose name matches one of the ignore patterns are pruned before
+    descending into them. Symlinked directories are not followed.
+    """
+    return _walk(base_dir, ignore, lambda name: name == file_name)
+
+
+def walk_files(base_dir: str, ignore: List[str]) -> Iterator[str]:
+    """Yields the paths of all files under base_dir in sorted order, pruning ignored directories like walk_workspace."""
+    return _walk(base_dir, ignore, lambda name: True)
+
+
+def walk_dirs(base_dir: str, ignore: List[str]) -> Iterator[str]:
+    """Yields base_dir and all directories under it in sorted order, pruning ignored directories like walk_workspace."""
+    yield base_dir
+    try:
+        with os.scandir(base_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False) and not is_ignored(entry.name, ignore):
+                yield from walk_dirs(entry.path, ignore)
+        except OSError:
+            continue
+
+
+def is_ignored(dir_name: str, ignore: List[str]) -> bool:
+    """Returns True if a directory with the given name matches one of the ignore patterns."""
+    return any(fnmatch.fnmatch(dir_name, pattern) for pattern in ignore)
+
+
+def _walk(base_dir: str, ignore: List[str], match) -> Iterator[str]:
+    try:
+        with os.scandir(base_dir) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return
+
+    subdirs = []
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                if not is_ignored(entry.name, ignore):
+                    subdirs.append(entry.path)
+            elif match(entry.name):
+                yield entry.path
+        except OSError:
+            continue
+
+    for subdir in subdirs:
+        yield from _walk(subdir, ignore, match)
+
+
+def scan_workspace(base_dir: str, ignore: List[str] | None = None) -> WorkspaceScan:
+    """
+    Collects the pyproject.toml, env.yaml and config/.env.* files under base_dir in a single
+    walk that prunes ignored directories. The result is memoized for the lifetime of the
+    process, so discovery and environment validation share the cost of the scan and the
+    same view of the repo. When a daemon serves the monorepo, its warm scan is used instead.
+
+    Args:
+        base_dir: The monorepo root directory
+        ignore: Directory patterns to prune (default: get_ignore_patterns for base_dir)
+    """
+    if ignore is None:
+        ignore = get_ignore_patterns(get_devops_config(base_dir).get("discovery", {}))
+    key = (base_dir, tuple(ignore))
+    if key in _scans:
+        return _scans[key]
+
+    served = daemon.request(base_dir, "scan", ignore=ignore)
+    if served is not None:
+        _scans[key] = WorkspaceScan(**served)
+        return _scans[key]
+
+    scan = WorkspaceScan(pyprojects=[], env_yamls=[], dotenv_files=[])
+    with span("scan workspace"):
+        for path in _walk(base_dir, ignore, is_scanned_file):
+            name = os.path.basename(path)
+            if name == PYPROJECT_FILE_NAME:
+                scan.pyprojects.append(path)
+            elif name == ENV_YAML_FILE_NAME:
+                scan.env_yamls.append(path)
+            elif os.path.basename(os.path.dirname(path)) == DOTENV_DIR_NAME:
+                scan.dotenv_files.append(path)
+
+    _scans[key] = scan
+    return scan
+
+
+def is_scanned_file(name: str) -> bool:
+    """Returns True if scan_workspace collects files with the given name (wherever they are located)."""
+    return name in (PYPROJECT_FILE_NAME, ENV_YAML_FILE_NAME) or name.startswith(DOTENV_PREFIX)
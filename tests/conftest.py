@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+import contextlib
+import subprocess
+import pytest
+from devops_runner_python import cache, daemon, discovery, env
+
+# A uv that runs the command given to `uv run` as is
+PASSTHROUGH_UV = '#!/bin/sh\nshift\nexec "$@"\n'
+
+
+def reset_memos():
+    """
+    Forget everything memoized at module level in this process: the projects, workspace scans
+    and service index, the parsed .env files, the ignored cache roots and the daemon connection.
+    """
+    discovery.forget_projects()
+    env._dotenv_files.clear()
+    cache._ignored_roots.clear()
+    daemon.close_connection()
+    daemon._unavailable.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_memos():
+    """Fixture running every test without the memos left behind by the previous ones."""
+    reset_memos()
+    yield
+    reset_memos()
+
+
+@pytest.fixture
+def monorepo(tmp_path, monkeypatch):
+    """Fixture pointing MONOREPO_ROOT at an empty temporary monorepo, with the daemon disabled."""
+    monkeypatch.setenv("MONOREPO_ROOT", str(tmp_path))
+    monkeypatch.setenv("DEVOPS_DAEMON", "0")
+    monkeypatch.delenv("DEVOPS_DIRECT_RUN", raising=False)
+    return tmp_path
+
+
+def write_pyproject(directory, name=None, devops="", dependencies=()):
+    """
+    Write a pyproject.toml, optionally with a [project] name and dependencies, followed by
+    devops (e.g. a [tool.devops.scripts] table).
+    """
+    os.makedirs(directory, exist_ok=True)
+    content = ""
+    if name:
+        content += f'[project]\nname = "{name}"\n'
+        if dependencies:
+            content += f"dependencies = [{', '.join(f'{dep!r}' for dep in dependencies)}]\n"
+    content += devops
+    with open(os.path.join(directory, "pyproject.toml"), "w") as f:
+        f.write(content)
+
+
+def install_executable(monkeypatch, bin_dir, name, script):
+    """Write an executable shell script named name into bin_dir, and put bin_dir first on PATH."""
+    os.makedirs(bin_dir, exist_ok=True)
+    path = os.path.join(bin_dir, name)
+    with open(path, "w") as f:
+        f.write(script)
+    os.chmod(path, 0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+
+@contextlib.contextmanager
+def serving_daemon(root):
+    """Run a daemon serving the monorepo at root in a subprocess, until the block exits."""
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "from devops_runner_python.cli import main; main()", "daemon", "start"],
+        env={**os.environ, "MONOREPO_ROOT": str(root), "PYTHONPATH": os.pathsep.join(sys.path)},
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 10
+        while daemon.request(str(root), "ping") is None:
+            assert proc.poll() is None and time.monotonic() < deadline, "daemon did not start"
+            daemon._unavailable.clear()
+            time.sleep(0.05)
+        yield proc
+    finally:
+        daemon._unavailable.clear()
+        daemon.request(str(root), "stop")
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        reset_memos()
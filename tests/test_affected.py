@@ -0,0 +1,74 @@
+import os
+import subprocess
+import pytest
+from devops_runner_python.affected import GitError, find_owning_project, get_affected_projects
+from devops_runner_python.discovery import Project
+
+
+def git(cwd, *args):
+    """Run a git command in cwd with a throwaway identity."""
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd, check=True, capture_output=True
+    )
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Fixture with a git repository holding core, api (depending on core) and cli, committed on main."""
+    monkeypatch.setenv("MONOREPO_ROOT", str(tmp_path))
+    for name in ["core", "api", "cli"]:
+        os.makedirs(tmp_path / name / "src")
+        (tmp_path / name / "src" / "main.py").write_text("")
+    (tmp_path / "README.md").write_text("")
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "init")
+    git(tmp_path, "checkout", "-q", "-b", "feature")
+    projects = {
+        "core": Project(name="core", path=str(tmp_path / "core"), scripts={}, deployment={}),
+        "api": Project(name="api", path=str(tmp_path / "api"), scripts={}, deployment={}, dependencies=["core"]),
+        "cli": Project(name="cli", path=str(tmp_path / "cli"), scripts={}, deployment={}),
+    }
+    return tmp_path, projects
+
+
+def test_find_owning_project_prefers_nested(tmp_path):
+    """Test that the most specific project directory owns a path."""
+    projects = {
+        "outer": Project(name="outer", path=str(tmp_path / "outer"), scripts={}, deployment={}),
+        "inner": Project(name="inner", path=str(tmp_path / "outer" / "inner"), scripts={}, deployment={}),
+    }
+
+    assert find_owning_project(projects, str(tmp_path / "outer" / "inner" / "x.py")) == "inner"
+    assert find_owning_project(projects, str(tmp_path / "outer" / "x.py")) == "outer"
+    assert find_owning_project(projects, str(tmp_path / "outer-other" / "x.py")) is None
+
+
+def test_get_affected_projects_includes_dependents(repo):
+    """Test that committed, modified and untracked changes map to their owners and dependents."""
+    root, projects = repo
+    (root / "core" / "src" / "main.py").write_text("changed = True\n")
+    git(root, "commit", "-q", "-am", "change core")
+    (root / "README.md").write_text("docs\n")
+
+    assert get_affected_projects(projects, "main") == {"core", "api"}
+
+    (root / "cli" / "src" / "new.py").write_text("")
+    assert get_affected_projects(projects, "main") == {"core", "api", "cli"}
+
+
+def test_get_affected_projects_global_file(repo):
+    """Test that changing a global file affects every project."""
+    root, projects = repo
+    (root / "uv.lock").write_text("")
+
+    assert get_affected_projects(projects, "main") == {"core", "api", "cli"}
+
+
+def test_get_affected_projects_unknown_base(repo):
+    """Test that an unknown base ref raises a GitError."""
+    _root, projects = repo
+
+    with pytest.raises(GitError):
+        get_affected_projects(projects, "does-not-exist")
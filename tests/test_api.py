@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+import asyncio
+import pytest
+from devops_runner_python import daemon
+from devops_runner_python.api import EnvironmentValidationError, TaskFinished, run_many, run_script
+from .conftest import PASSTHROUGH_UV, install_executable, serving_daemon, write_pyproject
+
+
+def write_project(directory, name, scripts, dependencies=()):
+    """Write a project whose scripts run Python snippets."""
+    lines = [f'{script} = """{sys.executable} -c \\"{code}\\""""' for script, code in scripts.items()]
+    write_pyproject(directory, name, "[tool.devops.scripts]\n" + "\n".join(lines) + "\n", dependencies)
+
+
+@pytest.fixture
+def monorepo(monorepo, monkeypatch):
+    """Fixture with a monorepo of two projects, and a `uv` on PATH that runs the command given to `uv run`."""
+    write_project(monorepo / "lib", "lib", {"test": "print('lib ok')", "slow": "import os, time; open('pid', 'w').write(str(os.getpid())); time.sleep(30)"})
+    write_project(monorepo / "app", "app", {"test": "import sys; print('app failed', file=sys.stderr); sys.exit(3)"},
+                  dependencies=["lib"])
+    install_executable(monkeypatch, monorepo / "bin", "uv", PASSTHROUGH_UV)
+    return monorepo
+
+
+def collect(events):
+    """Run an async iterator of events to completion and return them."""
+    async def consume():
+        return [event async for event in events]
+    return asyncio.run(consume())
+
+
+def test_run_script_returns_structured_result(monorepo):
+    """Test that run_script reports the exit code, output tail and each output line of a script."""
+    lines = []
+
+    result = asyncio.run(run_script("app", "test", validate=False, on_output=lines.append))
+
+    assert (result.name, result.script, result.exit_code, result.ok) == ("app", "test", 3, False)
+    assert result.tail == ["app failed"]
+    assert [(line.stream, line.line) for line in lines] == [("stderr", "app failed")]
+    with pytest.raises(ValueError):
+        asyncio.run(run_script("app", "missing", validate=False))
+
+
+def test_api_prints_nothing(monorepo, capsys):
+    """Test that discovery and validation messages are kept off stdout, validation errors being raised instead."""
+    (monorepo / "lib" / "env.yaml").write_text("- LIB_TOKEN\n")
+
+    with pytest.raises(EnvironmentValidationError, match="LIB_TOKEN is required but missing"):
+        asyncio.run(run_script("lib", "test"))
+    (monorepo / "config").mkdir()
+    (monorepo / "config" / ".env.global").write_text("LIB_TOKEN=secret\nUNUSED=1\n")
+    collect(run_many("test"))
+
+    assert capsys.readouterr().out == ""
+
+
+def test_run_many_streams_events_in_dependency_order(monorepo):
+    """Test that run_many yields start, output and finish events, running dependencies first."""
+    events = collect(run_many("test", validate=False))
+
+    kinds = [(type(event).__name__, getattr(event, "project", None) or event.result.name) for event in events]
+    assert kinds == [("TaskStarted", "lib"), ("TaskOutput", "lib"), ("TaskFinished", "lib"),
+                     ("TaskStarted", "app"), ("TaskOutput", "app"), ("TaskFinished", "app")]
+    results = {event.result.name: event.result for event in events if isinstance(event, TaskFinished)}
+    assert results["lib"].ok and results["app"].exit_code == 3
+
+
+def test_run_many_timeout_terminates_script(monorepo):
+    """Test that a script exceeding its timeout is terminated and flagged as timed out."""
+    start = time.monotonic()
+    events = collect(run_many("slow", timeout=0.5, validate=False))
+
+    assert time.monotonic() - start < 10
+    result = events[-1].result
+    assert result.timed_out and result.exit_code not in (0, None)
+
+
+def test_cancelling_run_script_terminates_process(monorepo):
+    """Test that cancelling run_script stops the script's process before the cancellation completes."""
+    pid_file = monorepo / "lib" / "pid"
+
+    async def cancel_after_start():
+        task = asyncio.ensure_future(run_script("lib", "slow", validate=False))
+        while not pid_file.exists() or not pid_file.read_text():
+            await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(cancel_after_start(), 10))
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_concurrent_calls_share_daemon(monorepo, monkeypatch):
+    """Test that concurrent API calls get their own answers from a daemon serving the monorepo."""
+    (monorepo / "lib" / "env.yaml").write_text("- LIB_TOKEN\n")
+    (monorepo / "config").mkdir()
+    (monorepo / "config" / ".env.global").write_text("LIB_TOKEN=secret\n")
+    (monorepo / "config" / ".env.development").write_text("MODE=development\n")
+    monkeypatch.delenv("DEVOPS_DAEMON")
+
+    async def run_all():
+        return await asyncio.gather(*(run_script(project, "test") for project in ["lib", "app"] * 4))
+
+    with serving_daemon(monorepo):
+        results = asyncio.run(run_all())
+        assert [result.exit_code for result in results] == [0, 3] * 4
+        assert str(monorepo) not in daemon._unavailable
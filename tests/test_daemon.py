@@ -0,0 +1,98 @@
+import os
+import sys
+import pytest
+from devops_runner_python import daemon, discovery
+from devops_runner_python.daemon import get_socket_path
+from devops_runner_python.discovery import find_python_projects
+from devops_runner_python.env import load_env_vars
+from .conftest import reset_memos, serving_daemon, write_pyproject
+
+
+@pytest.fixture
+def running_daemon(monorepo, monkeypatch):
+    """Fixture that starts a daemon serving a temporary monorepo in a subprocess."""
+    write_pyproject(monorepo / "apps" / "api", "api", '[tool.devops.scripts]\ntest = "pytest"\n')
+    monkeypatch.delenv("DEVOPS_DAEMON")
+    with serving_daemon(monorepo):
+        yield monorepo
+
+
+def test_request_without_daemon_falls_back(tmp_path):
+    """Test that requests return None when no daemon serves the monorepo."""
+    assert daemon.request(str(tmp_path), "ping") is None
+    assert str(tmp_path) in daemon._unavailable
+
+
+def test_socket_path_moves_to_private_dir_when_too_long(tmp_path, monkeypatch):
+    """Test that socket paths exceeding the sun_path limit move to a runtime directory private to the user."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path / "run"))
+    (tmp_path / "run").mkdir()
+    deep = tmp_path / ("x" * 120)
+
+    assert get_socket_path(str(tmp_path)) == str(tmp_path / ".devops" / "daemon.sock")
+    path = get_socket_path(str(deep))
+    assert os.path.dirname(path) == str(tmp_path / "run" / "devopspy")
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+
+    os.chmod(os.path.dirname(path), 0o777)
+    with pytest.raises(RuntimeError, match="only accessible to them"):
+        get_socket_path(str(deep))
+    reset_memos()
+    assert daemon.request(str(deep), "ping") is None
+
+
+def test_request_ignores_socket_of_other_user(running_daemon, monkeypatch):
+    """Test that clients don't talk to a socket owned by another user."""
+    daemon.close_connection()
+    with monkeypatch.context() as patched:
+        patched.setattr(daemon.os, "getuid", lambda: os.geteuid() + 1)
+        assert daemon.request(str(running_daemon), "ping") is None
+    daemon._unavailable.clear()
+    assert daemon.request(str(running_daemon), "ping") is not None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on Linux")
+def test_daemon_serves_projects_and_sees_changes(running_daemon):
+    """Test that clients get projects from the daemon, which picks up new projects immediately."""
+    assert daemon.request(str(running_daemon), "ping")["watcher"] == "inotify"
+
+    assert list(find_python_projects()) == ["api"]
+
+    write_pyproject(running_daemon / "libs" / "core", "core")
+    discovery._projects = None
+    assert sorted(find_python_projects()) == ["api", "core"]
+    assert find_python_projects()["api"].scripts == {"test": "pytest"}
+
+
+def test_daemon_serves_dotenv_values(running_daemon, monkeypatch):
+    """Test that .env files parsed by the daemon keep their precedence over each other and os.environ."""
+    config = running_daemon / "config"
+    config.mkdir()
+    (config / ".env.global").write_text("SHARED=global\nGLOBAL_ONLY=1\nPRESET=file\n")
+    (config / ".env.development").write_text("SHARED=development\n")
+    monkeypatch.setenv("PRESET", "shell")
+    for key in ("SHARED", "GLOBAL_ONLY", "MONOREPO_ENV"):
+        # Registers the variables with monkeypatch, so they are removed again afterwards
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+
+    load_env_vars("development", str(running_daemon))
+
+    assert daemon.request(str(running_daemon), "dotenv", paths=[str(config / ".env.global")]) is not None
+    assert os.environ["SHARED"] == "development"
+    assert os.environ["GLOBAL_ONLY"] == "1"
+    assert os.environ["PRESET"] == "shell"
+
+
+def test_daemon_recompiles_changed_shared_manifests(running_daemon):
+    """Test that the daemon sees edits to env manifests whose name the watcher doesn't track."""
+    manifest = running_daemon / "shared" / "common.yaml"
+    manifest.parent.mkdir()
+    manifest.write_text("- API_KEY\n")
+
+    served = daemon.request(str(running_daemon), "schema", files=[str(manifest)])
+    assert served["schema"] == {str(manifest): {"API_KEY": "required"}}
+
+    manifest.write_text("- API_KEY: optional\n- API_URL\n")
+    served = daemon.request(str(running_daemon), "schema", files=[str(manifest)])
+    assert served["schema"] == {str(manifest): {"API_KEY": "optional", "API_URL": "required"}}
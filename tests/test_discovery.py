@@ -0,0 +1,209 @@
+import os
+import pytest
+from unittest.mock import patch
+from devops_runner_python import discovery, workspace
+from devops_runner_python.discovery import find_python_projects, parse_scripts
+from devops_runner_python.workspace import walk_workspace, DEFAULT_IGNORE_DIRS
+from .conftest import reset_memos, write_pyproject
+
+
+def test_walk_workspace_prunes_ignored_dirs(tmp_path):
+    """Test that ignored directories are not descended into."""
+    write_pyproject(tmp_path / "apps" / "api", "api")
+    write_pyproject(tmp_path / "apps" / "api" / ".venv" / "lib" / "dep", "dep")
+    write_pyproject(tmp_path / "node_modules" / "pkg", "pkg")
+    write_pyproject(tmp_path / "libs" / "core.egg-info", "egg")
+
+    real_scandir = os.scandir
+    visited = []
+
+    def tracking_scandir(path):
+        visited.append(os.fspath(path))
+        return real_scandir(path)
+
+    with patch("os.scandir", side_effect=tracking_scandir):
+        found = list(walk_workspace(str(tmp_path), "pyproject.toml", DEFAULT_IGNORE_DIRS))
+
+    assert found == [str(tmp_path / "apps" / "api" / "pyproject.toml")]
+    assert not any(".venv" in path or "node_modules" in path for path in visited)
+
+
+def test_find_python_projects(monorepo):
+    """Test that discovery builds the project map and skips the root pyproject.toml."""
+    write_pyproject(monorepo, "root")
+    write_pyproject(monorepo / "apps" / "api", "api", '[tool.devops.scripts]\ntest = "pytest"\n')
+    write_pyproject(monorepo / "libs" / "core", "core", '[tool.devops.deployment]\nservice_name = "core"\nport = 8001\n')
+    write_pyproject(monorepo / "venv" / "site", "site")
+
+    with patch("builtins.print"):
+        projects = find_python_projects()
+
+    assert list(projects) == ["api", "core"]
+    assert projects["api"].path == str(monorepo / "apps" / "api")
+    assert projects["api"].scripts == {"test": "pytest"}
+    assert projects["core"].deployment == {"service_name": "core", "port": 8001}
+
+
+def test_find_python_projects_configured_ignore(monorepo):
+    """Test that [tool.devops.discovery] ignore in the root pyproject.toml extends the defaults."""
+    write_pyproject(monorepo, devops='[tool.devops.discovery]\nignore = ["fixtures"]\n')
+    write_pyproject(monorepo / "apps" / "api", "api")
+    write_pyproject(monorepo / "apps" / "api" / "fixtures" / "sample", "sample")
+
+    with patch("builtins.print"):
+        projects = find_python_projects()
+
+    assert list(projects) == ["api"]
+
+
+def age_files(directory, seconds=60):
+    """Move the mtime of every file under directory into the past, out of the index's racy window."""
+    for dirpath, _dirnames, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def test_find_python_projects_reuses_index(monorepo):
+    """Test that a warm run only re-parses manifests that changed since the index was written."""
+    write_pyproject(monorepo / "apps" / "api", "api")
+    write_pyproject(monorepo / "libs" / "core", "core")
+    age_files(monorepo)
+
+    with patch("builtins.print"):
+        find_python_projects()
+    assert (monorepo / ".devops" / "cache" / "workspace.idx").exists()
+
+    write_pyproject(monorepo / "apps" / "api", "api", '[tool.devops.scripts]\ntest = "pytest"\n')
+    write_pyproject(monorepo / "apps" / "worker", "worker")
+    reset_memos()
+
+    with patch("builtins.print"):
+        with patch("devops_runner_python.discovery.parse_manifest", wraps=discovery.parse_manifest) as mock_parse:
+            projects = find_python_projects()
+
+    parsed = sorted(os.path.relpath(call.args[0], monorepo) for call in mock_parse.call_args_list)
+    assert parsed == [os.path.join("apps", "api", "pyproject.toml"), os.path.join("apps", "worker", "pyproject.toml")]
+    assert list(projects) == ["api", "worker", "core"]
+    assert projects["api"].scripts == {"test": "pytest"}
+
+
+def test_find_python_projects_removed_manifest(monorepo):
+    """Test that manifests removed since the index was written disappear from the project map."""
+    write_pyproject(monorepo / "apps" / "api", "api")
+    write_pyproject(monorepo / "libs" / "core", "core")
+    age_files(monorepo)
+
+    with patch("builtins.print"):
+        find_python_projects()
+
+    os.remove(monorepo / "libs" / "core" / "pyproject.toml")
+    reset_memos()
+
+    with patch("builtins.print"):
+        projects = find_python_projects()
+
+    assert list(projects) == ["api"]
+
+
+def test_find_python_projects_corrupt_index(monorepo):
+    """Test that a corrupt index falls back to a full rebuild."""
+    write_pyproject(monorepo / "apps" / "api", "api")
+    index_path = monorepo / ".devops" / "cache" / "workspace.idx"
+    os.makedirs(index_path.parent)
+    index_path.write_text("{not json")
+
+    with patch("builtins.print"):
+        projects = find_python_projects()
+
+    assert list(projects) == ["api"]
+    assert index_path.read_text().startswith("{")
+
+
+@pytest.mark.parametrize("workers,threshold", [(1, 500), (4, 500), (2, 2)])
+def test_parse_manifests_order_and_errors(tmp_path, workers, threshold):
+    """Test that concurrent parsing keeps input order and reports per-file errors."""
+    paths = []
+    for i in range(6):
+        write_pyproject(tmp_path / f"p{i}", f"p{i}")
+        paths.append(str(tmp_path / f"p{i}" / "pyproject.toml"))
+    (tmp_path / "p3" / "pyproject.toml").write_text("[project\\n")
+    paths.append(str(tmp_path / "missing" / "pyproject.toml"))
+
+    results = discovery.parse_manifests(paths, workers, threshold)
+
+    assert [manifest["name"] if manifest else None for manifest, _ in results] == ["p0", "p1", "p2", None, "p4", "p5", None]
+    assert results[3][1] is not None
+    assert "No such file" in results[6][1]
+
+
+def test_find_python_projects_dependencies(monorepo):
+    """Test that requirements and uv sources pointing at workspace projects become dependencies."""
+    write_pyproject(monorepo / "libs" / "core", "Core_Lib")
+    write_pyproject(monorepo / "libs" / "models", "models")
+    write_pyproject(monorepo / "apps" / "api", devops="""
+[project]
+name = "api"
+dependencies = ["core-lib>=1.0", "fastapi[all]>=0.100", "renamed"]
+
+[tool.uv.sources]
+renamed = { path = "../../libs/models", editable = true }
+fastapi = { git = "https://github.com/fastapi/fastapi" }
+""")
+
+    with patch("builtins.print"):
+        projects = find_python_projects()
+
+    assert projects["api"].dependencies == ["Core_Lib", "models"]
+    assert projects["models"].dependencies == []
+
+
+def test_scan_workspace_collects_all_file_kinds(monorepo):
+    """Test that one scan collects manifests, env.yaml files and config/.env.* files."""
+    write_pyproject(monorepo / "apps" / "api", "api")
+    (monorepo / "apps" / "api" / "env.yaml").write_text("- X\n")
+    os.makedirs(monorepo / "config")
+    (monorepo / "config" / ".env.global").write_text("X=1\n")
+    (monorepo / "apps" / "api" / ".env.local").write_text("X=1\n")
+    os.makedirs(monorepo / "node_modules" / "pkg")
+    (monorepo / "node_modules" / "pkg" / "env.yaml").write_text("- X\n")
+
+    scan = workspace.scan_workspace(str(monorepo))
+
+    assert scan.pyprojects == [str(monorepo / "apps" / "api" / "pyproject.toml")]
+    assert scan.env_yamls == [str(monorepo / "apps" / "api" / "env.yaml")]
+    assert scan.dotenv_files == [str(monorepo / "config" / ".env.global")]
+    assert workspace.scan_workspace(str(monorepo)) is scan
+
+
+def test_script_config_resources():
+    """Test that script resource weights are parsed, with memory sizes given in bytes or with a unit, and validated."""
+    _, config = parse_scripts({
+        "test": {"cmd": "pytest", "cpu": 4, "mem": "1.5G", "exclusive": True},
+        "lint": {"cmd": "ruff", "mem": 1024},
+        "build": "uv build",
+    })
+
+    assert (config["test"].cpu, config["test"].mem, config["test"].exclusive) == (4, 1536 * 1024 ** 2, True)
+    assert config["lint"].mem == 1024
+    assert (config["build"].cpu, config["build"].mem) == (1.0, None)
+    for mem in ["lots", -1, "-2G", True]:
+        with pytest.raises(ValueError):
+            parse_scripts({"test": {"cmd": "pytest", "mem": mem}})
+    with pytest.raises(ValueError):
+        parse_scripts({"test": {"cmd": "pytest", "cpu": 0}})
+
+
+def test_invalid_workers_is_reported_as_an_error(monorepo, monkeypatch, capsys):
+    """Test that an invalid number of discovery workers makes commands exit with an error instead of a traceback."""
+    from devops_runner_python.cli import main
+
+    write_pyproject(monorepo / "apps" / "api", "api", '[tool.devops.scripts]\ntest = "pytest"\n')
+    monkeypatch.setenv("DEVOPS_DISCOVERY_WORKERS", "many")
+    monkeypatch.setattr("sys.argv", ["devopspy", "run", "api:test"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        main()
+    assert exc_info.value.code == 1
+    assert "Error: Invalid number of discovery workers: many" in capsys.readouterr().out
@@ -0,0 +1,77 @@
+import pytest
+from devops_runner_python import durations
+from devops_runner_python.cli.run_many import parse_shard
+from devops_runner_python.durations import (
+    estimate, get_history_path, load_estimates, longest_first, record_durations, shard
+)
+from devops_runner_python.scheduler import Task, TaskResult
+
+
+def result(name, duration, exit_code=0):
+    """Build the result of a task run."""
+    return TaskResult(name=name, exit_code=exit_code, duration=duration)
+
+
+def task(name, deps=()):
+    """Build a task that does nothing."""
+    return Task(name=name, cmd=["true"], cwd=".", deps=list(deps))
+
+
+def test_history_averages_recent_successful_runs(tmp_path):
+    """Test that estimates average the last successful runs, ignoring failures, cache hits and broken lines."""
+    for duration in [100.0, 1.0, 2.0, 3.0, 4.0, 5.0]:
+        record_durations(str(tmp_path), "test", [result("api", duration)])
+    record_durations(str(tmp_path), "test", [result("api", 50.0, exit_code=1), result("web", 0.0)])
+    with open(get_history_path(str(tmp_path)), "a") as f:
+        f.write('{"project": "api", "scr')
+
+    assert load_estimates(str(tmp_path)) == {("api", "test"): 3.0}
+
+
+def test_history_is_compacted(tmp_path, monkeypatch):
+    """Test that a long history is rewritten keeping the recent samples of every script."""
+    monkeypatch.setattr(durations, "MAX_HISTORY_LINES", 20)
+    for i in range(30):
+        record_durations(str(tmp_path), "test", [result("api", float(i)), result("web", 1.0)])
+
+    with open(get_history_path(str(tmp_path))) as f:
+        assert len(f.readlines()) < 30
+    assert load_estimates(str(tmp_path))[("api", "test")] == 27.0
+
+
+def test_estimate_defaults_to_median_of_script():
+    """Test that scripts without history are expected to take the median time of the same script elsewhere."""
+    estimates = {("a", "test"): 1.0, ("b", "test"): 5.0, ("c", "test"): 9.0, ("a", "lint"): 100.0}
+
+    assert estimate(estimates, "b", "test") == 5.0
+    assert estimate(estimates, "new", "test") == 5.0
+    assert estimate(estimates, "new", "build") == 1.0
+
+
+def test_longest_first_follows_critical_path():
+    """Test that tasks are ordered by their own duration plus the longest chain waiting on them."""
+    tasks = [task("quick"), task("slow"), task("lib"), task("app", ["lib"])]
+
+    ordered = longest_first(tasks, {"quick": 1.0, "slow": 10.0, "lib": 2.0, "app": 20.0})
+
+    assert [t.name for t in ordered] == ["lib", "app", "slow", "quick"]
+
+
+def test_shard_balances_durations():
+    """Test that shards partition the projects with balanced durations, preserving the given order."""
+    names = ["a", "b", "c", "d", "e"]
+    expected = {"a": 10.0, "b": 6.0, "c": 5.0, "d": 4.0, "e": 1.0}
+
+    shards = [shard(names, expected, i, 2) for i in (1, 2)]
+
+    assert sorted(shards[0] + shards[1]) == names
+    assert shards == [["a", "d"], ["b", "c", "e"]]
+    assert shard(names, expected, 1, 2) == shards[0]
+
+
+def test_parse_shard():
+    """Test that shard specifications are 1-based and validated."""
+    assert parse_shard("2/3") == (2, 3)
+    for invalid in ["0/3", "4/3", "1", "a/b"]:
+        with pytest.raises(ValueError):
+            parse_shard(invalid)
@@ -0,0 +1,124 @@
+import os
+import pytest
+from devops_runner_python.discovery import Project
+from devops_runner_python.env import get_project_env_manifests
+from .conftest import write_pyproject
+
+
+@pytest.fixture
+def workspace(monorepo):
+    """Fixture with api depending on core, an unrelated billing project and a nested api plugin project."""
+    write_pyproject(monorepo, devops='[tool.devops]\nenv_manifests = ["config/env.yaml"]\n')
+    for directory in ["config", "core", "api/settings", "api/plugin", "billing", "shared"]:
+        os.makedirs(monorepo / directory)
+        (monorepo / directory / "env.yaml").write_text("- X\n")
+
+    def project(name, path, **kwargs):
+        return Project(name=name, path=str(monorepo / path), scripts={}, deployment={}, **kwargs)
+
+    return monorepo, {
+        "core": project("core", "core"),
+        "api": project("api", "api", dependencies=["core"], env_manifests=[str(monorepo / "shared" / "env.yaml")]),
+        "plugin": project("plugin", "api/plugin"),
+        "billing": project("billing", "billing"),
+    }
+
+
+def test_get_project_env_manifests(workspace):
+    """Test that a project's scope covers its own, declared, dependency and root shared manifests only."""
+    root, projects = workspace
+
+    manifests = get_project_env_manifests(projects, ["api"])
+
+    assert manifests == [
+        str(root / "config" / "env.yaml"),
+        str(root / "api" / "settings" / "env.yaml"),
+        str(root / "shared" / "env.yaml"),
+        str(root / "core" / "env.yaml"),
+    ]
+
+
+def test_build_env_matches_load_dotenv(tmp_path, monkeypatch):
+    """Test that build_env resolves precedence and references like load_dotenv, without touching os.environ."""
+    from dotenv import load_dotenv
+    from devops_runner_python.env import build_env
+
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / ".env.global").write_text("SHARED=global\nGLOBAL_ONLY=${SHARED}-${HOME_DIR}\nPRESET=file\n")
+    (config / ".env.test").write_text("SHARED=test\nURL=http://${HOST:-localhost}:${PORT}\nPORT=8000\n")
+    monkeypatch.setenv("PRESET", "shell")
+    monkeypatch.setenv("HOME_DIR", "/home/dev")
+    base = dict(os.environ)
+
+    environ = build_env("test", str(tmp_path))
+
+    assert dict(os.environ) == base
+    for key in ("SHARED", "GLOBAL_ONLY", "URL", "PORT", "MONOREPO_ROOT", "MONOREPO_ENV"):
+        monkeypatch.delenv(key, raising=False)
+        # Registers the variable, so that loading the files below is undone afterwards
+        monkeypatch.setenv(key, "")
+        monkeypatch.delenv(key)
+    load_dotenv(config / ".env.test")
+    load_dotenv(config / ".env.global")
+    expected = {**os.environ, "MONOREPO_ROOT": str(tmp_path), "MONOREPO_ENV": "test"}
+    assert environ == expected
+    assert environ["GLOBAL_ONLY"] == "test-/home/dev"
+    assert environ["PRESET"] == "shell"
+
+
+def test_build_env_rereads_changed_files(tmp_path):
+    """Test that cached .env files are parsed again once they change."""
+    from devops_runner_python.env import build_env
+
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / ".env.global").write_text("VALUE=old\n")
+    assert build_env("test", str(tmp_path), base={})["VALUE"] == "old"
+
+    (config / ".env.global").write_text("VALUE=newer\n")
+    assert build_env("test", str(tmp_path), base={}) == {
+        "VALUE": "newer", "MONOREPO_ROOT": str(tmp_path), "MONOREPO_ENV": "test",
+    }
+
+
+def test_scoped_validation_ignores_other_projects_keys(monorepo, monkeypatch, capsys):
+    """Test that keys of other projects' env.yaml files in .env.global are only reported by a full validation."""
+    from devops_runner_python.env import validate_env_vars
+
+    monkeypatch.chdir(monorepo)
+    for name, key in [("a", "A_KEY"), ("b", "B_KEY")]:
+        os.makedirs(monorepo / "apps" / name)
+        (monorepo / "apps" / name / "env.yaml").write_text(f"- {key}\n")
+    os.makedirs(monorepo / "config")
+    (monorepo / "config" / ".env.global").write_text("A_KEY=1\nB_KEY=2\nSTALE_KEY=3\n")
+    projects = {name: Project(name=name, path=str(monorepo / "apps" / name), scripts={}, deployment={})
+                for name in ["a", "b"]}
+    environ = {"A_KEY": "1", "B_KEY": "2"}
+
+    for _ in range(2):
+        # The second run replays the memoized result
+        assert validate_env_vars(projects, ["a"], environ)
+        assert "WARNING" not in capsys.readouterr().out
+
+    assert validate_env_vars(projects, None, environ)
+    output = capsys.readouterr().out
+    assert "STALE_KEY" in output and "B_KEY" not in output
+
+
+def test_full_validation_after_scoped_one_reports_unused_keys(monorepo, monkeypatch, capsys):
+    """Test that a memoized scoped validation doesn't hide the unused keys of a full one over the same files."""
+    from devops_runner_python.env import validate_env_vars
+
+    monkeypatch.chdir(monorepo)
+    os.makedirs(monorepo / "apps" / "a")
+    (monorepo / "apps" / "a" / "env.yaml").write_text("- A_KEY\n")
+    os.makedirs(monorepo / "config")
+    (monorepo / "config" / ".env.global").write_text("A_KEY=1\nSTALE_KEY=3\n")
+    projects = {"a": Project(name="a", path=str(monorepo / "apps" / "a"), scripts={}, deployment={})}
+
+    assert validate_env_vars(projects, ["a"], {"A_KEY": "1"})
+    assert "STALE_KEY" not in capsys.readouterr().out
+    for _ in range(2):
+        assert validate_env_vars(projects, None, {"A_KEY": "1"})
+        assert "STALE_KEY" in capsys.readouterr().out
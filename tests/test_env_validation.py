@@ -5,7 +5,8 @@ from devops_runner_python.env_validation import (
     parse_env_yaml,
     validate_env_vars,
     parse_dotenv_file,
-    validate_environment
+    validate_environment,
+    compile_env_schema
 )
 
 
@@ -136,7 +137,7 @@ def test_parse_dotenv_file():
     TEST_ENV3=value3
     """
     
-    with patch('devops_python.env_validation.dotenv_values', return_value={
+    with patch('devops_runner_python.env_validation.dotenv_values', return_value={
         'TEST_ENV1': 'value1',
         'TEST_ENV2': 'value2',
         'TEST_ENV3': 'value3'
@@ -147,11 +148,11 @@ def test_parse_dotenv_file():
     assert set(result) == {'TEST_ENV1', 'TEST_ENV2', 'TEST_ENV3'}
 
 
-@patch('devops_python.env_validation.find_env_yaml_files')
-@patch('devops_python.env_validation.find_dotenv_files')
-@patch('devops_python.env_validation.parse_env_yaml')
-@patch('devops_python.env_validation.validate_env_vars')
-@patch('devops_python.env_validation.parse_dotenv_file')
+@patch('devops_runner_python.env_validation.find_env_yaml_files')
+@patch('devops_runner_python.env_validation.find_dotenv_files')
+@patch('devops_runner_python.env_validation.parse_env_yaml')
+@patch('devops_runner_python.env_validation.validate_env_vars')
+@patch('devops_runner_python.env_validation.parse_dotenv_file')
 def test_validate_environment_success(
     mock_parse_dotenv, mock_validate, mock_parse_yaml, mock_find_dotenv, mock_find_yaml
 ):
@@ -175,11 +176,11 @@ def test_validate_environment_success(
     mock_parse_dotenv.assert_called_once()
 
 
-@patch('devops_python.env_validation.find_env_yaml_files')
-@patch('devops_python.env_validation.find_dotenv_files')
-@patch('devops_python.env_validation.parse_env_yaml')
-@patch('devops_python.env_validation.validate_env_vars')
-@patch('devops_python.env_validation.parse_dotenv_file')
+@patch('devops_runner_python.env_validation.find_env_yaml_files')
+@patch('devops_runner_python.env_validation.find_dotenv_files')
+@patch('devops_runner_python.env_validation.parse_env_yaml')
+@patch('devops_runner_python.env_validation.validate_env_vars')
+@patch('devops_runner_python.env_validation.parse_dotenv_file')
 def test_validate_environment_with_errors(
     mock_parse_dotenv, mock_validate, mock_parse_yaml, mock_find_dotenv, mock_find_yaml
 ):
@@ -204,10 +205,10 @@ def test_validate_environment_with_errors(
     mock_parse_dotenv.assert_called_once()
 
 
-@patch('devops_python.env_validation.find_env_yaml_files')
-@patch('devops_python.env_validation.find_dotenv_files')
-@patch('devops_python.env_validation.parse_env_yaml')
-@patch('devops_python.env_validation.parse_dotenv_file')
+@patch('devops_runner_python.env_validation.find_env_yaml_files')
+@patch('devops_runner_python.env_validation.find_dotenv_files')
+@patch('devops_runner_python.env_validation.parse_env_yaml')
+@patch('devops_runner_python.env_validation.parse_dotenv_file')
 def test_validate_environment_with_warnings(
     mock_parse_dotenv, mock_parse_yaml, mock_find_dotenv, mock_find_yaml
 ):
@@ -219,7 +220,7 @@ def test_validate_environment_with_warnings(
     mock_parse_dotenv.return_value = ['TEST_ENV1', 'TEST_ENV2']  # TEST_ENV2 is unused
     
     # Mock validate_env_vars to return no errors
-    with patch('devops_python.env_validation.validate_env_vars', return_value={}):
+    with patch('devops_runner_python.env_validation.validate_env_vars', return_value={}):
         # Run validation with patched print to avoid output during tests
         with patch('builtins.print'):
             result = validate_environment()
@@ -230,3 +231,61 @@ def test_validate_environment_with_warnings(
     mock_find_dotenv.assert_called_once()
     mock_parse_yaml.assert_called_once()
     mock_parse_dotenv.assert_called_once()
+
+
+@pytest.fixture
+def env_workspace(tmp_path, monkeypatch, mock_env):
+    """Fixture that runs validation from a temporary monorepo with one env.yaml file."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MONOREPO_ROOT", str(tmp_path))
+    os.makedirs(tmp_path / "project1")
+    (tmp_path / "project1" / "env.yaml").write_text("- TEST_ENV_MANDATORY\n- TEST_ENV_BOOLEAN: boolean\n")
+    return tmp_path
+
+
+def test_compile_env_schema_reuses_cache(env_workspace):
+    """Test that unchanged env.yaml files are not parsed again."""
+    schema, schema_hash = compile_env_schema(['project1/env.yaml'])
+    assert schema == {'project1/env.yaml': {'TEST_ENV_MANDATORY': 'required', 'TEST_ENV_BOOLEAN': 'boolean'}}
+
+    with patch('devops_runner_python.env_validation.parse_env_yaml') as mock_parse_yaml:
+        cached_schema, cached_hash = compile_env_schema(['project1/env.yaml'])
+    mock_parse_yaml.assert_not_called()
+    assert cached_schema == schema
+    assert cached_hash == schema_hash
+
+    (env_workspace / "project1" / "env.yaml").write_text("- TEST_ENV_OTHER\n")
+    changed_schema, changed_hash = compile_env_schema(['project1/env.yaml'])
+    assert changed_schema == {'project1/env.yaml': {'TEST_ENV_OTHER': 'required'}}
+    assert changed_hash != schema_hash
+
+
+def test_compile_env_schema_rehashes_racily_clean_files(env_workspace):
+    """Test that a same-size edit keeping the mtime recorded right before it is not hidden by the cache."""
+    env_yaml = env_workspace / "project1" / "env.yaml"
+    env_yaml.write_text("- TEST_ENV_A\n")
+    compile_env_schema(['project1/env.yaml'])
+
+    # Same size and mtime, as for an edit within the same mtime tick as the cache write
+    stat = os.stat(env_yaml)
+    env_yaml.write_text("- TEST_ENV_B\n")
+    os.utime(env_yaml, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    schema, _ = compile_env_schema(['project1/env.yaml'])
+    assert schema == {'project1/env.yaml': {'TEST_ENV_B': 'required'}}
+
+
+def test_validate_environment_memoizes_success(env_workspace):
+    """Test that a successful validation is remembered until a referenced value changes."""
+    os.environ['TEST_ENV_MANDATORY'] = 'value'
+    os.environ['TEST_ENV_BOOLEAN'] = 'true'
+    assert validate_environment() is True
+
+    with patch('devops_runner_python.env_validation.validate_env_vars') as mock_validate:
+        os.environ['UNRELATED'] = 'changed'
+        assert validate_environment() is True
+        mock_validate.assert_not_called()
+
+    os.environ['TEST_ENV_BOOLEAN'] = 'maybe'
+    with patch('builtins.print'):
+        assert validate_environment() is False
@@ -0,0 +1,38 @@
+import sys
+import pytest
+from devops_runner_python import discovery
+from devops_runner_python.cli.exec import exec, match_projects
+from .conftest import write_pyproject
+
+
+@pytest.fixture
+def monorepo(monorepo, monkeypatch):
+    """Fixture with the projects svc-api, svc-worker and lib, with the cwd at the monorepo root."""
+    for directory, name in [("apps/api", "svc-api"), ("apps/worker", "svc-worker"), ("libs/lib", "lib")]:
+        write_pyproject(monorepo / directory, name)
+    monkeypatch.chdir(monorepo)
+    return monorepo
+
+
+def test_match_projects(monorepo):
+    """Test that exact names and glob patterns select projects in discovery order."""
+    projects = discovery.find_python_projects()
+
+    selected, unmatched = match_projects(projects, ["lib", "svc-*", "missing-*"])
+
+    assert [project.name for project in selected] == ["svc-api", "svc-worker", "lib"]
+    assert unmatched == ["missing-*"]
+
+
+def test_exec_runs_in_every_project(monorepo, capfd):
+    """Test that a command runs concurrently in the selected projects and failures are aggregated."""
+    command = [sys.executable, "-c", "import os, sys; print(os.path.basename(os.getcwd())); sys.exit(os.getcwd().endswith('worker'))"]
+
+    exit_code = exec(["svc-*"], "development", command, jobs=2)
+
+    out = capfd.readouterr().out
+    assert "[svc-api] api\n" in out
+    assert "[svc-worker] worker\n" in out
+    assert "Command failed in 1 of 2 projects" in out
+    assert exit_code == 1
+    assert exec([], "development", [sys.executable, "-c", "pass"], all_projects=True) == 0
@@ -0,0 +1,56 @@
+import pytest
+from devops_runner_python.discovery import Project
+from devops_runner_python.graph import (
+    CycleError,
+    find_cycle,
+    task_dependencies,
+    with_dependencies,
+    with_dependents,
+)
+
+
+def make_projects(graph):
+    """Build a project map from a dictionary of project names to dependency names."""
+    return {
+        name: Project(name=name, path=f"/repo/{name}", scripts={}, deployment={}, dependencies=deps)
+        for name, deps in graph.items()
+    }
+
+
+@pytest.fixture
+def projects():
+    """Fixture with a diamond: api and worker depend on core through models, cli stands alone."""
+    return make_projects({
+        "core": [],
+        "models": ["core"],
+        "api": ["models"],
+        "worker": ["models", "core"],
+        "cli": [],
+    })
+
+
+def test_with_dependencies(projects):
+    """Test that selecting a project with its dependencies includes the transitive closure."""
+    assert with_dependencies(projects, ["api"]) == {"api", "models", "core"}
+
+
+def test_with_dependents(projects):
+    """Test that selecting a project with its dependents includes everything built on top of it."""
+    assert with_dependents(projects, ["models"]) == {"models", "api", "worker"}
+
+
+def test_task_dependencies_skip_unselected(projects):
+    """Test that ordering constraints look through projects that are not scheduled."""
+    deps = task_dependencies(projects, ["core", "api", "worker", "cli"])
+
+    assert deps == {"core": [], "api": ["core"], "worker": ["core"], "cli": []}
+
+
+def test_task_dependencies_cycle():
+    """Test that cycles are detected and reported."""
+    projects = make_projects({"a": ["b"], "b": ["c"], "c": ["a"], "d": []})
+
+    assert find_cycle(projects, ["d"]) is None
+    with pytest.raises(CycleError) as exc_info:
+        task_dependencies(projects, ["a", "d"])
+    assert exc_info.value.cycle == ["a", "b", "c", "a"]
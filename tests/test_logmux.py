@@ -0,0 +1,108 @@
+import io
+import sys
+import json
+import time
+import pytest
+import subprocess
+from devops_runner_python.logmux import LogMultiplexer
+from devops_runner_python.scheduler import Task, run_tasks
+
+
+def python_task(name, code, cwd):
+    """Build a task that runs a Python snippet."""
+    return Task(name=name, cmd=[sys.executable, "-c", code], cwd=str(cwd))
+
+
+def test_stream_mode_keeps_lines_whole(tmp_path):
+    """Test that concurrent noisy tasks never interleave within a line, and partial last lines are kept."""
+    code = "import sys\nfor i in range(2000): sys.stdout.write('x' * 50 + str(i) + '\\n')\nsys.stdout.write('end')"
+    out = io.BytesIO()
+    with LogMultiplexer(out=out) as mux:
+        run_tasks([python_task(f"t{i}", code, tmp_path) for i in range(4)], jobs=4, mux=mux)
+
+    lines = out.getvalue().decode().splitlines()
+    for i in range(4):
+        own = [line for line in lines if line.startswith(f"[t{i}] ")]
+        assert own == [f"[t{i}] " + "x" * 50 + str(n) for n in range(2000)] + [f"[t{i}] end"]
+
+
+def test_grouped_mode_writes_blocks_and_log_files(tmp_path):
+    """Test that grouped output shows each task in one block and the full output is kept on disk."""
+    out = io.BytesIO()
+    log_dir = tmp_path / "logs"
+    tasks = [
+        python_task("a", "import time\nfor i in range(3): print('a', i, flush=True); time.sleep(0.05)", tmp_path),
+        python_task("b", "import time\nfor i in range(3): print('b', i, flush=True); time.sleep(0.05)", tmp_path),
+    ]
+    with LogMultiplexer("grouped", str(log_dir), out=out) as mux:
+        results = run_tasks(tasks, jobs=2, mux=mux)
+
+    text = out.getvalue().decode()
+    assert "==> a (exit code 0) <==\na 0\na 1\na 2\n" in text
+    assert "==> b (exit code 0) <==\nb 0\nb 1\nb 2\n" in text
+    assert (log_dir / "a.log").read_text() == "a 0\na 1\na 2\n"
+    assert results["b"].log_path == str(log_dir / "b.log")
+
+
+def test_jsonl_mode_reports_streams_and_exit(tmp_path):
+    """Test that jsonl output is one JSON object per line, tagged with the stream it came from."""
+    out = io.BytesIO()
+    code = "import sys; print('out'); print('err', file=sys.stderr); sys.exit(2)"
+    with LogMultiplexer("jsonl", out=out) as mux:
+        run_tasks([python_task("t", code, tmp_path)], mux=mux)
+
+    events = [json.loads(line) for line in out.getvalue().splitlines()]
+    lines = {(event["stream"], event["line"]) for event in events if "line" in event}
+    assert lines == {("stdout", "out"), ("stderr", "err")}
+    assert events[-1]["event"] == "exit" and events[-1]["exit_code"] == 2
+
+
+def test_failed_task_keeps_tail(tmp_path):
+    """Test that results carry the last lines of a task's output, bounded by tail_lines."""
+    code = "import sys\nfor i in range(100): print('line', i)\nsys.exit(1)"
+    with LogMultiplexer(out=io.BytesIO(), tail_lines=5) as mux:
+        results = run_tasks([python_task("t", code, tmp_path)], mux=mux)
+
+    assert results["t"].exit_code == 1
+    assert results["t"].tail == [f"line {i}" for i in range(95, 100)]
+
+
+def test_task_closing_its_pipes_does_not_stall_others(tmp_path):
+    """Test that a task which closes its output but keeps running doesn't hold back the output and exit of others."""
+    out = io.BytesIO()
+    exits = {}
+    codes = {
+        "quiet": "import os, time\nos.close(1)\nos.close(2)\ntime.sleep(3)",
+        "noisy": "import time\ntime.sleep(0.3)\nprint('done')",
+    }
+    start = time.monotonic()
+    with LogMultiplexer(out=out) as mux:
+        procs = []
+        for name, code in codes.items():
+            proc = subprocess.Popen([sys.executable, "-c", code], cwd=tmp_path, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE)
+            procs.append(proc)
+            mux.add(name, proc, lambda name: exits.setdefault(name, time.monotonic() - start))
+        while "noisy" not in exits and time.monotonic() - start < 10:
+            time.sleep(0.01)
+        assert exits["noisy"] < 2
+        assert out.getvalue() == b"[noisy] done\n"
+        procs[0].kill()
+
+    assert set(exits) == {"quiet", "noisy"}
+
+
+def test_multiplexer_failure_is_raised_by_run_tasks(tmp_path, monkeypatch):
+    """Test that run_tasks raises instead of waiting forever when the multiplexer thread fails."""
+    tasks = [python_task(name, "import time\nprint('hi', flush=True)\ntime.sleep(0.2)", tmp_path) for name in "ab"]
+    mux = LogMultiplexer(out=io.BytesIO())
+
+    def fail(*args):
+        raise OSError("disk full")
+    monkeypatch.setattr(mux, "_emit", fail)
+
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="disk full"), mux:
+        run_tasks(tasks, jobs=2, mux=mux)
+    assert time.monotonic() - start < 5
+    assert isinstance(mux.error, OSError)
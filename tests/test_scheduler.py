@@ -0,0 +1,171 @@
+import sys
+import time
+import threading
+import pytest
+from devops_runner_python.scheduler import Task, TaskQueue, TaskResult, run_tasks
+
+
+def python_task(name, code, cwd):
+    """Build a task that runs a Python snippet."""
+    return Task(name=name, cmd=[sys.executable, "-c", code], cwd=str(cwd))
+
+
+def test_run_tasks_prefixes_output(tmp_path, capfd):
+    """Test that every output line is prefixed with the task name and exit codes are collected."""
+    tasks = [
+        python_task("ok", "print('hello'); print('world')", tmp_path),
+        python_task("bad", "import sys; print('oops', file=sys.stderr); sys.exit(3)", tmp_path),
+    ]
+
+    results = run_tasks(tasks, jobs=2)
+
+    out = capfd.readouterr().out
+    assert "[ok] hello\n" in out
+    assert "[ok] world\n" in out
+    assert "[bad] oops\n" in out
+    assert results["ok"].exit_code == 0
+    assert results["bad"].exit_code == 3
+
+
+def test_run_tasks_runs_in_task_cwd(tmp_path, capfd):
+    """Test that tasks run in their own working directory."""
+    (tmp_path / "sub").mkdir()
+    run_tasks([python_task("cwd", "import os; print(os.getcwd())", tmp_path / "sub")])
+
+    assert f"[cwd] {tmp_path / 'sub'}\n" in capfd.readouterr().out
+
+
+def test_run_tasks_respects_jobs(tmp_path):
+    """Test that no more than `jobs` tasks run at once."""
+    code = "import time; time.sleep(0.3)"
+    tasks = [python_task(f"t{i}", code, tmp_path) for i in range(4)]
+
+    start = time.monotonic()
+    run_tasks(tasks, jobs=2)
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.6
+
+
+def test_run_tasks_kill_others_on_fail(tmp_path):
+    """Test that a failure terminates running tasks and skips pending ones."""
+    tasks = [
+        python_task("fail", "import sys, time; time.sleep(0.2); sys.exit(1)", tmp_path),
+        python_task("slow", "import time; time.sleep(30)", tmp_path),
+        python_task("pending", "print('never')", tmp_path),
+    ]
+
+    start = time.monotonic()
+    results = run_tasks(tasks, jobs=2, kill_others_on_fail=True)
+
+    assert time.monotonic() - start < 10
+    assert results["fail"].exit_code == 1
+    assert results["slow"].exit_code not in (0, None)
+    assert results["pending"].exit_code is None
+
+
+def test_run_tasks_orders_dependencies(tmp_path):
+    """Test that a task starts after its dependencies and is skipped when one fails."""
+    log = tmp_path / "log"
+    append = "import sys; open(sys.argv[1], 'a').write(sys.argv[2] + '\\n')"
+    tasks = [
+        Task(name="app", cmd=[sys.executable, "-c", append, str(log), "app"], cwd=str(tmp_path), deps=["lib"]),
+        Task(name="lib", cmd=[sys.executable, "-c", "import time; time.sleep(0.2); " + append, str(log), "lib"],
+             cwd=str(tmp_path)),
+        Task(name="broken", cmd=[sys.executable, "-c", "raise SystemExit(1)"], cwd=str(tmp_path)),
+        Task(name="downstream", cmd=[sys.executable, "-c", append, str(log), "downstream"], cwd=str(tmp_path),
+             deps=["broken"]),
+    ]
+
+    results = run_tasks(tasks, jobs=4)
+
+    assert log.read_text() == "lib\napp\n"
+    assert results["app"].exit_code == 0
+    assert results["downstream"].exit_code is None
+
+
+def test_run_tasks_cancel(tmp_path, capfd):
+    """Test that setting the cancel event terminates running tasks and skips pending ones."""
+    cancel = threading.Event()
+    tasks = [
+        python_task("slow", "import time; time.sleep(30)", tmp_path),
+        Task(name="pending", cmd=[sys.executable, "-c", "pass"], cwd=str(tmp_path), deps=["slow"]),
+    ]
+    threading.Timer(0.3, cancel.set).start()
+
+    start = time.monotonic()
+    results = run_tasks(tasks, jobs=2, cancel=cancel)
+
+    assert time.monotonic() - start < 10
+    assert results["slow"].exit_code not in (0, None)
+    assert results["pending"].exit_code is None
+
+
+def running_sets(log):
+    """Return the sets of tasks running whenever a task started, from the start/end lines they appended to log."""
+    running, sets = set(), []
+    for event, name in (line.split() for line in log.read_text().splitlines()):
+        if event == "start":
+            running.add(name)
+            sets.append(set(running))
+        else:
+            running.discard(name)
+    return sets
+
+
+def weighted_task(name, log, **weights):
+    """Build a task that logs its start and end around a short sleep."""
+    code = ("import sys, time; log = sys.argv[1]; open(log, 'a').write('start ' + sys.argv[2] + '\\n'); "
+            "time.sleep(0.2); open(log, 'a').write('end ' + sys.argv[2] + '\\n')")
+    return Task(name=name, cmd=[sys.executable, "-c", code, str(log), name], cwd=str(log.parent), **weights)
+
+
+def test_run_tasks_packs_cpu_weights(tmp_path):
+    """Test that the cpu weights of running tasks stay within the jobs budget, with small tasks passing big ones."""
+    log = tmp_path / "log"
+    tasks = [weighted_task("big", log, cpu=3), weighted_task("big2", log, cpu=3),
+             weighted_task("small", log), weighted_task("small2", log)]
+
+    results = run_tasks(tasks, jobs=4)
+
+    assert all(result.exit_code == 0 for result in results.values())
+    assert max(running_sets(log), key=len) == {"big", "small"}
+
+
+def test_run_tasks_memory_and_exclusive(tmp_path):
+    """Test that mem weights are packed against the memory budget and exclusive tasks run alone."""
+    log = tmp_path / "log"
+    tasks = [weighted_task("a", log, mem=600), weighted_task("b", log, mem=600),
+             weighted_task("alone", log, exclusive=True), weighted_task("c", log, mem=300)]
+
+    run_tasks(tasks, jobs=4, memory=1000)
+
+    lines = log.read_text().splitlines()
+    start = lines.index("start alone")
+    assert lines[start + 1] == "end alone"
+    assert max(len(running) for running in running_sets(log)) == 2
+    assert not any({"a", "b"} <= running for running in running_sets(log))
+
+
+def test_task_queue_decisions():
+    """Test that the task queue orders, packs, skips and reports stalls the way run_tasks relies on."""
+    def task(name, deps=(), **weights):
+        return Task(name=name, cmd=["true"], cwd=".", deps=list(deps), **weights)
+
+    schedule = TaskQueue([task("lib"), task("app", ["lib"]), task("big", cpu=2), task("tool", ["missing"])], jobs=2)
+
+    started = []
+    while (ready := schedule.next_ready()) is not None:
+        schedule.start(ready)
+        started.append(ready.name)
+    # big doesn't fit next to lib, and app waits for lib; deps outside the queue are ignored
+    assert started == ["lib", "tool"]
+
+    schedule.finish(TaskResult(name="lib", exit_code=1, duration=1.0))
+    app = schedule.next_ready()
+    assert app.name == "app" and schedule.failed_deps(app) == ["lib"]
+    assert [task.name for task in schedule.halt()] == ["big"]
+
+    stalled = TaskQueue([task("a", ["b"]), task("b", ["a"])])
+    with pytest.raises(ValueError, match="unsatisfiable dependencies: a, b"):
+        stalled.check_stalled()
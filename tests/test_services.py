@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import patch
+from devops_runner_python.discovery import find_python_projects
+from devops_runner_python.pyproject import get_service_endpoint, get_service_endpoints
+from devops_runner_python.services import ServiceConfigError, build_service_index
+from .conftest import reset_memos, write_pyproject
+
+
+def write_service(directory, name, port):
+    """Write a pyproject.toml declaring a service deployment."""
+    write_pyproject(directory, name, f'[tool.devops.deployment]\nservice_name = "{name}"\nport = {port}\n')
+
+
+@pytest.fixture
+def monorepo(monorepo, monkeypatch):
+    """Fixture with two services."""
+    monkeypatch.delenv("IS_KUBERNETES", raising=False)
+    write_service(monorepo / "apps" / "api", "api", 8000)
+    write_service(monorepo / "apps" / "worker", "worker", 8001)
+    return monorepo
+
+
+def test_build_service_index_detects_conflicts():
+    """Test that conflicts only fail the lookups of the services involved, reporting all their errors."""
+    deployments = [
+        ("api", {"service_name": "api", "port": 8000}),
+        ("api-v2", {"service_name": "api", "port": 8002}),
+        ("worker", {"service_name": "worker", "port": "8000"}),
+        ("billing", {"service_name": "billing", "port": "http"}),
+        ("web", {"service_name": "web", "port": 8080}),
+        ("lib", {}),
+    ]
+
+    index = build_service_index(deployments)
+
+    assert index.get_port("web") == 8080
+    assert index.get_port("lib") is None
+    with pytest.raises(ServiceConfigError) as excinfo:
+        index.get_port("api")
+    assert "Service api is declared by both api and api-v2" in str(excinfo.value)
+    assert "Port 8000 is used by both api and worker" in str(excinfo.value)
+    with pytest.raises(ServiceConfigError, match="Port 8000 is used by both api and worker"):
+        index.get_port("worker")
+    with pytest.raises(ServiceConfigError, match="Invalid port value for service billing"):
+        index.get_port("billing")
+
+
+def test_conflicts_do_not_break_other_services(monorepo):
+    """Test that a port conflict elsewhere in the repo doesn't fail the endpoints of unrelated services."""
+    write_service(monorepo / "apps" / "billing", "billing", 8000)
+
+    assert get_service_endpoint("worker") == "http://127.0.0.1:8001"
+    with pytest.raises(ServiceConfigError, match="Port 8000 is used by both"):
+        get_service_endpoints(["worker", "billing"])
+
+
+def test_get_service_endpoints(monorepo, monkeypatch):
+    """Test bulk resolution locally and inside Kubernetes."""
+    assert get_service_endpoints(["api", "worker"]) == {
+        "api": "http://127.0.0.1:8000",
+        "worker": "http://127.0.0.1:8001",
+    }
+    with pytest.raises(RuntimeError, match="Port not found for service billing"):
+        get_service_endpoints(["api", "billing"])
+
+    monkeypatch.setenv("IS_KUBERNETES", "true")
+    assert get_service_endpoint("billing") == "http://billing"
+
+
+def test_service_index_loads_from_workspace_index_without_walking(monorepo, capsys):
+    """Test that a runtime process resolves ports from the persisted index, re-reading changed manifests."""
+    find_python_projects()
+    write_service(monorepo / "apps" / "worker", "worker", 9001)
+    reset_memos()
+    capsys.readouterr()
+
+    with patch("os.scandir", side_effect=AssertionError("walked the repo")):
+        endpoints = get_service_endpoints(["api", "worker"])
+
+    assert endpoints == {"api": "http://127.0.0.1:8000", "worker": "http://127.0.0.1:9001"}
+    assert capsys.readouterr().out == ""
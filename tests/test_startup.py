@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+import time
+from devops_runner_python.cli.startup_profile import parse_importtime
+
+# Cold-start budget, in seconds, for `devopspy exec` up to running the command.
+# Can be raised on slow CI runners with DEVOPS_STARTUP_BUDGET.
+EXEC_STARTUP_BUDGET = float(os.getenv("DEVOPS_STARTUP_BUDGET", "1.0"))
+
+CLI = "from devops_runner_python.cli import main; main()"
+
+
+def run_exec(tmp_path, *python_args):
+    """Run `devopspy exec` in an empty monorepo and return the completed process."""
+    project_dir = tmp_path / "app"
+    project_dir.mkdir(exist_ok=True)
+    (project_dir / "pyproject.toml").write_text('[project]\nname = "app"\n')
+    return subprocess.run(
+        [sys.executable, *python_args, "-c", CLI, "exec", "--in", "app", "true"],
+        cwd=tmp_path, capture_output=True, text=True,
+        env={**os.environ, "MONOREPO_ROOT": str(tmp_path), "PYTHONPATH": os.pathsep.join(sys.path)}
+    )
+
+
+def test_exec_does_not_import_validation_stack(tmp_path):
+    """Test that exec doesn't import the modules only needed for environment validation."""
+    result = run_exec(tmp_path, "-X", "importtime")
+    assert result.returncode == 0
+
+    modules = {timing.module for timing in parse_importtime(result.stderr.splitlines())}
+    assert "devops_runner_python.cli.exec" in modules
+    for module in ["yaml", "devops_runner_python.env_validation", "devops_runner_python.scheduler",
+                   "devops_runner_python.task_cache", "multiprocessing"]:
+        assert module not in modules
+
+
+def test_exec_startup_budget(tmp_path):
+    """Test that the cold start of exec stays within its time budget."""
+    # Warm the filesystem and bytecode caches, then keep the best of a few runs to reduce noise
+    run_exec(tmp_path)
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        result = run_exec(tmp_path)
+        timings.append(time.perf_counter() - start)
+        assert result.returncode == 0
+
+    assert min(timings) < EXEC_STARTUP_BUDGET, f"exec took {min(timings):.3f}s, budget is {EXEC_STARTUP_BUDGET}s"
+
+
+def test_parse_importtime():
+    """Test parsing of python -X importtime output."""
+    lines = [
+        "import time: self [us] | cumulative | imported package",
+        "import time:       120 |        120 |   _io",
+        "import time:      2000 |       2500 | json",
+        "unrelated stderr output",
+    ]
+
+    timings = parse_importtime(lines)
+
+    assert [(t.module, t.self_us, t.cumulative_us, t.depth) for t in timings] == [
+        ("_io", 120, 120, 1),
+        ("json", 2000, 2500, 0),
+    ]
+
+
+def test_startup_profile_must_come_first(tmp_path):
+    """Test that --startup-profile is rejected instead of ignored when it isn't the first argument."""
+    result = subprocess.run(
+        [sys.executable, "-c", CLI, "--trace", str(tmp_path / "trace.json"), "--startup-profile", "exec", "--all",
+         "true"],
+        cwd=tmp_path, capture_output=True, text=True,
+        env={**os.environ, "MONOREPO_ROOT": str(tmp_path), "PYTHONPATH": os.pathsep.join(sys.path)}
+    )
+    assert result.returncode == 2
+    assert "--startup-profile must be the first argument" in result.stderr
@@ -0,0 +1,128 @@
+import os
+import shutil
+import pytest
+from devops_runner_python.discovery import Project, ScriptConfig
+from devops_runner_python import task_cache
+from .conftest import PASSTHROUGH_UV, install_executable, write_pyproject
+
+
+@pytest.fixture
+def workspace(monorepo):
+    """Fixture with a cacheable 'build' script in app, which depends on lib."""
+    for name in ["app", "lib"]:
+        os.makedirs(monorepo / name)
+        (monorepo / name / "main.py").write_text(f"# {name}\n")
+    build = ScriptConfig(cmd="make", cache=True, outputs=["dist/**"], env=["BUILD_MODE"])
+    projects = {
+        "app": Project(name="app", path=str(monorepo / "app"), scripts={"build": "make"}, deployment={},
+                       dependencies=["lib"], script_config={"build": build}),
+        "lib": Project(name="lib", path=str(monorepo / "lib"), scripts={}, deployment={}),
+    }
+    return monorepo, projects
+
+
+def test_cache_key_inputs(workspace):
+    """Test that the key changes with sources, dependency sources, args, lockfile and env values."""
+    root, projects = workspace
+    app = projects["app"]
+
+    def key(args=(), environ=None):
+        return task_cache.compute_cache_key(projects, app, "build", list(args), environ or {})
+
+    original = key()
+    assert key() == original
+    assert key(["--release"]) != original
+    assert key(environ={"BUILD_MODE": "release"}) != original
+    assert key(environ={"UNRELATED": "x"}) == original
+
+    (root / "lib" / "main.py").write_text("# changed\n")
+    changed_dependency = key()
+    assert changed_dependency != original
+
+    (root / "uv.lock").write_text("lock")
+    assert key() != changed_dependency
+
+
+def test_cache_key_independent_of_checkout_location(workspace, tmp_path_factory, monkeypatch):
+    """Test that copies of the monorepo at different paths compute the same keys."""
+    root, projects = workspace
+    (root / "uv.lock").write_text("lock")
+    (root / "app" / "uv.lock").write_text("app lock")
+    original = task_cache.compute_cache_key(projects, projects["app"], "build", [], {})
+
+    copy = tmp_path_factory.mktemp("checkout")
+    shutil.copytree(root, copy, dirs_exist_ok=True)
+    monkeypatch.setenv("MONOREPO_ROOT", str(copy))
+    moved = {name: project.model_copy(update={"path": str(copy / name)}) for name, project in projects.items()}
+
+    assert task_cache.compute_cache_key(moved, moved["app"], "build", [], {}) == original
+
+
+def test_cache_key_ignores_outputs(workspace):
+    """Test that the script's declared outputs don't invalidate its own key."""
+    root, projects = workspace
+    original = task_cache.compute_cache_key(projects, projects["app"], "build", [], {})
+
+    os.makedirs(root / "app" / "dist")
+    (root / "app" / "dist" / "app.whl").write_text("binary")
+
+    assert task_cache.compute_cache_key(projects, projects["app"], "build", [], {}) == original
+
+
+def test_store_lookup_and_restore(workspace):
+    """Test that stored results are replayed, declared outputs restored, and the cache ignored by git."""
+    root, projects = workspace
+    app = projects["app"]
+    os.makedirs(root / "app" / "dist")
+    (root / "app" / "dist" / "app.whl").write_text("binary")
+
+    assert task_cache.lookup(str(root), "k1") is None
+    task_cache.store(str(root), "k1", app, "build", 0, b"built\n")
+    assert (root / ".devops" / ".gitignore").read_text().splitlines()[-1] == "*"
+    (root / "app" / "dist" / "app.whl").unlink()
+
+    cached = task_cache.lookup(str(root), "k1")
+    assert cached.exit_code == 0
+    assert cached.output == b"built\n"
+    assert task_cache.restore_outputs(str(root), "k1", app) == 1
+    assert (root / "app" / "dist" / "app.whl").read_text() == "binary"
+
+    task_cache.clean(str(root))
+    assert task_cache.lookup(str(root), "k1") is None
+
+
+def test_evict_least_recently_used(workspace):
+    """Test that eviction removes the least recently used entries first."""
+    root, projects = workspace
+    for i, key in enumerate(["old", "used", "new"]):
+        task_cache.store(str(root), key, projects["app"], "build", 0, b"x" * 100)
+        meta_path = os.path.join(task_cache.get_tasks_cache_dir(str(root)), key, task_cache.META_FILE_NAME)
+        os.utime(meta_path, (1000 + i, 1000 + i))
+    task_cache.lookup(str(root), "used")
+    entry_dir = os.path.join(task_cache.get_tasks_cache_dir(str(root)), "new")
+    entry_size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+
+    removed = task_cache.evict(str(root), 2 * entry_size + 10)
+
+    assert removed == 1
+    assert task_cache.lookup(str(root), "old") is None
+    assert task_cache.lookup(str(root), "used") is not None
+
+
+def test_cache_hit_message_precedes_replayed_output(monorepo, monkeypatch):
+    """Test that a replayed result follows the cache hit message when stdout is a pipe."""
+    import sys
+    import subprocess
+
+    write_pyproject(monorepo / "app", "app", '[tool.devops.scripts]\n'
+                    f'build = {{ cmd = "{sys.executable} -c \\"print(\'built\')\\"", cache = true }}\n')
+    install_executable(monkeypatch, monorepo / "bin", "uv", PASSTHROUGH_UV)
+
+    cmd = [sys.executable, "-c", "from devops_runner_python.cli import main; main()", "run", "app:build"]
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    for _ in range(2):
+        proc = subprocess.run(cmd, cwd=monorepo, env=env, stdout=subprocess.PIPE, check=True)
+
+    out = proc.stdout.decode()
+    assert "Cache hit for app:build" in out
+    assert out.index("Cache hit for app:build") < out.index("built\n")
@@ -0,0 +1,53 @@
+import sys
+import json
+import pytest
+from devops_runner_python import tracing
+from devops_runner_python.scheduler import Task, run_tasks
+
+
+@pytest.fixture
+def traced():
+    """Enable tracing for one test and disable it afterwards."""
+    tracing.enable()
+    yield
+    tracing._events = None
+    tracing._lane_names.clear()
+
+
+def test_span_is_noop_when_disabled():
+    """Test that spans are not recorded unless tracing is enabled."""
+    with tracing.span("discovery"):
+        pass
+
+    assert not tracing.is_enabled()
+    assert tracing.summarize() == []
+
+
+def test_write_trace_emits_chrome_trace_events(tmp_path, traced):
+    """Test that spans are written as complete events that nest by timestamp."""
+    with tracing.span("devopspy run"):
+        with tracing.span("discovery", count=3):
+            pass
+
+    trace_path = tmp_path / "trace.json"
+    tracing.write_trace(str(trace_path))
+
+    events = {event["name"]: event for event in json.loads(trace_path.read_text())["traceEvents"]}
+    outer, inner = events["devopspy run"], events["discovery"]
+    assert outer["ph"] == inner["ph"] == "X"
+    assert inner["args"] == {"count": 3}
+    assert outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_run_tasks_records_a_lane_per_concurrent_task(tmp_path, traced, capfd):
+    """Test that concurrent tasks are recorded on separate lanes and summarized as tasks."""
+    code = "import time; time.sleep(0.2)"
+    tasks = [Task(name=name, cmd=[sys.executable, "-c", code], cwd=str(tmp_path)) for name in ("a", "b")]
+
+    run_tasks(tasks, jobs=2)
+
+    spans = [event for event in tracing._events if event["cat"] == "task"]
+    assert sorted(event["name"] for event in spans) == ["a", "b"]
+    assert len({event["tid"] for event in spans}) == 2
+    assert any("2 tasks" in line for line in tracing.summarize())
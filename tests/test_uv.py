@@ -0,0 +1,76 @@
+import pytest
+from devops_runner_python.cli.uv import uv
+from .conftest import install_executable, write_pyproject
+
+# A stub uv logging the project it runs in, failing in projects holding a FAIL file. With WAIT_FOR
+# set, it waits (up to 5 seconds) until that many projects started, failing if they never do
+STUB_UV = """#!/bin/sh
+name=$(basename "$PWD")
+echo "$name" >> "{log}"
+touch "{started}/$name"
+if [ -n "$WAIT_FOR" ]; then
+    i=0
+    while [ "$(ls "{started}" | wc -l)" -lt "$WAIT_FOR" ]; do
+        i=$((i + 1))
+        [ "$i" -gt 50 ] && exit 2
+        sleep 0.1
+    done
+fi
+[ -e FAIL ] && exit 1
+exit 0
+"""
+
+
+@pytest.fixture
+def monorepo(monorepo, monkeypatch):
+    """Fixture with three projects and a stub `uv` on PATH; returns a function listing where uv ran."""
+    for name in ("api", "web", "worker"):
+        write_pyproject(monorepo / name, name)
+    (monorepo / "started").mkdir()
+    log = monorepo / "uv.log"
+    install_executable(monkeypatch, monorepo / "bin", "uv", STUB_UV.format(log=log, started=monorepo / "started"))
+    monkeypatch.delenv("WAIT_FOR", raising=False)
+    monkeypatch.chdir(monorepo / "bin")
+
+    def ran():
+        return sorted(log.read_text().splitlines()) if log.exists() else []
+    return monorepo, ran
+
+
+def test_failures_are_collected_by_default(monorepo, capsys):
+    """Test that a failing project doesn't stop uv from running in the others, and is reported at the end."""
+    root, ran = monorepo
+    (root / "web" / "FAIL").touch()
+
+    assert uv(["lock"]) == 1
+    assert ran() == ["api", "web", "worker"]
+    assert "failed for 1 of 3 projects: web" in capsys.readouterr().out
+
+
+def test_fail_fast_stops_at_first_failure(monorepo):
+    """Test that fail_fast stops running uv after the first failing project, sequentially or not."""
+    root, ran = monorepo
+    for name in ("api", "web", "worker"):
+        (root / name / "FAIL").touch()
+
+    assert uv(["lock"], fail_fast=True) == 1
+    assert len(ran()) == 1
+
+    (root / "uv.log").unlink()
+    assert uv(["lock"], jobs=2, fail_fast=True) == 1
+    assert len(ran()) <= 2
+
+
+def test_jobs_run_projects_concurrently(monorepo, monkeypatch, capsys):
+    """Test that with jobs > 1 uv runs in several projects at once and still reports every failure."""
+    root, ran = monorepo
+    monkeypatch.setenv("WAIT_FOR", "3")
+
+    assert uv(["lock"], jobs=3) == 0
+    assert ran() == ["api", "web", "worker"]
+
+    (root / "uv.log").unlink()
+    (root / "web" / "FAIL").touch()
+    assert uv(["lock"], jobs=3) == 1
+    assert ran() == ["api", "web", "worker"]
+    assert "failed for 1 of 3 projects: web" in capsys.readouterr().out
@@ -0,0 +1,168 @@
+import os
+import stat
+import pytest
+from devops_runner_python.cli.run import resolve_script_command
+from devops_runner_python.cli.uv import uv
+from devops_runner_python.discovery import Project
+from devops_runner_python.venv import (
+    direct_command, get_environment_root, is_direct_run_enabled, is_stamping_sync, is_synced, write_stamp
+)
+from .conftest import install_executable, write_pyproject
+
+
+def make_venv(directory, executables=("pytest",)):
+    """Create a fake virtual environment holding the given executables."""
+    bin_dir = directory / ".venv" / ("Scripts" if os.name == "nt" else "bin")
+    bin_dir.mkdir(parents=True)
+    (directory / ".venv" / "pyvenv.cfg").write_text("version_info = 3.12.1\n")
+    install(directory, "requests-2.32.0")
+    for name in executables:
+        path = bin_dir / name
+        path.write_text("#!/bin/sh\n")
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return bin_dir
+
+
+def install(directory, distribution):
+    """Record a distribution as installed in the fake virtual environment of directory."""
+    site_packages = directory / ".venv" / ("Lib" if os.name == "nt" else "lib/python3.12") / "site-packages"
+    (site_packages / f"{distribution}.dist-info").mkdir(parents=True)
+
+
+def make_project(directory, name, lock=True):
+    """Create a project directory with a pyproject.toml and optionally a uv.lock."""
+    write_pyproject(directory, name)
+    if lock:
+        (directory / "uv.lock").write_text("version = 1\n")
+    return Project(name=name, path=str(directory), scripts={"test": "pytest -x"}, deployment={})
+
+
+@pytest.fixture
+def monorepo(monorepo, monkeypatch):
+    """Fixture leaving uv's environment location at its default."""
+    monkeypatch.delenv("UV_PROJECT_ENVIRONMENT", raising=False)
+    return monorepo
+
+
+def test_stamp_tracks_fingerprint(monorepo):
+    """Test that a stamp only holds until the lockfile, manifest or interpreter change."""
+    project = make_project(monorepo / "api", "api")
+    make_venv(monorepo / "api")
+    assert not is_synced(project)
+
+    write_stamp(project)
+    assert is_synced(project)
+
+    for path, content in [("uv.lock", "version = 2\n"), ("pyproject.toml", "[project]\n"),
+                          (".venv/pyvenv.cfg", "version_info = 3.13.0\n")]:
+        write_stamp(project)
+        (monorepo / "api" / path).write_text(content)
+        assert not is_synced(project)
+
+
+def test_direct_command_resolves_venv_executable(monorepo):
+    """Test that synced projects run executables from their .venv with the environment uv run would set."""
+    project = make_project(monorepo / "api", "api")
+    bin_dir = make_venv(monorepo / "api")
+    write_stamp(project)
+
+    cmd, environ = direct_command(project, ["pytest", "-x"], {"PATH": "/usr/bin", "PYTHONHOME": "/x"})
+
+    assert cmd == [str(bin_dir / "pytest"), "-x"]
+    assert environ["PATH"] == f"{bin_dir}{os.pathsep}/usr/bin"
+    assert environ["VIRTUAL_ENV"] == str(monorepo / "api" / ".venv")
+    assert "PYTHONHOME" not in environ
+    assert direct_command(project, ["ruff", "check"], {}) is None
+
+
+def test_resolve_script_command_falls_back_to_uv_run(monorepo):
+    """Test that scripts go through uv run unless direct runs are enabled and the environment is synced."""
+    project = make_project(monorepo / "api", "api")
+    bin_dir = make_venv(monorepo / "api")
+
+    assert resolve_script_command(project, "test", ["-q"], {}, direct=True) == (["uv", "run", "pytest", "-x", "-q"], {})
+    write_stamp(project)
+    assert resolve_script_command(project, "test", [], {}, direct=False)[0] == ["uv", "run", "pytest", "-x"]
+    assert resolve_script_command(project, "test", [], {}, direct=True)[0] == [str(bin_dir / "pytest"), "-x"]
+
+
+def test_workspace_members_share_root_environment(monorepo):
+    """Test that workspace members synced into the root environment stay synced until a sync changes it."""
+    make_project(monorepo, "root")
+    api = make_project(monorepo / "apps" / "api", "api", lock=False)
+    web = make_project(monorepo / "apps" / "web", "web", lock=False)
+    make_venv(monorepo)
+
+    assert get_environment_root(api) == os.path.realpath(monorepo)
+    write_stamp(api)
+    assert is_synced(api) and not is_synced(web)
+    write_stamp(web)
+    assert is_synced(api) and is_synced(web)
+
+    # Syncing web installed or removed packages, which may be ones api needs
+    install(monorepo, "flask-3.0.0")
+    write_stamp(web)
+    assert not is_synced(api) and is_synced(web)
+
+
+def test_direct_run_setting(monorepo, monkeypatch):
+    """Test that direct runs are opt-in through [tool.devops.run] or DEVOPS_DIRECT_RUN."""
+    assert not is_direct_run_enabled(str(monorepo))
+    (monorepo / "pyproject.toml").write_text("[tool.devops.run]\ndirect = true\n")
+    assert is_direct_run_enabled(str(monorepo))
+    monkeypatch.setenv("DEVOPS_DIRECT_RUN", "0")
+    assert not is_direct_run_enabled(str(monorepo))
+
+
+def test_is_stamping_sync():
+    """Test that only syncs leaving the default environment are stamped."""
+    assert is_stamping_sync(["sync"])
+    assert is_stamping_sync(["sync", "--frozen", "-q"])
+    assert not is_stamping_sync(["sync", "--no-dev"])
+    assert not is_stamping_sync(["lock"])
+
+
+def test_incremental_sync_skips_synced_projects(monorepo, monkeypatch, capsys):
+    """Test that incremental syncs only invoke uv in projects whose fingerprint changed or that lack a .venv."""
+    for name in ("api", "web"):
+        make_project(monorepo / name, name)
+    log = monorepo / "uv.log"
+    install_executable(monkeypatch, monorepo / "fake-bin", "uv",
+                       f'#!/bin/sh\npwd >> "{log}"\nmkdir -p .venv\necho "version_info = 3.12" > .venv/pyvenv.cfg\n')
+    monkeypatch.chdir(monorepo / "fake-bin")
+
+    def synced_dirs():
+        dirs = sorted(os.path.basename(line) for line in log.read_text().splitlines()) if log.exists() else []
+        log.write_text("")
+        return dirs
+
+    assert uv(["sync"], incremental=True) == 0
+    assert synced_dirs() == ["api", "web"]
+
+    assert uv(["sync"], incremental=True) == 0
+    assert synced_dirs() == []
+    assert "Skipping 2 of 2 projects" in capsys.readouterr().out
+
+    (monorepo / "web" / "uv.lock").write_text("version = 2\n")
+    assert uv(["sync"], jobs=2, incremental=True) == 0
+    assert synced_dirs() == ["web"]
+    assert uv(["lock"], incremental=True) == 1
+
+
+def test_incremental_sync_skips_synced_workspace_members(monorepo, monkeypatch, capsys):
+    """Test that incremental syncs skip every synced member of a uv workspace, not just the last one."""
+    make_project(monorepo, "root")
+    for name in ("api", "web"):
+        make_project(monorepo / "apps" / name, name, lock=False)
+    make_venv(monorepo)
+    log = monorepo / "uv.log"
+    install_executable(monkeypatch, monorepo / "fake-bin", "uv", f'#!/bin/sh\npwd >> "{log}"\n')
+    monkeypatch.chdir(monorepo / "fake-bin")
+
+    assert uv(["sync"], incremental=True) == 0
+    assert len(log.read_text().splitlines()) == 2
+
+    log.write_text("")
+    assert uv(["sync"], jobs=2, incremental=True) == 0
+    assert log.read_text() == ""
+    assert "Skipping 2 of 2 projects" in capsys.readouterr().out
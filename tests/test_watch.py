@@ -0,0 +1,81 @@
+from devops_runner_python.cli.watch import get_stale_projects, get_watch_roots
+from devops_runner_python.discovery import Project, ScriptConfig, find_python_projects
+from .conftest import write_pyproject
+
+
+def make_project(name, path, dependencies=(), outputs=()):
+    """Build a project with a 'test' script declaring the given outputs."""
+    return Project(
+        name=name, path=path, scripts={"test": "pytest"}, deployment={}, dependencies=list(dependencies),
+        script_config={"test": ScriptConfig(cmd="pytest", outputs=list(outputs))},
+    )
+
+
+def test_get_stale_projects_follows_dependents_and_skips_outputs(tmp_path):
+    """Test that a change marks its project and dependents stale, unless it is a declared output."""
+    projects = {
+        "core": make_project("core", str(tmp_path / "libs" / "core"), outputs=["coverage.xml", "build/"]),
+        "api": make_project("api", str(tmp_path / "apps" / "api"), ["core"]),
+        "cli": make_project("cli", str(tmp_path / "apps" / "cli")),
+    }
+    names = ["api", "cli", "core"]
+
+    assert get_stale_projects(projects, names, "test", [str(tmp_path / "libs" / "core" / "core.py")]) == {"core", "api"}
+    assert get_stale_projects(projects, ["api"], "test", [str(tmp_path / "libs" / "core" / "core.py")]) == {"api"}
+    assert get_stale_projects(projects, names, "test", [
+        str(tmp_path / "libs" / "core" / "coverage.xml"),
+        str(tmp_path / "libs" / "core" / "build" / "lib" / "core.py"),
+        str(tmp_path / "README.md"),
+    ]) == set()
+
+
+def test_get_watch_roots_skips_nested_projects(tmp_path):
+    """Test that directories nested in another watched project are not watched twice."""
+    projects = {
+        "api": make_project("api", str(tmp_path / "apps" / "api")),
+        "plugin": make_project("plugin", str(tmp_path / "apps" / "api" / "plugin")),
+        "core": make_project("core", str(tmp_path / "libs" / "core")),
+    }
+
+    assert get_watch_roots(projects, projects) == [str(tmp_path / "apps" / "api"), str(tmp_path / "libs" / "core")]
+
+
+def test_watch_reloads_projects_and_environment_after_config_changes(monorepo, monkeypatch):
+    """Test that changing a .env file or a manifest rediscovers the projects and re-runs with the new environment."""
+    from devops_runner_python.cli import watch
+
+    (monorepo / "config").mkdir()
+    (monorepo / "config" / ".env.development").write_text("GREETING=hello\n")
+    write_pyproject(monorepo / "api", "api", '[tool.devops.scripts]\ntest = "pytest"\n')
+    manifest = monorepo / "api" / "pyproject.toml"
+    monkeypatch.chdir(monorepo)
+
+    class Watcher:
+        def close(self):
+            pass
+
+    runs = []
+    edits = [
+        lambda: (monorepo / "config" / ".env.development").write_text("GREETING=bonjour\n"),
+        lambda: manifest.write_text('[project]\nname = "api"\n[tool.devops.scripts]\ntest = "pytest -x"\n'),
+    ]
+
+    def collect_changes(watchers, timeout=None):
+        if not edits:
+            raise KeyboardInterrupt
+        edits.pop(0)()
+        return {str(monorepo / "config" / ".env.development")} if len(edits) == 1 else {str(manifest)}
+
+    def execute(projects, batch, deps, script_name, script_args, environ, *args):
+        runs.append(([project.scripts["test"] for project in batch], environ["GREETING"]))
+        return {}
+
+    monkeypatch.setattr(watch, "create_watcher", lambda *args: Watcher())
+    monkeypatch.setattr(watch, "_collect_changes", collect_changes)
+    monkeypatch.setattr(watch, "execute", execute)
+    monkeypatch.setattr(watch, "report_failures", lambda *args: None)
+    projects = find_python_projects()
+    environ = watch.resolve_env_vars("development")
+
+    assert watch.watch_projects(projects, [projects["api"]], "test", [], environ, env="development") == 0
+    assert runs == [(["pytest"], "hello"), (["pytest"], "bonjour"), (["pytest -x"], "bonjour")]
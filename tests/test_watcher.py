@@ -0,0 +1,41 @@
+import sys
+import time
+import pytest
+from devops_runner_python.watcher import InotifyWatcher, PollingWatcher
+from devops_runner_python.workspace import DEFAULT_IGNORE_DIRS
+
+
+def wait_for_changes(watcher, timeout=2.0):
+    """Collect the changes reported by a watcher until some arrive or the timeout expires."""
+    deadline = time.monotonic() + timeout
+    changes = set()
+    while not changes and time.monotonic() < deadline:
+        time.sleep(0.05)
+        changes = watcher.changes()
+    return changes
+
+
+@pytest.mark.parametrize("watcher_class", [
+    PollingWatcher,
+    pytest.param(InotifyWatcher, marks=pytest.mark.skipif(not sys.platform.startswith("linux"),
+                                                           reason="inotify is only available on Linux")),
+])
+def test_watcher_reports_changed_paths(tmp_path, watcher_class):
+    """Test that watchers report changed files, including those in new directories, but not ignored ones."""
+    kwargs = {"interval": 0.05} if watcher_class is PollingWatcher else {}
+    watcher = watcher_class(str(tmp_path), DEFAULT_IGNORE_DIRS, **kwargs)
+    try:
+        (tmp_path / "node_modules").mkdir()
+        (tmp_path / "node_modules" / "pkg.js").write_text("ignored")
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "app.py").write_text("print('hello')")
+
+        changes = wait_for_changes(watcher)
+        time.sleep(0.2)
+        changes |= watcher.changes()
+
+        assert str(tmp_path / "src" / "app.py") in changes
+        assert not any("node_modules" in path for path in changes)
+        assert not watcher.changes()
+    finally:
+        watcher.close()